@@ -22,6 +22,11 @@ class GracefulShutdown:
 def run_grpc_server(shutdown_event: threading.Event, server_holder: dict):
     from agent.internal.server import init_server
 
+    if ServerConfig().grpc_server_mode == "asyncio":
+        # Its own loop in this thread, the rpcs don't wait on the monitors of the main loop
+        asyncio.run(run_async_grpc_server(shutdown_event))
+        return
+
     try:
         server = init_server()
         server_holder['server'] = server
@@ -49,6 +54,32 @@ def run_grpc_server(shutdown_event: threading.Event, server_holder: dict):
         shutdown_event.set()
 
 
+async def run_async_grpc_server(shutdown_event: threading.Event):
+    from agent.internal.server import init_async_server
+
+    try:
+        server = init_async_server()
+        await server.start()
+
+        config = ServerConfig()
+        logging.info(f"gRPC server (asyncio) started on port {config.grpc_port}")
+
+        while not shutdown_event.is_set():
+            try:
+                if await server.wait_for_termination(timeout=1.0):
+                    break
+            except Exception as e:
+                logging.error(f"gRPC server error: {e}")
+                break
+
+        logging.info("Stopping gRPC server...")
+        await server.stop(grace=5.0)
+
+    except Exception as e:
+        logging.error(f"Failed to start gRPC server: {e}")
+        shutdown_event.set()
+
+
 async def run_state_managers(shutdown_event: threading.Event):
     from agent.monitor.health import MySQLHealthCheckMonitor
     from agent.monitor.state import EtcdStateMonitor
@@ -21,9 +21,10 @@ from agent.helpers import (
     render_template,
     wait_for_ssh_daemon,
 )
+from agent.internal.async_db_client import AsyncDatabaseClient
 from agent.internal.config import ClusterConfig
 from agent.internal.db_client import DatabaseClient
-from agent.internal.etcd_client import Etcd3Client
+from agent.internal.etcd_pool import get_etcd_client
 from agent.internal.utils import get_redis_client
 
 
@@ -68,12 +69,7 @@ class MySQL(SystemdService):
         }
 
         # Fetch cluster configuration
-        server_config = ServerConfig()
-        etcd_client = Etcd3Client(
-            addresses=[f"{server_config.etcd_host}:{server_config.etcd_port}"],
-            user=etcd_username,
-            password=etcd_password,
-        )
+        etcd_client = get_etcd_client(etcd_username, etcd_password)
         cluster_config = ClusterConfig(etcd_client=etcd_client, cluster_id=cluster_id)
         if not cluster_config.proxy:
             raise ValueError("Cluster with ID {cluster_id} does not have a proxy configured. Please configure a proxy for the cluster before creating MySQL instances.")
@@ -138,6 +134,7 @@ class MySQL(SystemdService):
         self.db_options = metadata.get("db_options", {})
 
         self._db_instance_for_health_check:DatabaseClient|None = None
+        self._async_db_instance_for_health_check:AsyncDatabaseClient|None = None
 
     def update_version(self, image:str, tag:str):
         return self.update(image=image, tag=tag, deploy=True)
@@ -384,6 +381,14 @@ class MySQL(SystemdService):
             redis.publish(server_config.mysql_monitor_commands_redis_channel, f"remove {self.model.id}")
             redis.publish(server_config.etcd_monitor_commands_redis_channel, f"remove {self.model.cluster_id}")
 
+    # Everything required for the health status, fetched in a single round trip
+    HEALTH_CHECK_QUERY = ";".join([
+        "SELECT @@gtid_current_pos AS gtid",
+        "SHOW GLOBAL STATUS WHERE Variable_name IN ('Threads_running', 'Uptime', "
+        "'Rpl_semi_sync_master_status', 'Rpl_semi_sync_slave_status', 'Rpl_semi_sync_master_clients')",
+        "SHOW SLAVE STATUS",
+    ])
+
     @override
     def get_health_info(self) -> (bool, DBHealthStatus | None):
         """
@@ -396,15 +401,63 @@ class MySQL(SystemdService):
             if not self._db_instance_for_health_check:
                 self._db_instance_for_health_check = self.get_db_conn(autocommit=True)
 
-            gtid = self._db_instance_for_health_check.query("SELECT @@gtid_current_pos")[0]["@@gtid_current_pos"]
-            return True, DBHealthStatus(
-                db_type=DBType.MYSQL if self.model.service == "mysql" else DBType.MARIADB,
-                reported_at=time.time_ns() // 1_000_000,
-                global_transaction_id=gtid,
-            )
+            results = self._db_instance_for_health_check.query_multi(self.HEALTH_CHECK_QUERY)
+            return True, self._to_health_status(results)
         except:
             return False, None
 
+    async def get_health_info_async(self) -> (bool, DBHealthStatus | None):
+        """
+        Same as `get_health_info`, but runs on the event loop without blocking it.
+        Keeps a single persistent connection for health checks, it's re-established on failure.
+        """
+        try:
+            if not self._async_db_instance_for_health_check:
+                self._async_db_instance_for_health_check = AsyncDatabaseClient(
+                    host="127.0.0.1",
+                    port=self.db_port,
+                    user="root",
+                    password=self.mysql_root_password,
+                )
+
+            results = await self._async_db_instance_for_health_check.query_multi(self.HEALTH_CHECK_QUERY)
+            return True, self._to_health_status(results)
+        except Exception:
+            return False, None
+
+    def _to_health_status(self, results:list[list[dict]]) -> DBHealthStatus:
+        """
+        Build the health status from the result sets of `HEALTH_CHECK_QUERY`.
+        Values can be typed (mysqlclient) or strings (async client), so everything is normalized here.
+        """
+        gtid_result, status_result, slave_result = results
+        global_status = {row["Variable_name"].lower(): str(row["Value"]) for row in status_result}
+
+        status = DBHealthStatus(
+            db_type=DBType.MYSQL if self.model.service == "mysql" else DBType.MARIADB,
+            reported_at=time.time_ns() // 1_000_000,
+            global_transaction_id=gtid_result[0]["gtid"] or "",
+            rpl_semi_sync_master_status=global_status.get("rpl_semi_sync_master_status", "OFF").upper() == "ON",
+            rpl_semi_sync_slave_status=global_status.get("rpl_semi_sync_slave_status", "OFF").upper() == "ON",
+            rpl_semi_sync_master_clients=int(global_status.get("rpl_semi_sync_master_clients", 0)),
+            threads_running=int(global_status.get("threads_running", 0)),
+            uptime_seconds=int(global_status.get("uptime", 0)),
+        )
+
+        if slave_result:
+            slave_info = slave_result[0]
+            status.is_replica = True
+            status.slave_io_running = str(slave_info.get("Slave_IO_Running")) == "Yes"
+            status.slave_sql_running = str(slave_info.get("Slave_SQL_Running")) == "Yes"
+            if slave_info.get("Seconds_Behind_Master") is not None:
+                status.seconds_behind_master = int(slave_info["Seconds_Behind_Master"])
+        return status
+
+    async def close_health_check_connection_async(self):
+        if self._async_db_instance_for_health_check:
+            await self._async_db_instance_for_health_check.close()
+            self._async_db_instance_for_health_check = None
+
 
     @staticmethod
     def sync_replication_config_for_all_servers(cluster_id:str|None=None, config:ClusterConfig=None):
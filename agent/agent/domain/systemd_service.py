@@ -8,10 +8,11 @@ from pathlib import Path
 from client import Agent
 from agent import ServerConfig
 from agent.helpers import modify_systemctl_commands_for_user_mode, render_template
-from agent.internal.config import ClusterConfig
+from agent.internal.config import ClusterConfig, ClusterConfigCache
 from agent.internal.db.models import SystemdServiceModel
 from agent.internal.db_client import DatabaseClient
 from agent.internal.etcd_client import Etcd3Client
+from agent.internal.etcd_pool import get_etcd_client
 
 
 class ServiceStatus(enum.Enum):
@@ -125,7 +126,16 @@ class SystemdService:
 
     @cached_property
     def cluster_config(self) -> ClusterConfig:
-        return ClusterConfig(self.kv, self.model.cluster_id)
+        # Snapshot from the process wide cache, stays the same for the lifetime of this object
+        # Long living objects should call `reload_cluster_config` to see the changes
+        return ClusterConfigCache().get(self.model.cluster_id, lambda: self.kv)
+
+    def reload_cluster_config(self, max_staleness_ms:int|None=None) -> ClusterConfig:
+        """
+        Pass `max_staleness_ms=0` to read it from etcd, e.g. before updating the config in a transaction
+        """
+        self.cluster_config = ClusterConfigCache().get(self.model.cluster_id, lambda: self.kv, max_staleness_ms)
+        return self.cluster_config
 
     def get_agent_for_node(self, node_id:str) -> Agent:
         node = self.cluster_config.get_node(node_id)
@@ -206,14 +216,10 @@ class SystemdService:
     def kv_cluster_node_cluster_state_key(self) -> str:
         return ServerConfig().kv_cluster_node_cluster_state_key.format(cluster_id=self.model.cluster_id, node_id=self.model.id)
 
-    @cached_property
-    def kv(self):
-        config = ServerConfig()
-        return Etcd3Client(
-            addresses=[f"{config.etcd_host}:{config.etcd_port}"],
-            user=self.model.etcd_username or None,
-            password=self.model.etcd_password or None,
-        )
+    @property
+    def kv(self) -> Etcd3Client:
+        # Shared client of the process, so no need to hold on to it
+        return get_etcd_client(self.model.etcd_username, self.model.etcd_password)
 
     @property
     def db_conn(self) -> DatabaseClient:
@@ -6,7 +6,9 @@ import random
 import secrets
 import socket
 import string
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Literal
 
@@ -20,6 +22,7 @@ from agent.internal.config import ClusterConfig
 from agent.internal.db.models import SystemdServiceModel
 from agent.internal.db_client import DatabaseClient
 from agent.internal.etcd_client import Etcd3Client
+from agent.internal.etcd_pool import get_etcd_client
 
 
 def render_template(template:str, payload:dict) -> str:
@@ -133,37 +136,85 @@ def wait_for_ssh_daemon(ip: str, port: int, username: str, password: str, timeou
 def is_cluster_in_use(cluster_id:str) -> bool:
     return SystemdServiceModel.select(SystemdServiceModel.id).where(SystemdServiceModel.cluster_id != cluster_id).exists()
 
+class WorkingEtcdCred:
+    def __init__(self, credential:tuple[str, str]):
+        self.credential = credential
+        self.validated_at = time.monotonic()
+
+
+_working_etcd_creds: dict[str, WorkingEtcdCred] = {} # cluster_id -> last known good credential
+_working_etcd_creds_lock = threading.Lock()
+_revalidating_etcd_creds: set[str] = set()
+_etcd_cred_check_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="etcd-cred-check")
+
+
 def get_working_etcd_cred_of_cluster(cluster_id: str) -> tuple[str, str]:
     """
     Retrieves the etcd username and password for a given cluster ID.
     Returns a tuple of (username, password).
+
+    The last known good credential of the cluster is remembered.
+    - Within `etcd_cred_cache_ttl_seconds`, it's returned right away
+    - After that, it's still returned but validated again in the background
+    - If an etcd call fails due to the credential, call `invalidate_working_etcd_cred_of_cluster`,
+      the next call validates all the candidates again
     """
+    with _working_etcd_creds_lock:
+        cached = _working_etcd_creds.get(cluster_id)
+        expired = cached and time.monotonic() - cached.validated_at > ServerConfig().etcd_cred_cache_ttl_seconds
+        if expired and cluster_id not in _revalidating_etcd_creds:
+            _revalidating_etcd_creds.add(cluster_id)
+            # Not on the executor, it waits for the checks running there
+            threading.Thread(target=_revalidate_etcd_cred_of_cluster, args=(cluster_id,), daemon=True).start()
+    if cached:
+        return cached.credential
+    return _find_working_etcd_cred_of_cluster(cluster_id)
+
+
+def invalidate_working_etcd_cred_of_cluster(cluster_id:str):
+    with _working_etcd_creds_lock:
+        _working_etcd_creds.pop(cluster_id, None)
+
+
+def _revalidate_etcd_cred_of_cluster(cluster_id:str):
+    try:
+        _find_working_etcd_cred_of_cluster(cluster_id)
+    except Exception as e:
+        print(f"No working etcd credential for cluster {cluster_id} anymore: {e}")
+        invalidate_working_etcd_cred_of_cluster(cluster_id)
+    finally:
+        with _working_etcd_creds_lock:
+            _revalidating_etcd_creds.discard(cluster_id)
+
 
+def _find_working_etcd_cred_of_cluster(cluster_id:str) -> tuple[str, str]:
     credentials = SystemdServiceModel.select(SystemdServiceModel.etcd_username, SystemdServiceModel.etcd_password).where(SystemdServiceModel.cluster_id == cluster_id).tuples()
+    # All the services of a cluster usually share the same credential
+    credentials = list(dict.fromkeys(credentials))
     if not credentials:
         raise ValueError(f"No etcd credentials found for cluster ID: {cluster_id}")
 
-    server_config = ServerConfig()
-
-    # Now, try each one until we find a working one
     def is_etcd_cred_working(cred_username: str, cred_password: str) -> bool:
         try:
             # Attempt to connect to etcd with the provided credentials
-            with Etcd3Client(
-                addresses=[f"{server_config.etcd_host}:{server_config.etcd_port}"],
-                user=cred_username,
-                password=password,
-                timeout=2,
-            ) as client:
-                status = client.status()
-                assert(status.version is not None), "Failed to get etcd status"
-                assert(status.leader is not None), "Failed to get etcd leader"
-                return True
+            client = get_etcd_client(cred_username, cred_password)
+            # The pooled client might have authenticated long ago, and etcd doesn't check the token for `status`.
+            # So authenticate again, and read the config of the cluster, which needs the permission for it too
+            client.authenticate()
+            client.get(ServerConfig().kv_cluster_config_key.format(cluster_id=cluster_id))
+            return True
         except Exception:
             return False
 
-    for username, password in credentials:
-        if is_etcd_cred_working(username, password):
+    # Check all of them at once, but prefer them in the stored order
+    futures = [
+        _etcd_cred_check_executor.submit(is_etcd_cred_working, username, password)
+        for username, password in credentials
+    ]
+    for (username, password), future in zip(credentials, futures):
+        if future.result():
+            with _working_etcd_creds_lock:
+                _working_etcd_creds[cluster_id] = WorkingEtcdCred((username, password))
             return username, password
 
     raise ValueError(f"No working etcd credentials found for cluster ID: {cluster_id}")
@@ -176,6 +227,7 @@ class KVEvent:
         self.event_type = None # type: Literal["config", "status"] | None
         self.data: ClusterConfig|DBHealthStatus|None= None
         self.node_id: str|None = None
+        self.revision: int = 0 # mod revision of the key
 
     def __repr__(self):
         return f"""
@@ -187,8 +239,23 @@ Data : {self.data}
 
 
 def parse_etcd_watch_event(event:ETcd3Event) -> KVEvent|None:
+    return parse_etcd_kv(
+        event.key,
+        event.value,
+        action="update" if event.__class__.__name__ == "PutEvent" else "delete",
+        revision=getattr(event, "mod_revision", 0),
+        version=getattr(event, "version", None),
+    )
+
+
+def parse_etcd_kv(
+    key:bytes, value:bytes, action:Literal["update", "delete"], revision:int=0, version:int|None=None
+) -> KVEvent|None:
+    """
+    Same as `parse_etcd_watch_event`, for the keys read by a range request.
+    """
     try:
-        key:str = event.key.decode('utf-8')
+        key:str = key.decode('utf-8')
         key_parts = key.split('/')
         if len(key_parts) < 4:
             return None
@@ -196,14 +263,15 @@ def parse_etcd_watch_event(event:ETcd3Event) -> KVEvent|None:
         cluster_id = key_parts[2]
         subject = key_parts[3]
 
-        e = KVEvent(
-            action="update" if event.__class__.__name__ == "PutEvent" else "delete",
-            cluster_id=cluster_id,
-        )
+        e = KVEvent(action=action, cluster_id=cluster_id)
+        e.revision = revision
 
         if subject == "config":
             e.event_type = "config"
-            e.data = ClusterConfig.from_serialized_string(event.value, cluster_id)
+            e.data = ClusterConfig.from_serialized_string(value, cluster_id)
+            # Writers compare the version in transactions, so the config can be used as if read from etcd
+            e.data.version = version
+            e.data.mod_revision = revision
             return e
 
         if subject == "nodes" and len(key_parts) == 6:
@@ -211,7 +279,7 @@ def parse_etcd_watch_event(event:ETcd3Event) -> KVEvent|None:
             e.event_type = key_parts[5]
             if e.event_type == "status":
                 status = DBHealthStatus()
-                status.ParseFromString(event.value)
+                status.ParseFromString(value)
                 e.data = status
             return e
     except Exception as e:
@@ -219,6 +287,28 @@ def parse_etcd_watch_event(event:ETcd3Event) -> KVEvent|None:
         return None
 
 
+def get_node_statuses_of_cluster(etcd_client:Etcd3Client, cluster_id:str) -> tuple[dict[str, DBHealthStatus], int]:
+    """
+    Fetches the latest health status of all the nodes of a cluster in a single range request.
+    All the statuses are from the same revision, so they can be compared with each other.
+
+    Returns node_id -> status and the revision of the read.
+    """
+    prefix = ServerConfig().kv_cluster_nodes_prefix.format(cluster_id=cluster_id)
+    response = etcd_client.get_prefix_response(prefix)
+    statuses = {}
+    for kv in response.kvs:
+        # /clusters/{cluster_id}/nodes/{node_id}/status
+        node_id, _, subject = kv.key.decode()[len(prefix):].partition("/")
+        if subject != "status" or not kv.value:
+            continue
+        try:
+            statuses[node_id] = DBHealthStatus.FromString(kv.value)
+        except Exception as e:
+            print(f"Failed to parse status of node {node_id}: {e}")
+    return statuses, response.header.revision
+
+
 def get_db_client_from_cluster_config(
     cluster_config:ClusterConfig, node_id:str, timeout:int=5, autocommit:bool=False
 ) -> DatabaseClient:
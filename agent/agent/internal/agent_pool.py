@@ -0,0 +1,33 @@
+import threading
+
+from agent import ServerConfig
+from client import Agent
+
+_agents: dict[tuple[str, int, str, str], Agent] = {}
+_agents_lock = threading.Lock()
+
+
+def get_cluster_agent(host:str, port:int, token:str, cluster_id:str) -> Agent:
+    """
+    Returns a shared `Agent` to talk to another agent of the cluster.
+
+    Creating a new grpc channel for every call means a fresh TCP + TLS handshake,
+    which can take longer than the call itself. The channels are kept open and re-used instead.
+    Token is part of the key, so a rotated token gets a new channel.
+    """
+    key = (host, port, token, cluster_id)
+    agent = _agents.get(key)
+    if agent:
+        return agent
+
+    with _agents_lock:
+        if key not in _agents:
+            _agents[key] = Agent(
+                host=host,
+                port=port,
+                trusted_ca_path=ServerConfig().grpc_ca_path,
+                token=token,
+                com_type="cluster",
+                cluster_id=cluster_id,
+            )
+        return _agents[key]
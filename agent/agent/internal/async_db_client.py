@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import struct
+
+"""
+Minimal non-blocking MySQL / MariaDB protocol client.
+
+It's meant for lightweight and frequent queries (health checks) which should run directly on the event loop,
+without occupying a thread per in-flight query.
+
+Supported -
+- mysql_native_password and caching_sha2_password authentication (+ auth switch)
+- Text protocol queries (COM_QUERY) with multiple statements / result sets
+
+Not supported -
+- TLS, prepared statements, query parameters
+- Type conversion, all the values are returned as `str` (or `None` for NULL)
+
+For anything else, use `agent.internal.db_client.DatabaseClient`.
+"""
+
+CLIENT_LONG_PASSWORD = 0x00000001
+CLIENT_LONG_FLAG = 0x00000004
+CLIENT_CONNECT_WITH_DB = 0x00000008
+CLIENT_PROTOCOL_41 = 0x00000200
+CLIENT_TRANSACTIONS = 0x00002000
+CLIENT_SECURE_CONNECTION = 0x00008000
+CLIENT_MULTI_STATEMENTS = 0x00010000
+CLIENT_MULTI_RESULTS = 0x00020000
+CLIENT_PLUGIN_AUTH = 0x00080000
+CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA = 0x00200000
+
+SERVER_MORE_RESULTS_EXISTS = 0x0008
+
+COM_QUIT = 0x01
+COM_QUERY = 0x03
+
+UTF8MB4_GENERAL_CI = 45
+MAX_PACKET_SIZE = 0xFFFFFF
+
+
+class AsyncDatabaseClientError(Exception):
+    def __init__(self, code:int, message:str):
+        super().__init__(f"({code}) {message}")
+        self.code = code
+
+
+class _PacketReader:
+    def __init__(self, data:bytes):
+        self.data = data
+        self.pos = 0
+
+    def read(self, size:int) -> bytes:
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def read_int(self, size:int) -> int:
+        return int.from_bytes(self.read(size), "little")
+
+    def read_null_terminated(self) -> bytes:
+        end = self.data.find(b"\0", self.pos)
+        if end == -1:
+            end = len(self.data)
+        value = self.data[self.pos:end]
+        self.pos = end + 1
+        return value
+
+    def read_lenenc_int(self) -> int | None:
+        first = self.read_int(1)
+        if first < 0xFB:
+            return first
+        if first == 0xFB:
+            return None # NULL in row data
+        if first == 0xFC:
+            return self.read_int(2)
+        if first == 0xFD:
+            return self.read_int(3)
+        return self.read_int(8)
+
+    def read_lenenc_str(self) -> bytes | None:
+        length = self.read_lenenc_int()
+        if length is None:
+            return None
+        return self.read(length)
+
+    def remaining(self) -> bytes:
+        return self.data[self.pos:]
+
+
+def _lenenc_int(value:int) -> bytes:
+    if value < 0xFB:
+        return bytes([value])
+    if value < 1 << 16:
+        return b"\xfc" + value.to_bytes(2, "little")
+    if value < 1 << 24:
+        return b"\xfd" + value.to_bytes(3, "little")
+    return b"\xfe" + value.to_bytes(8, "little")
+
+
+def _xor(data:bytes, key:bytes) -> bytes:
+    return bytes(data[i] ^ key[i % len(key)] for i in range(len(data)))
+
+
+def scramble_native_password(password:str, scramble:bytes) -> bytes:
+    if not password:
+        return b""
+    stage1 = hashlib.sha1(password.encode()).digest()
+    stage2 = hashlib.sha1(stage1).digest()
+    return _xor(stage1, hashlib.sha1(scramble[:20] + stage2).digest())
+
+
+def scramble_caching_sha2_password(password:str, scramble:bytes) -> bytes:
+    if not password:
+        return b""
+    stage1 = hashlib.sha256(password.encode()).digest()
+    stage2 = hashlib.sha256(hashlib.sha256(stage1).digest() + scramble[:20]).digest()
+    return _xor(stage1, stage2)
+
+
+class AsyncDatabaseClient:
+    def __init__(self, host:str, port:int|str, user:str, password:str, schema:str="", connect_timeout:int=5, query_timeout:float=5):
+        # In case of localhost, prefer tcp connection like `DatabaseClient`
+        self.host = "127.0.0.1" if host == "localhost" else host
+        self.port:int = int(port) if isinstance(port, str) else port
+        self.user = user
+        self.password = password or ""
+        self.schema = schema
+        self.connect_timeout = connect_timeout
+        self.query_timeout = query_timeout
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._seq = 0
+        # Only one command can be in-flight on a connection
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        if self.is_connected:
+            return
+        try:
+            await asyncio.wait_for(self._connect(), timeout=self.connect_timeout)
+        except BaseException:
+            self._abort()
+            raise
+
+    async def close(self):
+        if not self.is_connected:
+            self._abort()
+            return
+        with contextlib.suppress(Exception):
+            self._seq = 0
+            self._write_packet(bytes([COM_QUIT]))
+            await self._writer.drain()
+        self._abort()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def query(self, query:str) -> list[dict[str, str | None]]:
+        """
+        Execute a query and return the rows of the first result set as list of dictionaries.
+        """
+        results = await self.query_multi(query)
+        return results[0] if results else []
+
+    async def query_multi(self, query:str) -> list[list[dict[str, str | None]]]:
+        """
+        Execute one or more `;` separated statements in a single round trip.
+        Returns the rows of every result set, in order of the statements.
+        Statements which don't return rows produce an empty list.
+        """
+        async with self._lock:
+            try:
+                await self.connect()
+                return await asyncio.wait_for(self._query(query), timeout=self.query_timeout)
+            except BaseException:
+                # Connection state is unknown, reconnect on the next query
+                self._abort()
+                raise
+
+    async def is_reachable(self) -> bool:
+        try:
+            await self.query("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _abort(self):
+        if self._writer:
+            with contextlib.suppress(Exception):
+                self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._seq = 0
+
+        # Step 1: Initial handshake from server
+        handshake = _PacketReader(await self._read_packet())
+        if handshake.data[0] == 0xFF:
+            self._raise_error(handshake.data)
+        protocol_version = handshake.read_int(1)
+        if protocol_version != 10:
+            raise AsyncDatabaseClientError(0, f"Unsupported protocol version {protocol_version}")
+        handshake.read_null_terminated() # server version
+        handshake.read_int(4) # connection id
+        scramble = handshake.read(8)
+        handshake.read(1) # filler
+        server_capabilities = handshake.read_int(2)
+        auth_plugin = "mysql_native_password"
+        if handshake.remaining():
+            handshake.read(1) # charset
+            handshake.read(2) # status flags
+            server_capabilities |= handshake.read_int(2) << 16
+            auth_data_length = handshake.read_int(1)
+            handshake.read(10) # reserved
+            if server_capabilities & CLIENT_SECURE_CONNECTION:
+                scramble += handshake.read(max(13, auth_data_length - 8))[:12]
+            if server_capabilities & CLIENT_PLUGIN_AUTH:
+                auth_plugin = handshake.read_null_terminated().decode() or auth_plugin
+
+        # Step 2: Handshake response
+        capabilities = (
+            CLIENT_LONG_PASSWORD | CLIENT_LONG_FLAG | CLIENT_PROTOCOL_41 | CLIENT_TRANSACTIONS |
+            CLIENT_SECURE_CONNECTION | CLIENT_MULTI_STATEMENTS | CLIENT_MULTI_RESULTS |
+            CLIENT_PLUGIN_AUTH | CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA
+        )
+        if self.schema:
+            capabilities |= CLIENT_CONNECT_WITH_DB
+        capabilities &= server_capabilities
+
+        auth_response = self._auth_response(auth_plugin, scramble)
+        payload = struct.pack("<IIB", capabilities, MAX_PACKET_SIZE, UTF8MB4_GENERAL_CI) + b"\0" * 23
+        payload += self.user.encode() + b"\0"
+        if capabilities & CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA:
+            payload += _lenenc_int(len(auth_response)) + auth_response
+        else:
+            payload += bytes([len(auth_response)]) + auth_response
+        if capabilities & CLIENT_CONNECT_WITH_DB:
+            payload += self.schema.encode() + b"\0"
+        payload += auth_plugin.encode() + b"\0"
+        self._write_packet(payload)
+        await self._writer.drain()
+
+        # Step 3: Authentication result
+        await self._finish_auth(auth_plugin, scramble)
+
+    async def _finish_auth(self, auth_plugin:str, scramble:bytes):
+        while True:
+            packet = await self._read_packet()
+            status = packet[0]
+            if status == 0x00:
+                return
+            if status == 0xFF:
+                self._raise_error(packet)
+
+            if status == 0xFE:
+                # Auth switch request
+                reader = _PacketReader(packet[1:])
+                auth_plugin = reader.read_null_terminated().decode()
+                scramble = reader.remaining().rstrip(b"\0")
+                self._write_packet(self._auth_response(auth_plugin, scramble))
+                await self._writer.drain()
+                continue
+
+            if status == 0x01 and auth_plugin == "caching_sha2_password":
+                if packet[1:2] == b"\x03":
+                    # Fast auth succeeded, OK packet follows
+                    continue
+                if packet[1:2] == b"\x04":
+                    # Full authentication, without TLS the password needs to be encrypted with server's public key
+                    self._write_packet(b"\x02")
+                    await self._writer.drain()
+                    public_key = (await self._read_packet())[1:]
+                    self._write_packet(self._rsa_encrypt_password(public_key, scramble))
+                    await self._writer.drain()
+                    continue
+
+            raise AsyncDatabaseClientError(0, f"Unexpected packet during authentication with {auth_plugin}")
+
+    def _auth_response(self, auth_plugin:str, scramble:bytes) -> bytes:
+        if auth_plugin == "mysql_native_password":
+            return scramble_native_password(self.password, scramble)
+        if auth_plugin == "caching_sha2_password":
+            return scramble_caching_sha2_password(self.password, scramble)
+        if auth_plugin == "mysql_clear_password":
+            return self.password.encode() + b"\0"
+        raise AsyncDatabaseClientError(0, f"Unsupported authentication plugin {auth_plugin}")
+
+    def _rsa_encrypt_password(self, public_key_pem:bytes, scramble:bytes) -> bytes:
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        public_key = serialization.load_pem_public_key(public_key_pem)
+        return public_key.encrypt(
+            _xor(self.password.encode() + b"\0", scramble[:20]),
+            padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA1()), algorithm=hashes.SHA1(), label=None),
+        )
+
+    async def _query(self, query:str) -> list[list[dict[str, str | None]]]:
+        self._seq = 0
+        self._write_packet(bytes([COM_QUERY]) + query.encode())
+        await self._writer.drain()
+
+        results = []
+        while True:
+            packet = await self._read_packet()
+            status = packet[0]
+            if status == 0xFF:
+                self._raise_error(packet)
+
+            if status == 0x00:
+                # OK packet, statement without result set
+                reader = _PacketReader(packet[1:])
+                reader.read_lenenc_int() # affected rows
+                reader.read_lenenc_int() # last insert id
+                server_status = reader.read_int(2)
+                results.append([])
+            else:
+                rows, server_status = await self._read_result_set(_PacketReader(packet).read_lenenc_int())
+                results.append(rows)
+
+            if not server_status & SERVER_MORE_RESULTS_EXISTS:
+                return results
+
+    async def _read_result_set(self, column_count:int) -> tuple[list[dict[str, str | None]], int]:
+        columns = []
+        for _ in range(column_count):
+            reader = _PacketReader(await self._read_packet())
+            for _ in range(4):
+                reader.read_lenenc_str() # catalog, schema, table, org_table
+            columns.append(reader.read_lenenc_str().decode())
+        await self._read_packet() # EOF after column definitions
+
+        rows = []
+        while True:
+            packet = await self._read_packet()
+            if packet[0] == 0xFE and len(packet) < 9:
+                # EOF packet
+                reader = _PacketReader(packet[1:])
+                reader.read_int(2) # warnings
+                return rows, reader.read_int(2)
+            if packet[0] == 0xFF:
+                self._raise_error(packet)
+
+            reader = _PacketReader(packet)
+            row = {}
+            for column in columns:
+                value = reader.read_lenenc_str()
+                row[column] = value.decode() if value is not None else None
+            rows.append(row)
+
+    async def _read_packet(self) -> bytes:
+        payload = b""
+        while True:
+            header = await self._reader.readexactly(4)
+            length = int.from_bytes(header[:3], "little")
+            self._seq = (header[3] + 1) % 256
+            payload += await self._reader.readexactly(length)
+            if length < MAX_PACKET_SIZE:
+                return payload
+
+    def _write_packet(self, payload:bytes):
+        while True:
+            chunk, payload = payload[:MAX_PACKET_SIZE], payload[MAX_PACKET_SIZE:]
+            self._writer.write(len(chunk).to_bytes(3, "little") + bytes([self._seq]) + chunk)
+            self._seq = (self._seq + 1) % 256
+            if len(chunk) < MAX_PACKET_SIZE:
+                return
+
+    @staticmethod
+    def _raise_error(packet:bytes):
+        reader = _PacketReader(packet[1:])
+        code = reader.read_int(2)
+        message = reader.remaining()
+        if message[:1] == b"#":
+            message = message[6:] # sql state marker + sql state
+        raise AsyncDatabaseClientError(code, message.decode(errors="replace"))
@@ -0,0 +1,629 @@
+import asyncio
+import functools
+import time
+import traceback
+from collections import deque
+from typing import Callable
+
+import grpc
+from etcd3 import MultiEndpointEtcd3Client, Transactions, etcdrpc
+from etcd3.client import KVMetadata
+from etcd3.events import new_event
+from etcd3.exceptions import (
+    ConnectionFailedError,
+    ConnectionTimeoutError,
+    Etcd3Exception,
+    InternalServerError,
+    PreconditionFailedError,
+    RevisionCompactedError,
+    WatchTimedOut,
+)
+from etcd3.leases import Lease
+from etcd3.utils import prefix_range_end, to_bytes
+from etcd3.watch import WatchResponse
+
+from agent.internal.etcd_endpoints import (
+    EtcdEndpointTracker,
+    is_endpoint_failure,
+    is_leader_failure,
+    is_routed_to_leader,
+    is_safe_to_retry,
+)
+from agent.internal.etcd_pool import _is_auth_token_rejected
+
+"""
+Etcd client for the asyncio loop, built on `grpc.aio`.
+
+Only the part of the `Etcd3Client` surface the monitors need is there - get, range, put, delete, txn, lease and watch,
+all of them coroutines. The request building is borrowed from python-etcd3, so the requests are exactly the same
+as the ones of the sync client. Nothing else of the sync client comes along, anything missing is an AttributeError.
+"""
+
+_STUB_CLASSES = {
+    "authstub": etcdrpc.AuthStub,
+    "kvstub": etcdrpc.KVStub,
+    "watchstub": etcdrpc.WatchStub,
+    "leasestub": etcdrpc.LeaseStub,
+    "maintenancestub": etcdrpc.MaintenanceStub,
+}
+
+# Same translation as python-etcd3, the other grpc errors are raised as is
+_EXCEPTIONS_BY_CODE = {
+    grpc.StatusCode.INTERNAL: InternalServerError,
+    grpc.StatusCode.UNAVAILABLE: ConnectionFailedError,
+    grpc.StatusCode.DEADLINE_EXCEEDED: ConnectionTimeoutError,
+    grpc.StatusCode.FAILED_PRECONDITION: PreconditionFailedError,
+}
+
+
+def _handle_errors(f):
+    @functools.wraps(f)
+    async def handler(*args, **kwargs):
+        try:
+            return await f(*args, **kwargs)
+        except grpc.RpcError as e:
+            exception = _EXCEPTIONS_BY_CODE.get(e.code())
+            if exception is None:
+                raise
+            raise exception from e
+
+    return handler
+
+
+# Cancel reasons of a watch create when the token of the stream is no longer valid, a new token fixes them
+_TOKEN_REJECTED_REASONS = ("invalid auth token", "auth store is old", "user name is empty")
+
+
+class WatchCanceledError(Etcd3Exception):
+    """etcd canceled a single watch (or refused to create it), the stream and the other watches on it are fine"""
+
+    def __init__(self, reason:str):
+        super().__init__(reason)
+        self.reason = reason
+
+    @property
+    def auth_rejected(self) -> bool:
+        """The credential has no permission on the watched keys"""
+        return "permission denied" in self.reason.lower()
+
+
+def _is_token_rejected(cancel_reason:str) -> bool:
+    return any(reason in cancel_reason for reason in _TOKEN_REJECTED_REASONS)
+
+
+def _create_error(response) -> Exception|None:
+    """Why etcd didn't create the watch, None if it did"""
+    if response.compact_revision != 0:
+        return RevisionCompactedError(response.compact_revision)
+    if response.canceled:
+        return WatchCanceledError(response.cancel_reason or "watch not created")
+    return None
+
+
+def _safe_callback(callback:Callable, response):
+    try:
+        callback(response)
+    except Exception:
+        print("Etcd watch callback failed")
+        traceback.print_exc()
+
+
+class Watch:
+    """A watch of `AsyncWatcher`, with enough of it to create it again on a new stream"""
+
+    def __init__(self, watch_id:int, request, callback:Callable):
+        self.watch_id = watch_id # given by the watcher, the one of etcd changes with the stream
+        self.request = request
+        self.callback = callback
+        self.etcd_watch_id: int|None = None # None till etcd creates it on the current stream
+        self.next_revision = request.start_revision # where to continue from on a new stream, 0 till created
+        self.token_renewed = False # for its last create, a create is retried only once with a new token
+
+
+class AsyncWatcher:
+    """
+    All the watches of an `AsyncEtcd3Client` share a single bidirectional Watch stream, read by a task on the loop.
+
+    Same contract as the watcher of python-etcd3 - the callback gets a `WatchResponse`, or the error which ended
+    the watch (then the watch is gone). Only it's called on the loop instead of a watch thread, so it must not block.
+    The error is a `WatchCanceledError` if etcd canceled just that watch,
+    anything else means the whole stream is gone (every watch on it gets the error).
+
+    etcd checks the creates against the auth token the stream is opened with. So once the client has got a new
+    token (or etcd rejects the one of the stream), the stream is opened again with the new one, and the watches
+    are created again on it from the revision they have got to. Their ids stay the same, the callers don't notice.
+    """
+
+    def __init__(self, client:"AsyncEtcd3Client"):
+        self.client = client
+        self.address: str|None = None # endpoint of the stream
+        self.metadata = None # of the stream
+        self.call = None
+        self.reader: asyncio.Task|None = None
+        self.watches: dict[int, Watch] = {}
+        self.etcd_watches: dict[int, Watch] = {} # etcd watch id -> the watch, on the current stream
+        self.next_watch_id = 1
+        # etcd answers the create requests of a stream in order, so they can be pipelined.
+        # The future is of `add_callback`, None if it's an existing watch created again on a new stream
+        self.pending: deque[tuple[asyncio.Future|None, Watch]] = deque()
+        self.token_rejected: list[tuple[asyncio.Future|None, Watch]] = [] # waiting for a stream with a new token
+        self.renewing_token = False
+        self.write_lock = asyncio.Lock()
+        self.background_tasks: set[asyncio.Task] = set()
+
+    async def add_callback(self, key, callback:Callable, range_end=None, start_revision:int|None=None,
+                           progress_notify:bool=False, prev_kv:bool=False) -> int:
+        create_watch = etcdrpc.WatchCreateRequest(
+            key=to_bytes(key), progress_notify=progress_notify, prev_kv=prev_kv
+        )
+        if range_end is not None:
+            create_watch.range_end = to_bytes(range_end)
+        if start_revision is not None:
+            create_watch.start_revision = start_revision
+        watch = Watch(self.next_watch_id, create_watch, callback)
+        self.next_watch_id += 1
+
+        future = asyncio.get_running_loop().create_future()
+        async with self.write_lock:
+            try:
+                if self.call is not None and self.metadata != self.client.metadata:
+                    # The client has got a new token since the stream was opened
+                    await self._reopen()
+                if self.call is None:
+                    self._open()
+                await self._create(future, watch)
+            except Exception:
+                # The stream is broken, the reader fails the rest
+                future.cancel()
+                raise
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.client.timeout)
+        except asyncio.TimeoutError:
+            # Left in `pending`, the watch gets canceled once etcd creates it
+            future.cancel()
+            raise WatchTimedOut() from None
+
+    async def cancel(self, watch_id:int):
+        watch = self.watches.pop(watch_id, None)
+        if watch is None or watch.etcd_watch_id is None:
+            # Not created on the current stream yet, it's canceled once it is
+            return
+        self.etcd_watches.pop(watch.etcd_watch_id, None)
+        await self._send_cancel(watch.etcd_watch_id, self.call)
+
+    async def close(self):
+        call = self.call
+        if call:
+            # Whoever still has a watch on the stream hears of it, like when the stream breaks
+            self._fail(call, ConnectionFailedError())
+            call.cancel()
+        if self.reader:
+            self.reader.cancel()
+
+    def _open(self):
+        self.metadata = self.client.metadata
+        self.address, self.call = self.client.open_watch_stream()
+        self.reader = asyncio.create_task(self._read(self.call), name="etcd-watch-stream")
+
+    async def _create(self, future:asyncio.Future|None, watch:Watch):
+        request = etcdrpc.WatchCreateRequest()
+        request.CopyFrom(watch.request)
+        if watch.next_revision:
+            request.start_revision = watch.next_revision
+        self.pending.append((future, watch))
+        await self.call.write(etcdrpc.WatchRequest(create_request=request))
+
+    async def _reopen(self):
+        """With the write lock held. The watches and the creates in flight move to a new stream, with the current token"""
+        call, self.call = self.call, None
+        call.cancel()
+        self.reader.cancel()
+        in_flight = [
+            (future, watch) for future, watch in [*self.pending, *self.token_rejected]
+            if future is not None and not future.done()
+        ]
+        self.pending = deque()
+        self.token_rejected = []
+        self.etcd_watches = {}
+        for watch in self.watches.values():
+            watch.etcd_watch_id = None
+
+        self._open()
+        for watch in list(self.watches.values()):
+            await self._create(None, watch)
+        for future, watch in in_flight:
+            await self._create(future, watch)
+
+    async def _send_cancel(self, etcd_watch_id:int, call):
+        async with self.write_lock:
+            if self.call is None or self.call is not call:
+                # The id was of another stream
+                return
+            cancel_request = etcdrpc.WatchCancelRequest(watch_id=etcd_watch_id)
+            await self.call.write(etcdrpc.WatchRequest(cancel_request=cancel_request))
+
+    async def _read(self, call):
+        try:
+            async for response in call:
+                self._handle_response(response)
+            error = ConnectionFailedError()
+        except grpc.RpcError as e:
+            error = e
+            if is_endpoint_failure(e):
+                # The next stream goes to another endpoint
+                self.client.tracker.record_failure(self.address)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        self._fail(call, error)
+
+    def _fail(self, call, error:Exception):
+        if self.call is not call:
+            # Closed or reopened
+            return
+        self.call = None
+        watches, self.watches = self.watches, {}
+        waiting = [*self.pending, *self.token_rejected]
+        self.pending = deque()
+        self.token_rejected = []
+        self.etcd_watches = {}
+        for future, _ in waiting:
+            if future is not None and not future.done():
+                future.set_exception(error)
+        for watch in watches.values():
+            _safe_callback(watch.callback, error)
+
+    def _handle_response(self, response):
+        if response.created:
+            future, watch = self.pending.popleft()
+            self._handle_created(response, future, watch)
+            return
+
+        watch = self.etcd_watches.get(response.watch_id)
+        if not watch:
+            # Leftovers of canceled watches
+            return
+
+        if response.compact_revision != 0:
+            self._remove(watch)
+            _safe_callback(watch.callback, RevisionCompactedError(response.compact_revision))
+            return
+        if response.canceled:
+            self._remove(watch)
+            _safe_callback(watch.callback, WatchCanceledError(response.cancel_reason or "watch canceled"))
+            return
+
+        if response.events:
+            watch.next_revision = response.events[-1].kv.mod_revision + 1
+        else:
+            # Progress notification, everything till the revision of the header has been delivered
+            watch.next_revision = max(watch.next_revision, response.header.revision + 1)
+        _safe_callback(watch.callback, WatchResponse(response.header, [new_event(e) for e in response.events]))
+
+    def _handle_created(self, response, future:asyncio.Future|None, watch:Watch):
+        if (future.done() if future is not None else self.watches.get(watch.watch_id) is not watch):
+            # Timed out / canceled in the meantime
+            if not response.canceled:
+                self._cancel_in_background(response.watch_id)
+            return
+
+        if response.canceled and not watch.token_renewed and _is_token_rejected(response.cancel_reason):
+            # The token of the stream has expired, it's created again on a stream with a new token
+            watch.token_renewed = True
+            self.token_rejected.append((future, watch))
+            self._renew_token_in_background()
+            return
+
+        error = _create_error(response)
+        if error is not None:
+            if future is not None:
+                future.set_exception(error)
+            else:
+                self._remove(watch)
+                _safe_callback(watch.callback, error)
+            return
+
+        watch.token_renewed = False
+        watch.etcd_watch_id = response.watch_id
+        if not watch.next_revision:
+            # It gets the events after the revision it's created at
+            watch.next_revision = response.header.revision + 1
+        self.watches[watch.watch_id] = watch
+        self.etcd_watches[response.watch_id] = watch
+        if future is not None:
+            future.set_result(watch.watch_id)
+
+    def _remove(self, watch:Watch):
+        self.watches.pop(watch.watch_id, None)
+        if watch.etcd_watch_id is not None:
+            self.etcd_watches.pop(watch.etcd_watch_id, None)
+
+    def _renew_token_in_background(self):
+        if self.renewing_token:
+            return
+        self.renewing_token = True
+        self._in_background(self._renew_token(self.call))
+
+    async def _renew_token(self, call):
+        try:
+            await self.client.reauthenticate(self.metadata)
+            async with self.write_lock:
+                # Already reopened (a new watch noticed the new token) or broken in the meantime otherwise
+                if self.call is call:
+                    await self._reopen()
+        except Exception as e:
+            print(f"Failed to renew the auth token of the etcd watch stream: {e}")
+            # Whatever's on the stream can't be created again without it
+            self._fail(call, e)
+        finally:
+            self.renewing_token = False
+
+    def _cancel_in_background(self, etcd_watch_id:int):
+        self._in_background(self._send_cancel(etcd_watch_id, self.call))
+
+    def _in_background(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+
+class _EtcdRequestBuilders:
+    """
+    Request building methods of python-etcd3. They only build the protobuf messages, none of them touches the client,
+    so they're taken as is instead of inheriting the blocking client with them.
+    """
+
+    get_secure_creds = MultiEndpointEtcd3Client.get_secure_creds
+    _build_get_range_request = MultiEndpointEtcd3Client._build_get_range_request
+    _build_put_request = MultiEndpointEtcd3Client._build_put_request
+    _build_delete_request = MultiEndpointEtcd3Client._build_delete_request
+    _ops_to_requests = MultiEndpointEtcd3Client._ops_to_requests
+
+
+class AsyncEtcd3Client(_EtcdRequestBuilders):
+    """
+    Asyncio counterpart of `Etcd3Client`, so the monitors can do their etcd I/O right on the loop,
+    no thread per call or per watch stream.
+
+    Create it with `await AsyncEtcd3Client.connect(...)`, it authenticates there.
+    Like `PooledEtcd3Client`, a call rejected due to an expired auth token is retried once with a new token.
+    With more than one endpoint, the calls are routed like the ones of `Etcd3Client` (see `etcd_endpoints`),
+    the watch stream goes to the fastest endpoint.
+    """
+
+    def __init__(self, addresses:list[str], ca_cert=None, cert_key=None, cert_cert=None, timeout=None, user=None,
+                 password=None, grpc_options=None):
+        if any(c is not None for c in (user, password)) and not all(c is not None for c in (user, password)):
+            raise Exception('if using authentication credentials both user and password must be specified.')
+        if ca_cert is None and any(c is not None for c in (cert_key, cert_cert)):
+            raise ValueError('to use a secure channel ca_cert is required')
+
+        self.credentials = self.get_secure_creds(ca_cert, cert_key, cert_cert) if ca_cert is not None else None
+        self.uses_secure_channel = self.credentials is not None
+        self.grpc_options = grpc_options
+        self.credential = (user, password)
+        self.metadata = None
+        self.call_credentials = None
+        self.timeout = timeout
+        self.failover = True
+        self.transactions = Transactions()
+
+        self.addresses = list(addresses)
+        self.tracker = EtcdEndpointTracker()
+        self._channels: dict[str, grpc.aio.Channel] = {}
+        self._stubs = {}
+
+        self.auth_lock = asyncio.Lock()
+        self.watcher = AsyncWatcher(self)
+
+    @classmethod
+    async def connect(cls, addresses:list[str], user:str|None=None, password:str|None=None,
+                      **kwargs) -> "AsyncEtcd3Client":
+        client = cls(addresses, user=user, password=password, **kwargs)
+        try:
+            await client.authenticate()
+        except Exception:
+            await client.close()
+            raise
+        return client
+
+    def _endpoint_stub(self, address:str, name:str):
+        stub = self._stubs.get((address, name))
+        if stub is None:
+            channel = self._channels.get(address)
+            if channel is None:
+                if self.credentials is not None:
+                    channel = grpc.aio.secure_channel(address, self.credentials, options=self.grpc_options)
+                else:
+                    channel = grpc.aio.insecure_channel(address, options=self.grpc_options)
+                self._channels[address] = channel
+            stub = self._stubs[(address, name)] = _STUB_CLASSES[name](channel)
+        return stub
+
+    def open_watch_stream(self) -> tuple[str, grpc.aio.StreamStreamCall]:
+        address = self.tracker.order(self.addresses, leader=False)[0]
+        return address, self._endpoint_stub(address, "watchstub").Watch(metadata=self.metadata)
+
+    @_handle_errors
+    async def authenticate(self):
+        user, password = self.credential
+        if user is None:
+            return
+        response = await self._call_routed(
+            "authstub", "Authenticate", etcdrpc.AuthenticateRequest(name=user, password=password), None
+        )
+        self.metadata = (("token", response.token),)
+
+    async def reauthenticate(self, rejected_metadata) -> tuple:
+        """Returns the metadata to retry with"""
+        async with self.auth_lock:
+            # Some other task might have already done it
+            if self.metadata == rejected_metadata:
+                await self.authenticate()
+            return self.metadata
+
+    async def _call(self, name:str, method_name:str, request):
+        metadata = self.metadata
+        try:
+            return await self._call_routed(name, method_name, request, metadata)
+        except grpc.RpcError as e:
+            if metadata is None or not _is_auth_token_rejected(e):
+                raise
+            metadata = await self.reauthenticate(metadata)
+            return await self._call_routed(name, method_name, request, metadata)
+
+    async def _call_routed(self, name:str, method_name:str, request, metadata):
+        """Same routing and failover as `CustomMultiEndpointEtcd3Client._call_routed`"""
+        leader = is_routed_to_leader(name, method_name, request)
+        if leader and self.tracker.claim_leader_refresh(self.addresses):
+            await self._refresh_leader()
+        attempts = self.tracker.order(self.addresses, leader)[:2]
+        for attempt, address in enumerate(attempts):
+            stub = self._endpoint_stub(address, name)
+            start = time.monotonic()
+            try:
+                if method_name == "LeaseKeepAlive":
+                    response = await self._keep_alive_once(stub, request, metadata)
+                else:
+                    response = await getattr(stub, method_name)(request, timeout=self.timeout, metadata=metadata)
+            except grpc.RpcError as e:
+                if not is_endpoint_failure(e):
+                    raise
+                if is_leader_failure(e):
+                    # The endpoint is fine, it's the leader which has to be looked up again
+                    self.tracker.forget_leader(self.addresses)
+                else:
+                    self.tracker.record_failure(address)
+                if attempt == len(attempts) - 1 or not is_safe_to_retry(method_name, e):
+                    raise
+                continue
+            self.tracker.record_success(address, (time.monotonic() - start) * 1000)
+            return response
+
+    async def _refresh_leader(self):
+        leader_address = None
+        for address in self.tracker.rank(self.addresses, probe=False):
+            stub = self._endpoint_stub(address, "maintenancestub")
+            start = time.monotonic()
+            try:
+                status = await stub.Status(
+                    etcdrpc.StatusRequest(), timeout=min(self.timeout or 1, 1), metadata=self.metadata
+                )
+            except grpc.RpcError as e:
+                if is_endpoint_failure(e):
+                    self.tracker.record_failure(address)
+                continue
+            self.tracker.record_success(address, (time.monotonic() - start) * 1000)
+            if status.leader and status.leader == status.header.member_id:
+                leader_address = address
+                break
+        self.tracker.set_leader(self.addresses, leader_address)
+
+    async def _keep_alive_once(self, stub, request, metadata):
+        call = stub.LeaseKeepAlive(iter([request]), timeout=self.timeout, metadata=metadata)
+        try:
+            response = await call.read()
+            return None if response is grpc.aio.EOF else response
+        finally:
+            call.cancel()
+
+    @_handle_errors
+    async def get_response(self, key, serializable=False):
+        return await self._call("kvstub", "Range", self._build_get_range_request(key, serializable=serializable))
+
+    async def get(self, key, **kwargs) -> tuple[bytes|None, KVMetadata|None]:
+        response = await self.get_response(key, **kwargs)
+        if response.count < 1:
+            return None, None
+        kv = response.kvs.pop()
+        return kv.value, KVMetadata(kv, response.header)
+
+    @_handle_errors
+    async def get_range_response(self, range_start, range_end, **kwargs):
+        return await self._call(
+            "kvstub", "Range", self._build_get_range_request(range_start, range_end=range_end, **kwargs)
+        )
+
+    async def get_prefix_response(self, key_prefix, **kwargs):
+        return await self.get_range_response(key_prefix, prefix_range_end(to_bytes(key_prefix)), **kwargs)
+
+    async def get_prefix(self, key_prefix, **kwargs) -> list[tuple[bytes, KVMetadata]]:
+        response = await self.get_prefix_response(key_prefix, **kwargs)
+        return [(kv.value, KVMetadata(kv, response.header)) for kv in response.kvs]
+
+    @_handle_errors
+    async def put(self, key, value, lease=None, prev_kv=False):
+        return await self._call("kvstub", "Put", self._build_put_request(key, value, lease=lease, prev_kv=prev_kv))
+
+    @_handle_errors
+    async def delete(self, key, prev_kv=False, return_response=False):
+        response = await self._call("kvstub", "DeleteRange", self._build_delete_request(key, prev_kv=prev_kv))
+        return response if return_response else response.deleted >= 1
+
+    @_handle_errors
+    async def transaction(self, compare, success=None, failure=None) -> tuple[bool, list]:
+        request = etcdrpc.TxnRequest(
+            compare=[c.build_message() for c in compare],
+            success=self._ops_to_requests(success or []),
+            failure=self._ops_to_requests(failure or []),
+        )
+        txn_response = await self._call("kvstub", "Txn", request)
+
+        responses = []
+        for response in txn_response.responses:
+            if response.WhichOneof("response") == "response_range":
+                responses.append([
+                    (kv.value, KVMetadata(kv, txn_response.header)) for kv in response.response_range.kvs
+                ])
+            else:
+                responses.append(response)
+        return txn_response.succeeded, responses
+
+    @_handle_errors
+    async def lease(self, ttl:int, lease_id:int|None=None) -> Lease:
+        """The returned lease has no client, refresh / revoke it through `refresh_lease` / `revoke_lease`"""
+        response = await self._call("leasestub", "LeaseGrant", etcdrpc.LeaseGrantRequest(TTL=ttl, ID=lease_id or 0))
+        return Lease(lease_id=response.ID, ttl=response.TTL)
+
+    @_handle_errors
+    async def revoke_lease(self, lease_id:int):
+        await self._call("leasestub", "LeaseRevoke", etcdrpc.LeaseRevokeRequest(ID=lease_id))
+
+    @_handle_errors
+    async def refresh_lease(self, lease_id:int):
+        """
+        Single keep alive of the lease.
+        Returns the response, None or TTL <= 0 in it means the lease has already expired.
+        """
+        return await self._call("leasestub", "LeaseKeepAlive", etcdrpc.LeaseKeepAliveRequest(ID=lease_id))
+
+    @_handle_errors
+    async def add_watch_callback(self, key, callback:Callable, **kwargs) -> int:
+        """
+        `callback` is called on the loop with a `WatchResponse`, or the error which ended the watch.
+        Returns the watch id.
+        """
+        return await self.watcher.add_callback(key, callback, **kwargs)
+
+    async def add_watch_prefix_callback(self, key_prefix, callback:Callable, **kwargs) -> int:
+        kwargs["range_end"] = prefix_range_end(to_bytes(key_prefix))
+        return await self.add_watch_callback(key_prefix, callback, **kwargs)
+
+    @_handle_errors
+    async def cancel_watch(self, watch_id:int):
+        await self.watcher.cancel(watch_id)
+
+    async def close(self):
+        await self.watcher.close()
+        channels, self._channels = self._channels, {}
+        self._stubs = {}
+        for channel in channels.values():
+            await channel.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
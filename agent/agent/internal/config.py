@@ -2,7 +2,10 @@ import contextlib
 import json
 import os
 import tempfile
+import threading
+import time
 from functools import cache
+from typing import Callable
 
 from cryptography.utils import cached_property
 from filelock import FileLock
@@ -29,6 +32,12 @@ class ServerConfig:
     grpc_ca_path:str = None
     grpc_cert_path:str = None
     grpc_key_path:str = None
+    # "thread" serves the rpcs on a thread pool (`grpc.server`),
+    # "asyncio" serves them on an event loop (`grpc.aio.server`), the blocking handlers run on the worker threads
+    # and the job streams (`JobService.Listen`) are served on the loop, so they don't hold on to the workers
+    grpc_server_mode:str = "thread"
+    grpc_max_workers:int = 16 # Worker threads of the blocking handlers
+    grpc_inter_agent_workers:int = 4 # Reserved for rds.InterAgentService on top of `grpc_max_workers`, "asyncio" only
 
     # pubsub channels
     job_update_stream_redis_channel:str = "job_update_stream"
@@ -37,6 +46,60 @@ class ServerConfig:
 
     db_healthcheck_interval_ms:int = 250 # Healthcheck interval in milliseconds
     db_healthcheck_minimum_interval_ms:int = 100
+    # Healthy replicas are probed less frequently, masters always use `db_healthcheck_interval_ms`
+    # Keep it well below the dead node detection timeout
+    db_healthcheck_stable_interval_ms:int = 1000
+    db_healthcheck_stable_after_probes:int = 20 # Consecutive healthy probes before moving to stable interval
+    db_healthcheck_slow_probe_threshold_ms:int = 100 # Probes slower than this switch back to fast interval
+    # The cadence follows the cached cluster config (kept current by the etcd watch) before every probe,
+    # etcd is read once in this interval only when the cached one is stale
+    db_healthcheck_cluster_config_refresh_seconds:int = 15
+    # "executor" runs the blocking mysqlclient probe in a thread pool,
+    # "asyncio" probes on the event loop with a persistent non-blocking connection per db
+    db_healthcheck_probe_engine:str = "executor"
+    db_healthcheck_executor_max_workers:int = 50
+    db_health_history_seconds:int = 3600 # Health check results kept in memory for metrics
+    db_healthcheck_flush_window_ms:int = 250 # Health status of all dbs are written to etcd in batch once in this window
+    db_healthcheck_max_txn_ops:int = 128 # Should not exceed `--max-txn-ops` of etcd
+    # If enabled, health status is only written when it changes
+    # and liveness of the node is tracked by an etcd lease attached to the status key
+    db_health_publish_only_on_change:bool = False
+    db_health_status_lease_ttl_seconds:int = 3
+
+    # dead node detection, timeout of a node is derived from the phi accrual estimation of its report intervals
+    dead_node_phi_threshold:float = 8.0 # Can be overridden per cluster in cluster config
+    dead_node_phi_window_size:int = 100 # Number of report intervals kept per node
+    dead_node_phi_min_std_deviation_ms:int = 50 # Avoids too tight timeouts on a perfectly steady stream
+    dead_node_phi_acceptable_pause_ms:int = 1000 # Slack for rare pauses of the reporting node
+    dead_node_min_timeout_ms:int = 1000
+    dead_node_max_timeout_ms:int = 10000
+    # Failed dead node handling is retried with exponential backoff
+    dead_node_handling_max_concurrency:int = 4
+    dead_node_retry_base_delay_ms:int = 1000
+    dead_node_retry_max_delay_ms:int = 60000
+    # Deadline of a single reachability check rpc to another agent / proxy
+    reachability_check_timeout_ms:int = 2000
+    # Threads making the reachability checks of all the dead node checks, queue time counts towards the deadline
+    quorum_probe_max_workers:int = 32
+    # Threads handling the etcd watch events of all the monitored clusters
+    etcd_watch_dispatch_workers:int = 8
+    # Config changes of a cluster are applied once per burst of edits, off the watch
+    config_reconcile_debounce_ms:int = 200
+    config_reconcile_max_concurrency:int = 4
+    # Cluster configs are served from memory, re-read from etcd once older than this
+    # In the state monitor's process the watch keeps them fresh, so it's rarely hit there
+    cluster_config_cache_max_staleness_ms:int = 5000
+    # Etcd clients are shared in the process per credential (see `get_etcd_client`)
+    etcd_client_timeout_seconds:int = 5
+    etcd_client_idle_timeout_seconds:int = 300
+    # Last working etcd credential of a cluster is re-used, and re-validated in background once older than this
+    etcd_cred_cache_ttl_seconds:int = 60
+    # Endpoint selection, when there are more than one etcd endpoints (see `agent.internal.etcd_endpoints`)
+    etcd_endpoint_latency_ewma_alpha:float = 0.2
+    etcd_endpoint_latency_ttl_seconds:int = 30 # An endpoint not measured for this long gets a call to measure it again
+    etcd_endpoint_failure_cooldown_ms:int = 1000 # Doubles on every consecutive failure of the endpoint
+    etcd_endpoint_max_failure_cooldown_ms:int = 30000
+    etcd_leader_refresh_seconds:int = 10
 
     # default docker images
     rsync_image:str = "tanmoysrt/sshd:latest"
@@ -46,6 +109,7 @@ class ServerConfig:
     # etcd cluster information
     etcd_host:str
     etcd_port:int = 2379
+    etcd_endpoints:list = [] # "host:port" of all the members, `etcd_host`:`etcd_port` is used if empty
     cluster_shared_token:dict = {} # cluster_id -> token mapping
 
     # kv keys
@@ -53,6 +117,7 @@ class ServerConfig:
     kv_cluster_config_key:str = "/clusters/{cluster_id}/config"
     kv_cluster_current_master_key:str = "/clusters/{cluster_id}/master"
     kv_cluster_election_lock_key:str = "/clusters/{cluster_id}/election/lock"
+    kv_cluster_nodes_prefix:str = "/clusters/{cluster_id}/nodes/"
     kv_cluster_node_status_key:str = "/clusters/{cluster_id}/nodes/{node_id}/status"
     kv_cluster_node_cluster_state_key:str = "/clusters/{cluster_id}/nodes/{node_id}/state"
 
@@ -106,6 +171,9 @@ class ServerConfig:
             with open(self._config_file, 'w') as f:
                 json.dump(self._config, f, indent=4)
 
+    @property
+    def etcd_addresses(self) -> list[str]:
+        return list(self.etcd_endpoints) or [f"{self.etcd_host}:{self.etcd_port}"]
 
 
 class ClusterConfig:
@@ -118,6 +186,7 @@ class ClusterConfig:
         self.etcd_client = etcd_client
         self._proto:ClusterConfigProtobufMessage = ClusterConfigProtobufMessage()
         self.version = None
+        self.mod_revision = 0
         if self.etcd_client:
             self._load()
 
@@ -266,6 +335,7 @@ class ClusterConfig:
         data, meta = value
         self._proto.ParseFromString(data)
         self.version = meta.version
+        self.mod_revision = meta.mod_revision
 
     @cached_property
     def kv_cluster_config_key(self) -> str:
@@ -274,3 +344,95 @@ class ClusterConfig:
     def __del__(self):
         with contextlib.suppress(Exception):
             self.etcd_client.close()
+
+
+class CachedClusterConfig:
+    def __init__(self, config:ClusterConfig):
+        self.config = config
+        self.confirmed_at = time.monotonic() # Last time it was known to be the latest one
+
+
+class ClusterConfigCache:
+    """
+    Process wide cache of cluster configs, so building a `MySQL` / `Proxy` object doesn't cost an etcd read.
+
+    The cached configs are snapshots (created without etcd client), they are shared by all the readers
+    so don't modify them. `reload` doesn't work on them, ask the cache with `max_staleness_ms=0` instead.
+
+    - A config older than `max_staleness_ms` (default `cluster_config_cache_max_staleness_ms`) is read again
+    - The state monitor feeds the configs from the etcd watch (`update`),
+      and every event of the cluster confirms the cached config is still the latest one (`confirm`)
+    - An older revision never replaces a newer one
+
+    Writers still have to compare the version in the transaction, a cached config can be stale by the bound.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        self.lock = threading.Lock()
+        self.configs: dict[str, CachedClusterConfig] = {}
+
+    def get(
+        self, cluster_id:str, etcd_client:Etcd3Client|Callable[[], Etcd3Client], max_staleness_ms:int|None=None
+    ) -> ClusterConfig:
+        """
+        `etcd_client` can be a function returning the client, so the client is only created on a miss
+        """
+        cached = self.get_cached(cluster_id, max_staleness_ms)
+        if cached is not None:
+            return cached
+
+        if callable(etcd_client):
+            etcd_client = etcd_client()
+        value = etcd_client.get(ServerConfig().kv_cluster_config_key.format(cluster_id=cluster_id))
+        if not value or not value[0]:
+            raise ValueError(f"Cluster config not found for cluster_id: {cluster_id}")
+        data, meta = value
+        config = ClusterConfig.from_serialized_string(data, cluster_id)
+        config.version = meta.version
+        config.mod_revision = meta.mod_revision
+        return self.update(cluster_id, config)
+
+    def get_cached(self, cluster_id:str, max_staleness_ms:int|None=None) -> ClusterConfig|None:
+        """The cached config if it's not older than `max_staleness_ms`, never reads etcd so it's fine on the loop"""
+        if max_staleness_ms is None:
+            max_staleness_ms = ServerConfig().cluster_config_cache_max_staleness_ms
+        with self.lock:
+            cached = self.configs.get(cluster_id)
+            if cached and (time.monotonic() - cached.confirmed_at) * 1000 <= max_staleness_ms:
+                return cached.config
+        return None
+
+    def update(self, cluster_id:str, config:ClusterConfig) -> ClusterConfig:
+        """Returns the cached config after the update, which can be a newer one than `config`"""
+        with self.lock:
+            cached = self.configs.get(cluster_id)
+            if cached and cached.config.mod_revision > config.mod_revision:
+                return cached.config
+            if cached and cached.config.mod_revision == config.mod_revision:
+                cached.confirmed_at = time.monotonic()
+                return cached.config
+            self.configs[cluster_id] = CachedClusterConfig(config)
+            return config
+
+    def confirm(self, cluster_id:str, revision:int):
+        """
+        The watch of the cluster delivered an event of `revision`,
+        so the cached config (modified at or before it) is the latest one till that point.
+        """
+        with self.lock:
+            cached = self.configs.get(cluster_id)
+            if cached and cached.config.mod_revision <= revision:
+                cached.confirmed_at = time.monotonic()
+
+    def invalidate(self, cluster_id:str):
+        with self.lock:
+            self.configs.pop(cluster_id, None)
@@ -79,6 +79,34 @@ class DatabaseClient:
             self.close()
             raise e
 
+    def query_multi(self, query: str, as_dict: bool = True):
+        """
+        Execute multiple `;` separated statements in a single round trip.
+        Unlike `query`, the connection is not checked upfront, to keep it to exactly one round trip.
+        On failure the connection is closed, so the next call will reconnect.
+        Args:
+            query: SQL statements separated by `;`.
+            as_dict: If True, returns rows of each result set as a list of dictionaries
+        Returns:
+            List of results, one per statement, in the same format as `query`.
+        """
+        try:
+            with self._connection.cursor() as cursor:
+                cursor.execute(query)
+                results = []
+                while True:
+                    columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                    rows = cursor.fetchall() if columns else []
+                    if as_dict:
+                        results.append([dict(zip(columns, row)) for row in rows] if columns else [])
+                    else:
+                        results.append([columns] + [list(row) for row in rows])
+                    if not cursor.nextset():
+                        return results
+        except Exception as e:
+            self.close()
+            raise e
+
     def is_reachable(self) -> bool:
         """
         Check if the database is reachable.
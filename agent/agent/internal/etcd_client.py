@@ -1,20 +1,54 @@
 import random
+import time
 from typing import override
 
 import grpc
 from etcd3 import Endpoint, MultiEndpointEtcd3Client, Transactions, etcdrpc
 
+from agent.internal.etcd_endpoints import (
+    EtcdEndpointTracker,
+    is_endpoint_failure,
+    is_leader_failure,
+    is_routed_to_leader,
+    is_safe_to_retry,
+)
+
 """
 The provided classes has been overridden to support multiple endpoints.
 Also to support insecure connections for development purposes.
 """
 
+# Streaming responses, the errors come while reading them, so no retry / latency tracking for these
+_STREAM_METHODS = {"Watch", "LeaseKeepAlive", "Snapshot"}
+
+
+class RoutingStub:
+    """
+    Stands in for a grpc stub of `CustomMultiEndpointEtcd3Client`,
+    every call picks the endpoint to go to (see `agent.internal.etcd_endpoints`).
+    """
+
+    def __init__(self, client:"CustomMultiEndpointEtcd3Client", name:str, stub_class):
+        self.client = client
+        self.name = name
+        self.stub_class = stub_class
+
+    def __getattr__(self, method_name):
+        client, name, stub_class = self.client, self.name, self.stub_class
+
+        def call(request, *args, **kwargs):
+            return client._call_routed(name, stub_class, method_name, request, *args, **kwargs)
+
+        return call
+
+
 class CustomMultiEndpointEtcd3Client(MultiEndpointEtcd3Client):
     @override
     def __init__(self, endpoints:list[Endpoint]=None, timeout=None, user=None, password=None,
-                 failover=False, secure=False):
+                 failover=True, secure=False):
         self.metadata = None
         self.failover = failover
+        self.tracker = EtcdEndpointTracker()
 
         # Cache GRPC stubs here
         self._stubs = {}
@@ -49,6 +83,96 @@ class CustomMultiEndpointEtcd3Client(MultiEndpointEtcd3Client):
 
         self.transactions = Transactions()
 
+    @property
+    def authstub(self):
+        return self._routing_stub("authstub", etcdrpc.AuthStub)
+
+    @property
+    def kvstub(self):
+        return self._routing_stub("kvstub", etcdrpc.KVStub)
+
+    @property
+    def watchstub(self):
+        return self._routing_stub("watchstub", etcdrpc.WatchStub)
+
+    @property
+    def leasestub(self):
+        return self._routing_stub("leasestub", etcdrpc.LeaseStub)
+
+    @property
+    def maintenancestub(self):
+        return self._routing_stub("maintenancestub", etcdrpc.MaintenanceStub)
+
+    @property
+    def clusterstub(self):
+        return self._routing_stub("clusterstub", etcdrpc.ClusterStub)
+
+    def _routing_stub(self, name:str, stub_class) -> RoutingStub:
+        stub = self._stubs.get(name)
+        if stub is None:
+            stub = self._stubs[name] = RoutingStub(self, name, stub_class)
+        return stub
+
+    def _endpoint_stub(self, address:str, name:str, stub_class):
+        stub = self._stubs.get((address, name))
+        if stub is None:
+            stub = self._stubs[(address, name)] = stub_class(self.endpoints[address].channel)
+        return stub
+
+    def _call_routed(self, name:str, stub_class, method_name:str, request, *args, **kwargs):
+        """
+        Writes and linearizable reads go to the leader, the rest to the fastest endpoint.
+        On unavailable / deadline exceeded, the endpoint is put in cooldown and the call is retried once
+        on the next one if that's safe (see `is_safe_to_retry`).
+        """
+        addresses = list(self.endpoints)
+        if method_name in _STREAM_METHODS:
+            address = self.tracker.order(addresses, leader=name == "leasestub")[0]
+            return getattr(self._endpoint_stub(address, name, stub_class), method_name)(request, *args, **kwargs)
+
+        leader = is_routed_to_leader(name, method_name, request)
+        if leader and self.tracker.claim_leader_refresh(addresses):
+            self._refresh_leader(addresses)
+        order = self.tracker.order(addresses, leader)
+        attempts = order[:2] if self.failover else order[:1]
+        for attempt, address in enumerate(attempts):
+            method = getattr(self._endpoint_stub(address, name, stub_class), method_name)
+            start = time.monotonic()
+            try:
+                response = method(request, *args, **kwargs)
+            except grpc.RpcError as e:
+                if not is_endpoint_failure(e):
+                    raise
+                if is_leader_failure(e):
+                    # The endpoint is fine, it's the leader which has to be looked up again
+                    self.tracker.forget_leader(addresses)
+                else:
+                    self.tracker.record_failure(address)
+                if attempt == len(attempts) - 1 or not is_safe_to_retry(method_name, e):
+                    raise
+                continue
+            self.tracker.record_success(address, (time.monotonic() - start) * 1000)
+            self._current_endpoint_label = address
+            return response
+
+    def _refresh_leader(self, addresses:list[str]):
+        """Asks the endpoints for their status till the leader is found"""
+        leader_address = None
+        for address in self.tracker.rank(addresses, probe=False):
+            stub = self._endpoint_stub(address, "maintenancestub", etcdrpc.MaintenanceStub)
+            start = time.monotonic()
+            try:
+                status = stub.Status(etcdrpc.StatusRequest(), min(self.timeout or 1, 1), metadata=self.metadata)
+            except grpc.RpcError as e:
+                if is_endpoint_failure(e):
+                    self.tracker.record_failure(address)
+                continue
+            self.tracker.record_success(address, (time.monotonic() - start) * 1000)
+            if status.leader and status.leader == status.header.member_id:
+                leader_address = address
+                break
+        self.tracker.set_leader(addresses, leader_address)
+
 
 class Etcd3Client(CustomMultiEndpointEtcd3Client):
     def __init__(self, addresses:list[str], ca_cert=None,
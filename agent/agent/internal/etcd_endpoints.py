@@ -0,0 +1,165 @@
+import threading
+import time
+
+import grpc
+
+"""
+Endpoint selection of the etcd clients (`Etcd3Client`, `AsyncEtcd3Client`),
+when the etcd cluster has more than one member.
+
+- Every call measures the latency of the member it went to, the fastest healthy member serves the reads
+- A member failing with unavailable / deadline exceeded is skipped for a while (backing off on repeated failures),
+  and the call is retried once on the next member if that's safe
+- Writes and linearizable reads go to the leader, followers would forward them to it anyway.
+  The leader is found by asking every member for its status once in `etcd_leader_refresh_seconds`
+
+The state is process wide, it's about the etcd members and not the clients.
+"""
+
+# Safe to run again on another member, even if the first one has applied it
+_IDEMPOTENT_METHODS = {
+    "Range", "Status", "MemberList", "LeaseTimeToLive", "LeaseLeases", "LeaseKeepAlive", "Authenticate",
+}
+
+
+def is_routed_to_leader(stub_name:str, method_name:str, request) -> bool:
+    """Writes and linearizable reads"""
+    if stub_name in ("watchstub", "maintenancestub", "clusterstub"):
+        return False
+    if method_name == "Range":
+        return not request.serializable
+    return True
+
+
+def is_endpoint_failure(e:grpc.RpcError) -> bool:
+    return e.code() in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+
+def is_leader_failure(e:grpc.RpcError) -> bool:
+    details = (e.details() or "").lower()
+    return "leader changed" in details or "no leader" in details
+
+
+def is_safe_to_retry(method_name:str, e:grpc.RpcError) -> bool:
+    if method_name in _IDEMPOTENT_METHODS:
+        return is_endpoint_failure(e)
+    # A write might have been applied already, unless it never reached a member or there was no leader to propose it
+    details = (e.details() or "").lower()
+    return e.code() == grpc.StatusCode.UNAVAILABLE and any(
+        reason in details for reason in ("failed to connect", "connection refused", "no leader")
+    )
+
+
+class EndpointState:
+    def __init__(self, address:str):
+        self.address = address
+        self.latency_ms: float|None = None # moving average
+        self.measured_at = 0.0
+        self.failures = 0 # consecutive
+        self.failed_until = 0.0
+
+
+class EtcdEndpointTracker:
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        from agent import ServerConfig # the etcd client is imported by the config module
+        self.config = ServerConfig()
+        self.lock = threading.Lock()
+        self.endpoints: dict[str, EndpointState] = {}
+        # endpoints of the cluster -> (leader address, last time it was looked up)
+        self.leaders: dict[tuple[str, ...], tuple[str|None, float]] = {}
+
+    def _state(self, address:str) -> EndpointState:
+        state = self.endpoints.get(address)
+        if state is None:
+            state = self.endpoints[address] = EndpointState(address)
+        return state
+
+    def record_success(self, address:str, latency_ms:float):
+        alpha = self.config.etcd_endpoint_latency_ewma_alpha
+        with self.lock:
+            state = self._state(address)
+            if state.latency_ms is None:
+                state.latency_ms = latency_ms
+            else:
+                state.latency_ms += alpha * (latency_ms - state.latency_ms)
+            state.measured_at = time.monotonic()
+            state.failures = 0
+            state.failed_until = 0.0
+
+    def record_failure(self, address:str):
+        with self.lock:
+            state = self._state(address)
+            state.failures += 1
+            cooldown_ms = min(
+                self.config.etcd_endpoint_failure_cooldown_ms * 2 ** (state.failures - 1),
+                self.config.etcd_endpoint_max_failure_cooldown_ms,
+            )
+            state.failed_until = time.monotonic() + cooldown_ms / 1000
+            # Don't trust the old measurement once it's back
+            state.latency_ms = None
+
+    def rank(self, addresses:list[str], probe:bool=True) -> list[str]:
+        """
+        Best first -
+        healthy ones by latency, with one of the not recently measured ones up front if `probe` (so it gets measured).
+        Then the failed ones, the one coming out of cooldown soonest first.
+        """
+        if len(addresses) == 1:
+            return list(addresses)
+        now = time.monotonic()
+        stale_after = self.config.etcd_endpoint_latency_ttl_seconds
+        with self.lock:
+            states = [self._state(address) for address in addresses]
+            healthy = [state for state in states if state.failed_until <= now]
+            failed = sorted((state for state in states if state.failed_until > now), key=lambda s: s.failed_until)
+            stale = [state for state in healthy if state.latency_ms is None or now - state.measured_at > stale_after]
+            probed = stale[0] if probe and stale else None
+            if probed:
+                # Only a single call probes it, the rest keep using the measured ones meanwhile
+                probed.measured_at = now
+            healthy.sort(key=lambda s: (s is not probed, s.latency_ms if s.latency_ms is not None else float("inf")))
+        return [state.address for state in healthy + failed]
+
+    def order(self, addresses:list[str], leader:bool) -> list[str]:
+        """Endpoints to try the call on, in order"""
+        if len(addresses) == 1:
+            return list(addresses)
+        leader_address = self.leaders.get(tuple(addresses), (None, 0))[0] if leader else None
+        with self.lock:
+            leader_usable = leader_address in addresses and self._state(leader_address).failed_until <= time.monotonic()
+        if not leader_usable:
+            return self.rank(addresses)
+        ranked = self.rank(addresses, probe=False)
+        ranked.remove(leader_address)
+        return [leader_address] + ranked
+
+    def claim_leader_refresh(self, addresses:list[str]) -> bool:
+        """True if the caller should look up the leader now, only one caller at a time gets it"""
+        if len(addresses) == 1:
+            return False
+        key = tuple(addresses)
+        with self.lock:
+            leader_address, looked_up_at = self.leaders.get(key, (None, 0))
+            refresh_after = self.config.etcd_leader_refresh_seconds if leader_address else 1
+            if time.monotonic() - looked_up_at < refresh_after:
+                return False
+            self.leaders[key] = (leader_address, time.monotonic())
+            return True
+
+    def set_leader(self, addresses:list[str], leader_address:str|None):
+        with self.lock:
+            self.leaders[tuple(addresses)] = (leader_address, time.monotonic())
+
+    def forget_leader(self, addresses:list[str]):
+        with self.lock:
+            self.leaders.pop(tuple(addresses), None)
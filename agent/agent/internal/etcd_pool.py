@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+import grpc
+from etcd3 import etcdrpc
+
+from agent import ServerConfig
+from agent.internal.etcd_client import Etcd3Client
+
+
+class ReauthenticatingStub:
+    """
+    Wraps a grpc stub of `PooledEtcd3Client`.
+    A call rejected due to an expired auth token is retried once with a new token.
+    """
+
+    def __init__(self, stub, client:"PooledEtcd3Client"):
+        self.stub = stub
+        self.client = client
+
+    def __getattr__(self, name):
+        method = getattr(self.stub, name)
+        client = self.client
+
+        def call(*args, **kwargs):
+            client.last_used_at = time.monotonic()
+            try:
+                return method(*args, **kwargs)
+            except grpc.RpcError as e:
+                if client.metadata is None or not _is_auth_token_rejected(e):
+                    raise
+                kwargs["metadata"] = client.reauthenticate(kwargs.get("metadata"))
+                return method(*args, **kwargs)
+
+        return call
+
+
+class PooledEtcd3Client(Etcd3Client):
+    """
+    Etcd client shared by everyone in the process using the same credential (see `get_etcd_client`).
+
+    - `close` (and so leaving a `with` block) does nothing, others might be using it
+    - etcd expires the auth tokens (`--auth-token-ttl`), instead of failing, it authenticates again and retries
+    """
+
+    def __init__(self, addresses:list[str], user:str|None, password:str|None, timeout:float|None):
+        self.credential = (user, password)
+        self.last_used_at = time.monotonic()
+        self.auth_lock = threading.Lock()
+        self.wrapped_stubs: dict[str, ReauthenticatingStub] = {}
+        super().__init__(addresses=addresses, user=user, password=password, timeout=timeout)
+
+    @property
+    def kvstub(self):
+        return self._wrap_stub("kvstub", super().kvstub)
+
+    @property
+    def leasestub(self):
+        return self._wrap_stub("leasestub", super().leasestub)
+
+    @property
+    def maintenancestub(self):
+        return self._wrap_stub("maintenancestub", super().maintenancestub)
+
+    @property
+    def clusterstub(self):
+        return self._wrap_stub("clusterstub", super().clusterstub)
+
+    def _wrap_stub(self, name:str, stub) -> ReauthenticatingStub:
+        wrapped = self.wrapped_stubs.get(name)
+        # The parent caches its routing stubs, re-wrap if it ever hands out a new one
+        if wrapped is None or wrapped.stub is not stub:
+            wrapped = self.wrapped_stubs[name] = ReauthenticatingStub(stub, self)
+        return wrapped
+
+    def reauthenticate(self, rejected_metadata) -> tuple:
+        """Returns the metadata to retry with"""
+        with self.auth_lock:
+            # Some other thread might have already done it
+            if self.metadata == rejected_metadata:
+                self._authenticate()
+            return self.metadata
+
+    def authenticate(self):
+        """
+        Authenticates again right away, raises if etcd rejects the credential.
+        The pooled client authenticated once when it was created, it says nothing about the credential now.
+        """
+        if self.credential[0] is None:
+            return
+        with self.auth_lock:
+            self._authenticate()
+
+    def _authenticate(self):
+        user, password = self.credential
+        response = self.authstub.Authenticate(etcdrpc.AuthenticateRequest(name=user, password=password), self.timeout)
+        self.metadata = (("token", response.token),)
+
+    def close(self):
+        pass
+
+
+_clients: dict[tuple[tuple[str, ...], str|None], PooledEtcd3Client] = {}
+_clients_lock = threading.Lock()
+_last_eviction_at = time.monotonic()
+
+# grpc channels can't be used across fork (rq forks a work horse per job), the child starts with an empty pool
+os.register_at_fork(after_in_child=_clients.clear)
+
+
+def get_etcd_client(user:str|None, password:str|None, addresses:list[str]|None=None) -> PooledEtcd3Client:
+    """
+    Returns a shared etcd client for the credential, keyed by (endpoints, user).
+
+    A new `Etcd3Client` means a new grpc channel (TCP + TLS handshake) and an `Authenticate` call,
+    often slower than the call it's created for. The clients are kept and re-used instead,
+    clients unused for `etcd_client_idle_timeout_seconds` are dropped from the pool.
+
+    Raises if the credential doesn't work, a failing credential is never pooled.
+    """
+    config = ServerConfig()
+    if addresses is None:
+        addresses = config.etcd_addresses
+    user, password = user or None, password or None
+    key = (tuple(addresses), user)
+
+    _evict_idle_clients()
+    client = _clients.get(key)
+    if client and client.credential[1] == password:
+        client.last_used_at = time.monotonic()
+        return client
+
+    # Authenticates, so don't hold the lock for it
+    new_client = PooledEtcd3Client(addresses, user, password, timeout=config.etcd_client_timeout_seconds)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client and client.credential[1] == password:
+            # Someone else created it in the meantime
+            return client
+        # New one, or the password got changed
+        _clients[key] = new_client
+        return new_client
+
+
+def _evict_idle_clients():
+    global _last_eviction_at
+    config = ServerConfig()
+    now = time.monotonic()
+    if now - _last_eviction_at < 60:
+        return
+    with _clients_lock:
+        _last_eviction_at = now
+        for key, client in list(_clients.items()):
+            if now - client.last_used_at > config.etcd_client_idle_timeout_seconds:
+                # Not closed, someone might still hold it. The channel gets closed once it's garbage collected
+                del _clients[key]
+
+
+def is_etcd_auth_error(e:Exception) -> bool:
+    """The credential itself is rejected (wrong password, user removed, no permission)"""
+    if not isinstance(e, grpc.RpcError):
+        return False
+    if e.code() in (grpc.StatusCode.UNAUTHENTICATED, grpc.StatusCode.PERMISSION_DENIED):
+        return True
+    return e.code() == grpc.StatusCode.INVALID_ARGUMENT and "authentication failed" in (e.details() or "")
+
+
+def _is_auth_token_rejected(e:grpc.RpcError) -> bool:
+    if e.code() == grpc.StatusCode.UNAUTHENTICATED: # invalid auth token
+        return True
+    # Auth store changed (e.g. user / role updated) after the token was issued
+    return e.code() == grpc.StatusCode.INVALID_ARGUMENT and "auth store is old" in (e.details() or "")
@@ -1,5 +1,9 @@
+import asyncio
+import contextlib
 import hashlib
+import inspect
 import traceback
+from concurrent.futures import Executor
 
 import grpc
 
@@ -93,45 +97,53 @@ class AuthTokenValidatorInterceptor(grpc.ServerInterceptor):
         super().__init__()
         self.config = config
 
-    def intercept_service(self, continuation, handler_call_details):
+    def validate(self, handler_call_details, handler) -> tuple[str, str]:
         """
-        'direct' users can call any function, but 'cluster' users can only call rds.InterAgentService functions.
+        Returns the src_type and cluster_id of the auth_token of the call, raises ValueError if it's not allowed.
         """
-        handler = continuation(handler_call_details)
-        if handler is None:
-            return None
-
         metadata = dict(handler_call_details.invocation_metadata or [])
         auth_token = metadata.get('auth_token')
-        try:
-            _, service, _ = handler_call_details.method.split("/")
+        _, service, _ = handler_call_details.method.split("/")
 
-            # Split it and check the src_type and target
-            src_type, token, cluster_id = auth_token.split(':', 2)
-            if not src_type or not token or src_type not in ['direct', 'cluster']:
-                raise ValueError("Invalid auth_token format")
+        # Split it and check the src_type and target
+        src_type, token, cluster_id = auth_token.split(':', 2)
+        if not src_type or not token or src_type not in ['direct', 'cluster']:
+            raise ValueError("Invalid auth_token format")
 
-            # cluster type can't be used for calling any function other than rds.InterAgentService
-            if src_type == "cluster" and service != "rds.InterAgentService":
-                raise ValueError("Cluster auth_token can only be used for rds.InterAgentService")
+        # cluster type can't be used for calling any function other than rds.InterAgentService
+        if src_type == "cluster" and service != "rds.InterAgentService":
+            raise ValueError("Cluster auth_token can only be used for rds.InterAgentService")
 
-            # cluster type should have a valid cluster_id
-            if src_type == "cluster" and not cluster_id:
-                raise ValueError("Cluster auth_token must include a cluster_id")
+        # cluster type should have a valid cluster_id
+        if src_type == "cluster" and not cluster_id:
+            raise ValueError("Cluster auth_token must include a cluster_id")
 
-            # In inter-agent cluster communication, only unary methods are allowed
-            if src_type == "cluster" and not handler.unary_unary:
-                raise ValueError("Cluster auth_token can only be used for unary methods")
+        # In inter-agent cluster communication, only unary methods are allowed
+        if src_type == "cluster" and not handler.unary_unary:
+            raise ValueError("Cluster auth_token can only be used for unary methods")
 
-            # Validate auth token
-            if src_type == "direct" and hashlib.sha256(token.encode()).hexdigest() != self.config.auth_token_hash:
-                raise ValueError("Invalid auth_token")
+        # Validate auth token
+        if src_type == "direct" and hashlib.sha256(token.encode()).hexdigest() != self.config.auth_token_hash:
+            raise ValueError("Invalid auth_token")
 
-            if src_type == "cluster":
-                if cluster_id not in self.config.cluster_shared_token:
-                    raise ValueError("Invalid cluster_id in auth_token")
-                if token != self.config.cluster_shared_token[cluster_id]:
-                    raise ValueError("Invalid auth_token for the given cluster_id")
+        if src_type == "cluster":
+            if cluster_id not in self.config.cluster_shared_token:
+                raise ValueError("Invalid cluster_id in auth_token")
+            if token != self.config.cluster_shared_token[cluster_id]:
+                raise ValueError("Invalid auth_token for the given cluster_id")
+        return src_type, cluster_id
+
+    def intercept_service(self, continuation, handler_call_details):
+        """
+        'direct' users can call any function, but 'cluster' users can only call rds.InterAgentService functions.
+        """
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        try:
+            src_type, cluster_id = self.validate(handler_call_details, handler)
+            _, service, _ = handler_call_details.method.split("/")
 
             # Add `cluster_id` to the request (If required)
             if src_type == "cluster":
@@ -144,6 +156,9 @@ class AuthTokenValidatorInterceptor(grpc.ServerInterceptor):
                     response_serializer=handler.response_serializer
                 )
             if src_type == "direct":
+                if not handler.unary_unary:
+                    # Streams (JobService.Listen) as they are, a unary handler can't serve them
+                    return handler
                 def new_handler(request, context):
                     if (src_type == "direct" and
                             service == "rds.InterAgentService" and
@@ -164,3 +179,203 @@ class AuthTokenValidatorInterceptor(grpc.ServerInterceptor):
                 context.abort(grpc.StatusCode.UNAUTHENTICATED, message)
             return grpc.unary_unary_rpc_method_handler(abort_handler)
 
+
+def is_blocking_handler(handler:grpc.RpcMethodHandler) -> bool:
+    """Plain function / generator, not a coroutine / async generator of the asyncio server"""
+    behavior = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+    return not (inspect.iscoroutinefunction(behavior) or inspect.isasyncgenfunction(behavior))
+
+
+class AioAuthTokenValidatorInterceptor(grpc.aio.ServerInterceptor):
+    """
+    `AuthTokenValidatorInterceptor` of the asyncio server.
+    The blocking handlers are wrapped the same way, the async ones (`AsyncJobService.Listen`) are only validated.
+    """
+    def __init__(self, config: ServerConfig):
+        super().__init__()
+        self.interceptor = AuthTokenValidatorInterceptor(config=config)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        if is_blocking_handler(handler):
+            return self.interceptor.intercept_service(lambda _: handler, handler_call_details)
+
+        try:
+            src_type, cluster_id = self.interceptor.validate(handler_call_details, handler)
+        except ValueError as e:
+            message = str(e) or 'Invalid auth_token format'
+            async def abort_handler(request, context, message=message):
+                await context.abort(grpc.StatusCode.UNAUTHENTICATED, message)
+            return grpc.unary_unary_rpc_method_handler(abort_handler)
+
+        if src_type == "cluster":
+            async def new_handler(request, context):
+                request.cluster_id = cluster_id
+                return await handler.unary_unary(request, context)
+            return grpc.unary_unary_rpc_method_handler(
+                new_handler,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer
+            )
+        return handler
+
+
+class AioAsyncJobInterceptor(grpc.aio.ServerInterceptor):
+    """
+    `AsyncJobInterceptor` of the asyncio server. Creating the job is blocking (a db write),
+    so it's only done for the blocking handlers, it runs on the worker thread along with the handler.
+    """
+    def __init__(self, protobuf_messages: dict[str, type], protobuf_messages_with_meta: set[str], service_impls: dict[str, ServiceImplInfo]):
+        super().__init__()
+        self.interceptor = AsyncJobInterceptor(
+            protobuf_messages=protobuf_messages,
+            protobuf_messages_with_meta=protobuf_messages_with_meta,
+            service_impls=service_impls,
+        )
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or not is_blocking_handler(handler):
+            return handler
+        return self.interceptor.intercept_service(lambda _: handler, handler_call_details)
+
+
+class AbortRpc(Exception):
+    def __init__(self, code:grpc.StatusCode, details:str, trailing_metadata=()):
+        super().__init__(details)
+        self.code = code
+        self.details = details
+        self.trailing_metadata = trailing_metadata
+
+
+class WorkerThreadServicerContext(grpc.ServicerContext):
+    """
+    Context of a blocking handler running on a worker thread of the asyncio server.
+    Behaves like the one of `grpc.server`, `abort` raises and the rpc is aborted on the loop once the handler is out.
+    """
+    def __init__(self, context:grpc.aio.ServicerContext, loop:asyncio.AbstractEventLoop):
+        self.context = context
+        self.loop = loop
+
+    def abort(self, code, details):
+        raise AbortRpc(code, details)
+
+    def abort_with_status(self, status):
+        raise AbortRpc(status.code, status.details, status.trailing_metadata)
+
+    def set_code(self, code):
+        self.context.set_code(code)
+
+    def set_details(self, details):
+        self.context.set_details(details)
+
+    def code(self):
+        return self.context.code()
+
+    def details(self):
+        return self.context.details()
+
+    def is_active(self):
+        return not self.context.done()
+
+    def time_remaining(self):
+        return self.context.time_remaining()
+
+    def add_callback(self, callback):
+        self.context.add_done_callback(lambda _: callback())
+        return True
+
+    def invocation_metadata(self):
+        return self.context.invocation_metadata()
+
+    def peer(self):
+        return self.context.peer()
+
+    def peer_identities(self):
+        return self.context.peer_identities()
+
+    def peer_identity_key(self):
+        return self.context.peer_identity_key()
+
+    def auth_context(self):
+        return self.context.auth_context()
+
+    def set_compression(self, compression_algorithm):
+        self.context.set_compression(compression_algorithm)
+
+    def cancel(self):
+        raise AbortRpc(grpc.StatusCode.CANCELLED, "Cancelled")
+
+    def send_initial_metadata(self, initial_metadata):
+        asyncio.run_coroutine_threadsafe(self.context.send_initial_metadata(initial_metadata), self.loop).result()
+
+    def set_trailing_metadata(self, trailing_metadata):
+        self.context.set_trailing_metadata(trailing_metadata)
+
+    def trailing_metadata(self):
+        return self.context.trailing_metadata()
+
+
+class WorkerPoolInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Runs the blocking handlers of the asyncio server on worker threads, the async ones stay on the loop.
+    The services in `reserved` get their own pool, so their calls never queue behind the calls of the rest.
+
+    Has to be the first (outermost) interceptor, the other ones wrap the handlers in blocking code too.
+    """
+    def __init__(self, executor:Executor, reserved:dict[str, Executor]):
+        super().__init__()
+        self.executor = executor
+        self.reserved = reserved
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or not is_blocking_handler(handler):
+            return handler
+
+        _, service, _ = handler_call_details.method.split("/")
+        executor = self.reserved.get(service, self.executor)
+        if handler.unary_unary:
+            behavior = handler.unary_unary
+            async def unary_handler(request, context):
+                loop = asyncio.get_running_loop()
+                try:
+                    return await loop.run_in_executor(
+                        executor, behavior, request, WorkerThreadServicerContext(context, loop)
+                    )
+                except AbortRpc as e:
+                    await context.abort(e.code, e.details, e.trailing_metadata)
+            return grpc.unary_unary_rpc_method_handler(
+                unary_handler,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        if handler.unary_stream:
+            behavior = handler.unary_stream
+            async def stream_handler(request, context):
+                loop = asyncio.get_running_loop()
+                end = object()
+                responses = None
+                try:
+                    responses = iter(await loop.run_in_executor(
+                        executor, behavior, request, WorkerThreadServicerContext(context, loop)
+                    ))
+                    # Every message is produced on a worker, the worker is free in between
+                    while (response := await loop.run_in_executor(executor, next, responses, end)) is not end:
+                        yield response
+                except AbortRpc as e:
+                    await context.abort(e.code, e.details, e.trailing_metadata)
+                finally:
+                    if hasattr(responses, "close"):
+                        # Still running on a worker if the rpc got cancelled midway, it's closed once collected then
+                        with contextlib.suppress(ValueError):
+                            responses.close()
+            return grpc.unary_stream_rpc_method_handler(
+                stream_handler,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        # Client streaming isn't used by the services, the migration thread pool of the server takes those
+        return handler
@@ -1,9 +1,16 @@
+import sys
 from concurrent import futures
 
 import grpc
 
 from agent import ServerConfig
-from agent.internal.interceptors import AsyncJobInterceptor, AuthTokenValidatorInterceptor
+from agent.internal.interceptors import (
+    AioAsyncJobInterceptor,
+    AioAuthTokenValidatorInterceptor,
+    AsyncJobInterceptor,
+    AuthTokenValidatorInterceptor,
+    WorkerPoolInterceptor,
+)
 from agent.internal.proto_utils import (
     discover_grpc_service_impls,
     discover_protobuf_messages,
@@ -18,7 +25,7 @@ def init_server() -> grpc.Server:
 
     config = ServerConfig()
     server = grpc.server(
-        futures.ThreadPoolExecutor(max_workers=5),
+        futures.ThreadPoolExecutor(max_workers=config.grpc_max_workers, thread_name_prefix="grpc-worker"),
         interceptors=[
             AuthTokenValidatorInterceptor(config=config),
             AsyncJobInterceptor(
@@ -33,6 +40,51 @@ def init_server() -> grpc.Server:
     for service_name, impl in service_impls.items():
         impl.adapter(impl.class_obj(), server)
 
+    add_port(server, config)
+    return server
+
+
+def init_async_server() -> grpc.aio.Server:
+    """
+    Server of `grpc_server_mode` "asyncio", has to be created on the loop it runs on.
+
+    The blocking handlers run on `grpc_max_workers` threads, rds.InterAgentService has `grpc_inter_agent_workers`
+    threads of its own. Servicers having an `Async{Name}` version next to them (`AsyncJobService`) are served by it,
+    it gets the worker pool for whatever blocking it does.
+    """
+    messages = discover_protobuf_messages()
+    messages_with_meta = discover_protobuf_messages_with_meta()
+    service_impls = discover_grpc_service_impls()
+
+    config = ServerConfig()
+    executor = futures.ThreadPoolExecutor(max_workers=config.grpc_max_workers, thread_name_prefix="grpc-worker")
+    inter_agent_executor = futures.ThreadPoolExecutor(
+        max_workers=config.grpc_inter_agent_workers,
+        thread_name_prefix="grpc-inter-agent-worker",
+    )
+    server = grpc.aio.server(
+        migration_thread_pool=executor,
+        interceptors=[
+            WorkerPoolInterceptor(executor=executor, reserved={"rds.InterAgentService": inter_agent_executor}),
+            AioAuthTokenValidatorInterceptor(config=config),
+            AioAsyncJobInterceptor(
+                protobuf_messages=messages,
+                protobuf_messages_with_meta=messages_with_meta,
+                service_impls=service_impls,
+            ),
+        ],
+    )
+
+    for impl in service_impls.values():
+        async_class_obj = getattr(sys.modules[impl.class_obj.__module__], f"Async{impl.class_obj.__name__}", None)
+        servicer = async_class_obj(executor=executor) if async_class_obj else impl.class_obj()
+        impl.adapter(servicer, server)
+
+    add_port(server, config)
+    return server
+
+
+def add_port(server:grpc.Server|grpc.aio.Server, config:ServerConfig):
     # Add SSL credentials if cert and key are provided
     if config.grpc_cert_path and config.grpc_key_path:
         with open(config.grpc_cert_path, 'rb') as f:
@@ -45,5 +97,3 @@ def init_server() -> grpc.Server:
         server.add_secure_port(f'[::]:{config.grpc_port}', creds)
     else:
         server.add_insecure_port(f'[::]:{config.grpc_port}')
-
-    return server
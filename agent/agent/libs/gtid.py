@@ -0,0 +1,88 @@
+from functools import lru_cache
+
+
+class GTIDSet:
+    """
+    Parsed MariaDB GTID position, like `0-1-100,1-2-50`
+
+    Each replication domain has its own monotonically increasing sequence number,
+    the server id only tells which server wrote the last transaction of that domain.
+    So positions are compared per domain by the sequence number, server id doesn't take part.
+
+    Instances are immutable, use `GTIDSet.parse` to get a cached one.
+    """
+    __slots__ = ("sequences", "server_ids", "total")
+
+    def __init__(self, sequences:dict[int, int], server_ids:dict[int, int]|None=None):
+        self.sequences = sequences # domain id -> sequence number
+        self.server_ids = server_ids or {} # domain id -> server id
+        # Sum of the sequence numbers of all domains, grows with every transaction in any domain.
+        # If a position dominates another, its total is higher. So sorting by it ranks the most advanced first.
+        self.total = sum(sequences.values())
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def parse(gtid:str) -> "GTIDSet":
+        """
+        Raises ValueError if `gtid` is not a valid MariaDB GTID position.
+        Empty position (a fresh server) is a valid one.
+        """
+        sequences = {}
+        server_ids = {}
+        for part in gtid.replace("\n", "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            domain_id, server_id, sequence = part.split("-")
+            domain_id = int(domain_id)
+            if domain_id in sequences:
+                raise ValueError(f"Duplicate domain {domain_id} in gtid {gtid}")
+            sequences[domain_id] = int(sequence)
+            server_ids[domain_id] = int(server_id)
+        return GTIDSet(sequences, server_ids)
+
+    def dominates(self, other:"GTIDSet") -> bool:
+        """
+        Whether this position has applied everything `other` has applied (in all domains of `other`).
+        """
+        if self.total < other.total:
+            return False
+        sequences = self.sequences
+        for domain_id, sequence in other.sequences.items():
+            if sequences.get(domain_id, -1) < sequence:
+                return False
+        return True
+
+    def compare(self, other:"GTIDSet") -> int|None:
+        """
+        Returns:
+            -1 if self is behind other
+             0 if both are same
+             1 if self is ahead of other
+             None if both have transactions the other one doesn't have (diverged)
+        """
+        self_dominates = self.dominates(other)
+        other_dominates = other.dominates(self)
+        if self_dominates and other_dominates:
+            return 0
+        if self_dominates:
+            return 1
+        if other_dominates:
+            return -1
+        return None
+
+    def __eq__(self, other):
+        return isinstance(other, GTIDSet) and self.sequences == other.sequences
+
+    def __hash__(self):
+        return hash(frozenset(self.sequences.items()))
+
+    def __str__(self):
+        return ",".join(
+            f"{domain_id}-{self.server_ids.get(domain_id, 0)}-{sequence}"
+            for domain_id, sequence in sorted(self.sequences.items())
+        )
+
+    def __repr__(self):
+        return f"GTIDSet({self})"
+
@@ -0,0 +1,109 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from agent import ServerConfig
+from agent.internal.config import ClusterConfig
+
+
+class PendingReconciliation:
+    def __init__(self, cluster_id:str):
+        self.cluster_id = cluster_id
+        self.config: ClusterConfig|None = None
+        self.revision = 0
+        self.due_at = 0.0
+        self.running = False
+        self.removed = False
+        self.applied_revision = 0
+        self.coalesced = 0 # config events replaced by a newer one before they got applied
+
+
+class ConfigReconciler:
+    """
+    Applies the config changes of a cluster (proxy servers, replication, election) outside of the watch.
+
+    - Config events are debounced by `config_reconcile_debounce_ms`,
+      a burst of edits is applied once, with the newest config.
+    - Only the newest revision is kept, an older one arriving late is dropped.
+    - At most one reconciliation per cluster runs at once. If the config changes meanwhile,
+      it's applied again right after the running one finishes.
+
+    So the watch only hands over the config and moves on to the next event,
+    status events never wait for a slow proxy / MySQL reconfiguration.
+    """
+
+    def __init__(self, reconcile:Callable[[str, ClusterConfig], None], start_threads:bool=True):
+        self.config = ServerConfig()
+        self.reconcile = reconcile
+        self.clusters: dict[str, PendingReconciliation] = {}
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.config_reconcile_max_concurrency,
+            thread_name_prefix="config-reconciler",
+        )
+        if start_threads:
+            threading.Thread(target=self.dispatch_loop, daemon=True).start()
+
+    def submit(self, cluster_id:str, config:ClusterConfig, revision:int):
+        with self.condition:
+            pending = self.clusters.get(cluster_id)
+            if pending is None:
+                pending = self.clusters[cluster_id] = PendingReconciliation(cluster_id)
+            if revision and revision <= max(pending.revision, pending.applied_revision):
+                # Late delivery of an older config
+                return
+            if pending.config is not None:
+                pending.coalesced += 1
+            pending.config = config
+            pending.revision = revision
+            pending.removed = False
+            # Debounce, every new event pushes the reconciliation a bit further
+            pending.due_at = time.monotonic() + self.config.config_reconcile_debounce_ms / 1000
+            self.condition.notify()
+
+    def remove(self, cluster_id:str):
+        with self.condition:
+            pending = self.clusters.get(cluster_id)
+            if pending and not pending.running:
+                del self.clusters[cluster_id]
+            elif pending:
+                # Dropped once the running one finishes
+                pending.config = None
+                pending.removed = True
+
+    def dispatch_loop(self):
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                for pending in self.clusters.values():
+                    if pending.running or pending.config is None or pending.due_at > now:
+                        continue
+                    pending.running = True
+                    config, revision = pending.config, pending.revision
+                    pending.config = None
+                    self.executor.submit(self._run, pending, config, revision)
+
+                waiting = [
+                    pending.due_at for pending in self.clusters.values()
+                    if not pending.running and pending.config is not None
+                ]
+                self.condition.wait(timeout=max(0.01, min(waiting) - now) if waiting else None)
+
+    def _run(self, pending:PendingReconciliation, config:ClusterConfig, revision:int):
+        try:
+            self.reconcile(pending.cluster_id, config)
+        except Exception:
+            print(f"Failed to reconcile config of cluster {pending.cluster_id} at revision {revision}")
+            traceback.print_exc()
+        finally:
+            with self.condition:
+                pending.running = False
+                if pending.removed:
+                    self.clusters.pop(pending.cluster_id, None)
+                pending.applied_revision = max(pending.applied_revision, revision)
+                if pending.coalesced:
+                    print(f"Reconciled config of cluster {pending.cluster_id} at revision {revision}, skipped {pending.coalesced} older ones")
+                    pending.coalesced = 0
+                self.condition.notify()
@@ -1,63 +1,215 @@
-import heapq
 import threading
 import time
+from typing import Callable
 
 from generated.extras_pb2 import DBHealthStatus
-from agent.monitor.dead_node_handler import handle_dead_node
+from agent import ServerConfig
+from agent.monitor.dead_node_scheduler import DeadNodeHandlingScheduler
+from agent.monitor.phi_accrual import PhiAccrualEstimator
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel holding a single deadline per key.
+
+    Every key lives in exactly one slot, so the memory is bounded by the number of keys,
+    no matter how frequently they get re-scheduled.
+
+    Pushing a deadline further only updates the deadline of the key, the key is moved
+    to the right slot lazily when the wheel visits its current slot.
+    As nodes keep reporting way before their deadline, that's a dict write per update.
+    """
+
+    def __init__(self, tick_seconds:float, slots:int, now:float):
+        self.tick_seconds = tick_seconds
+        self.slots: list[set[str]] = [set() for _ in range(slots)]
+        self.deadlines: dict[str, float] = {}
+        self.slot_of: dict[str, int] = {}
+        self.current_tick = self._tick(now) - 1 # Last tick which has been fully processed
+
+    def _tick(self, timestamp:float) -> int:
+        return int(timestamp / self.tick_seconds)
+
+    def _slot_index(self, deadline:float) -> int:
+        # Past deadlines go to the next slot to visit
+        return max(self._tick(deadline), self.current_tick + 1) % len(self.slots)
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def __contains__(self, key:str):
+        return key in self.deadlines
+
+    def schedule(self, key:str, deadline:float):
+        old_deadline = self.deadlines.get(key)
+        self.deadlines[key] = deadline
+        if old_deadline is not None and deadline >= old_deadline:
+            return
+        self._move(key, self._slot_index(deadline))
+
+    def cancel(self, key:str):
+        if self.deadlines.pop(key, None) is not None:
+            self.slots[self.slot_of.pop(key)].discard(key)
+
+    def _move(self, key:str, index:int):
+        old_index = self.slot_of.get(key)
+        if old_index is not None:
+            self.slots[old_index].discard(key)
+        self.slots[index].add(key)
+        self.slot_of[key] = index
+
+    def advance(self, now:float) -> list[str]:
+        """
+        Moves the wheel till `now` and returns the keys whose deadline has passed.
+        Expired keys are removed from the wheel.
+
+        Only the ticks which have completely passed are processed, so a key expires at most one tick late.
+        """
+        target_tick = self._tick(now) - 1
+        # No need to visit a slot more than once, even if we are behind by more than a rotation
+        ticks = min(target_tick - self.current_tick, len(self.slots))
+        expired = []
+        for tick in range(target_tick - ticks + 1, target_tick + 1):
+            index = tick % len(self.slots)
+            slot = self.slots[index]
+            if not slot:
+                continue
+            for key in list(slot):
+                deadline = self.deadlines[key]
+                if deadline <= now:
+                    slot.discard(key)
+                    del self.deadlines[key]
+                    del self.slot_of[key]
+                    expired.append(key)
+                elif self._tick(deadline) % len(self.slots) != index:
+                    # Deadline got pushed after the key was placed here
+                    self._move(key, self._tick(deadline) % len(self.slots))
+        self.current_tick = target_tick
+        return expired
 
 
 class DeadNodeDetector:
-    def __init__(self, timeout_seconds):
+    """
+    Marks a node as dead when its health status stops arriving.
+
+    The deadline of a node is derived from the phi accrual estimation of its report intervals,
+    so nodes on a steady network get detected faster and nodes on a jittery one get more slack.
+    Till enough reports are collected, fixed `timeout_seconds` is used.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds,
+        tick_seconds:float=0.05,
+        clock:Callable[[], float]=time.monotonic,
+        start_threads:bool=True,
+    ):
+        self.config = ServerConfig()
         self.timeout_seconds = timeout_seconds
+        self.tick_seconds = tick_seconds
+        self.clock = clock
         self.last_seen = {}
-        self.heap = []
+        self.arrival_stats: dict[str, PhiAccrualEstimator] = {}
+        self.node_clusters: dict[str, str] = {} # node_id -> cluster_id
+        self.phi_thresholds: dict[str, float] = {} # cluster_id -> threshold, if overridden in cluster config
+        # One rotation covers the max timeout, so most of the deadlines expire on first visit of their slot
+        self.wheel = TimingWheel(
+            tick_seconds=tick_seconds,
+            slots=max(64, int(self.config.dead_node_max_timeout_ms / 1000 / tick_seconds) + 1),
+            now=clock(),
+        )
         self.dead = set()
-        self.dead_node_handling_failed = set()
+        # Nodes whose liveness is tracked by etcd lease, for these expiry of the status key is the death signal
+        self.lease_tracked = set()
         self.lock = threading.Lock()
 
-        # Start monitoring in a separate thread
-        threading.Thread(target=self.monitor_loop, daemon=True).start()
-        threading.Thread(target=self.retry_failed_dead_node_handling_loop, daemon=True).start()
+        self.scheduler: DeadNodeHandlingScheduler|None = None
+        if start_threads:
+            self.scheduler = DeadNodeHandlingScheduler()
+            # Start monitoring in a separate thread
+            threading.Thread(target=self.monitor_loop, daemon=True).start()
+
 
+    def set_phi_threshold(self, cluster_id:str, threshold:float|None):
+        with self.lock:
+            if threshold:
+                self.phi_thresholds[cluster_id] = threshold
+            else:
+                self.phi_thresholds.pop(cluster_id, None)
 
-    def update(self, node_id:str, health_status:DBHealthStatus):
+    def update(self, node_id:str, health_status:DBHealthStatus, cluster_id:str|None=None):
         # TODO: consider gtid also. take that into account for node failure detection
-        # TODO: + consider the reporting time of the health status
         with self.lock:
-            """
-            In case of using report
-            """
-            now = time.time()
+            now = self.clock()
             self.last_seen[node_id] = now
-            heapq.heappush(self.heap, (now + self.timeout_seconds, node_id))
+            if cluster_id:
+                self.node_clusters[node_id] = cluster_id
+            if node_id in self.dead:
+                # The silence of the outage isn't a report interval, start the stats afresh
+                self.arrival_stats.pop(node_id, None)
+            if health_status.liveness_via_lease:
+                # Status is only published on change, so no timeout tracking for this node
+                self.lease_tracked.add(node_id)
+                self.wheel.cancel(node_id)
+                self.arrival_stats.pop(node_id, None)
+            else:
+                self.lease_tracked.discard(node_id)
+                self.wheel.schedule(node_id, now + self._timeout_seconds(node_id, health_status))
             if node_id in self.dead:
                 self.dead.remove(node_id)
-                self.dead_node_handling_failed.discard(node_id)
+                if self.scheduler:
+                    self.scheduler.cancel(node_id)
                 print(f"[RECOVERED] {node_id} at {now:.2f}")
 
-    def _handle_dead_node(self, node_id:str):
-        try:
-            if node_id not in self.dead:
+    def _timeout_seconds(self, node_id:str, health_status:DBHealthStatus) -> float:
+        stats = self.arrival_stats.get(node_id)
+        if stats is None:
+            stats = self.arrival_stats[node_id] = PhiAccrualEstimator(
+                window_size=self.config.dead_node_phi_window_size,
+                min_std_deviation_ms=self.config.dead_node_phi_min_std_deviation_ms,
+                acceptable_pause_ms=self.config.dead_node_phi_acceptable_pause_ms,
+            )
+        stats.add(health_status.reported_at)
+
+        threshold = self.phi_thresholds.get(self.node_clusters.get(node_id), self.config.dead_node_phi_threshold)
+        timeout_ms = stats.timeout_ms(threshold)
+        if timeout_ms is None:
+            return self.timeout_seconds
+        # The node can slow down its health checks anytime (see `HealthCheckCadence`),
+        # the past intervals can't predict that, so give at least two of the announced intervals
+        min_timeout_ms = max(self.config.dead_node_min_timeout_ms, 2 * health_status.report_interval_ms)
+        return min(max(timeout_ms, min_timeout_ms), self.config.dead_node_max_timeout_ms) / 1000
+
+    def mark_status_expired(self, node_id:str):
+        """
+        Called when the status key of a node got deleted.
+        For lease tracked nodes, it means the node stopped refreshing its lease.
+        """
+        with self.lock:
+            if node_id not in self.lease_tracked or node_id in self.dead:
                 return
-            handle_dead_node(node_id)
-        except Exception as e:
-            print(f"[ERROR] {node_id}: {e}")
+            self.lease_tracked.discard(node_id)
+            self.dead.add(node_id)
+            if self.scheduler:
+                self.scheduler.schedule(node_id)
+
+    def expire(self, now:float|None=None) -> list[str]:
+        """
+        Marks the nodes which haven't reported within the timeout as dead.
+        Returns the newly dead nodes.
+        """
+        now = now or self.clock()
+        newly_dead = []
+        with self.lock:
+            for node_id in self.wheel.advance(now):
+                if node_id in self.lease_tracked or node_id in self.dead:
+                    continue
+                self.dead.add(node_id)
+                newly_dead.append(node_id)
+        return newly_dead
 
     def monitor_loop(self):
         while True:
-            time.sleep(1)
-            now = time.time()
-            with self.lock:
-                while self.heap and self.heap[0][0] <= now:
-                    expire_time, node_id = heapq.heappop(self.heap)
-                    last = self.last_seen.get(node_id, 0)
-                    if last <= now - self.timeout_seconds and node_id not in self.dead:
-                        self.dead.add(node_id)
-                        # Open a new thread and call the handle_dead_node function
-                        threading.Thread(target=self._handle_dead_node, args=(node_id,), daemon=True).start()
-
-
-    def retry_failed_dead_node_handling_loop(self):
-        time.sleep(30)
-        for node_id in list(self.dead_node_handling_failed):
-            threading.Thread(target=self._handle_dead_node, args=(node_id,), daemon=True).start()
+            time.sleep(self.tick_seconds)
+            for node_id in self.expire():
+                self.scheduler.schedule(node_id)
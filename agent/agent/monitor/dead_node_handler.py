@@ -1,65 +1,56 @@
-import contextlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
 
-from generated.inter_agent_pb2 import CheckDatabaseReachabilityRequest, CheckDatabaseReachabilityResponse
 from agent.domain.mysql import MySQL
-from agent.internal.config import ClusterConfig
+from agent.internal.config import ClusterConfig, ClusterConfigCache
+from agent.internal.etcd_client import Etcd3Client
+from agent.monitor.quorum_probe import check_reachability_via_proxy, probe_quorum
 
 
-def handle_dead_node(node_id:str):
+def handle_dead_node(node_id:str) -> bool:
     """
     This function needs to verify whether the node is actually dead
     If it's dead just mark it as offline and handle it accordingly.
 
+    Returns False if the node is dead but couldn't be marked as offline, so the caller should retry.
+
     Verification Flow (If at any step it starts working, assume that the node is healthy)-
     1. Ask proxy node to check if the node is reachable
     2. Then ask self + all other nodes to check if the node is reachable
     3. If all checks fail, then mark the node as dead and update cluster config
     """
     db = MySQL(node_id)
-    cluster_config = ClusterConfig(etcd_client=db.kv, cluster_id=db.model.cluster_id)
+    if mark_node_as_dead_if_unreachable(db.kv, db.cluster_config, node_id):
+        return True
+    # Might have failed due to a stale cached config, the retry should read it afresh
+    ClusterConfigCache().invalidate(db.model.cluster_id)
+    return False
+
+
+def mark_node_as_dead_if_unreachable(etcd_client:Etcd3Client, cluster_config:ClusterConfig, node_id:str) -> bool:
+    """
+    Verification and marking part of `handle_dead_node`, takes the etcd client and config from caller
+    so it can be driven without a local database record (see benchmarks/failover_simulation.py)
+    """
+    start = time.monotonic()
 
     # 1. Ask proxy node to check if the node is reachable
-    proxy_agent = db.get_agent_for_proxy()
-    reachability_response_from_proxy:CheckDatabaseReachabilityResponse = proxy_agent.inter_agent_service.CheckDatabaseReachability(
-        CheckDatabaseReachabilityRequest(
-            cluster_id=db.model.cluster_id,
-            node_id=node_id
-        )
-    )
-    if reachability_response_from_proxy.reachable:
-        return
+    try:
+        if check_reachability_via_proxy(cluster_config, node_id):
+            print(f"Node {node_id} is reachable from proxy, not marking it as dead. ({(time.monotonic() - start) * 1000:.0f}ms)")
+            return True
+    except Exception as e:
+        # Proxy might be down as well, let the other nodes decide
+        print(f"Failed to check reachability of {node_id} via proxy: {e}")
 
     # 2. Ask all other online nodes to check if the node is reachable
-    no_of_nodes_reachable = 0
     node_ids = cluster_config.online_master_node_ids + cluster_config.online_replica_node_ids + cluster_config.online_read_only_node_ids
     # Remove `node_id` from the list to avoid hitting itself
     node_ids = [nid for nid in node_ids if nid != node_id]
-    no_of_nodes_for_win = len(node_ids) * 0.6
-
-    def check_node_reachability(other_node_id) -> bool:
-        agent = db.get_agent_for_node(other_node_id)
-        reachability_response: CheckDatabaseReachabilityResponse = agent.inter_agent_service.CheckDatabaseReachability(
-            CheckDatabaseReachabilityRequest(
-                cluster_id=db.model.cluster_id,
-                node_id=node_id
-            )
-        )
-        return reachability_response.reachable
-
-    with ThreadPoolExecutor() as executor:
-        future_to_node = {executor.submit(check_node_reachability, other_node_id): other_node_id for other_node_id in node_ids}
-        for future in as_completed(future_to_node):
-            with contextlib.suppress(Exception):
-                if future.result():
-                    no_of_nodes_reachable = no_of_nodes_reachable + 1
-                    if no_of_nodes_for_win > no_of_nodes_reachable:
-                        print(f"Node {node_id} is reachable by by 60% of nodes, not marking it as dead.")
-                        return
+    result = probe_quorum(cluster_config, node_id, node_ids, required_ratio=0.6)
+    print(f"{result} (total {(time.monotonic() - start) * 1000:.0f}ms)")
 
     # If more than 60% node says the node is dead, then mark it as dead
-    if no_of_nodes_reachable < (len(node_ids) * 0.6):
-        etcd_client = db.kv
+    if not result.reachable:
         old_version = cluster_config.version
 
         txn_success, _  = etcd_client.transaction(
@@ -79,5 +70,7 @@ def handle_dead_node(node_id:str):
             print(f"Config updated successfully, marking {node_id} as dead.")
         else:
             print("Update failed. key changed in between.")
+        return txn_success
     else:
-        print(f"Node {node_id} is reachable by some nodes, not marking it as dead.")
+        print(f"Node {node_id} is reachable by 60% of nodes, not marking it as dead.")
+        return True
@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from agent import ServerConfig
+from agent.monitor.dead_node_handler import handle_dead_node
+
+
+class DeadNodeHandlingState:
+    def __init__(self, node_id:str):
+        self.node_id = node_id
+        self.attempts = 0
+        self.running = False
+        self.cancelled = False # Node recovered while its handling was running
+        self.next_attempt_at = time.time()
+        self.last_attempt_at:float|None = None
+        self.last_error = ""
+
+
+class DeadNodeHandlingScheduler:
+    """
+    Runs `handle_dead_node` for the dead nodes and retries it till it succeeds.
+
+    - A node is never handled twice at once, scheduling an already scheduled node is a no-op.
+    - At most `dead_node_handling_max_concurrency` nodes are handled at once.
+    - Failed attempts are retried with exponential backoff and jitter,
+      so a stuck failover keeps converging without flooding etcd / peers.
+    - Once a node recovers, its pending retries are dropped.
+
+    Only one instance per process, so the gRPC services can look into it.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, start_threads:bool=True):
+        if hasattr(self, "_initialized"):
+            return
+        self._initialized = True
+        self.config = ServerConfig()
+        self.states: dict[str, DeadNodeHandlingState] = {}
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.dead_node_handling_max_concurrency,
+            thread_name_prefix="dead-node-handler",
+        )
+        if start_threads:
+            threading.Thread(target=self.dispatch_loop, daemon=True).start()
+
+    def schedule(self, node_id:str):
+        with self.condition:
+            if node_id in self.states:
+                state = self.states[node_id]
+                state.cancelled = False
+                return
+            self.states[node_id] = DeadNodeHandlingState(node_id)
+            self.condition.notify()
+
+    def cancel(self, node_id:str):
+        with self.condition:
+            state = self.states.get(node_id)
+            if not state:
+                return
+            if state.running:
+                # Let the running attempt finish, but don't retry it
+                state.cancelled = True
+            else:
+                del self.states[node_id]
+
+    def snapshot(self) -> list[DeadNodeHandlingState]:
+        with self.condition:
+            return sorted(self.states.values(), key=lambda state: state.next_attempt_at)
+
+    def backoff_seconds(self, attempts:int) -> float:
+        delay_ms = min(
+            self.config.dead_node_retry_max_delay_ms,
+            self.config.dead_node_retry_base_delay_ms * (2 ** (attempts - 1)),
+        )
+        # Equal jitter, so nodes failed together don't retry together
+        return (delay_ms / 2 + random.uniform(0, delay_ms / 2)) / 1000
+
+    def dispatch_loop(self):
+        while True:
+            with self.condition:
+                now = time.time()
+                running = sum(1 for state in self.states.values() if state.running)
+                due = [
+                    state for state in self.states.values()
+                    if not state.running and state.next_attempt_at <= now
+                ]
+                due.sort(key=lambda state: state.next_attempt_at)
+                for state in due[:max(0, self.config.dead_node_handling_max_concurrency - running)]:
+                    state.running = True
+                    state.attempts += 1
+                    state.last_attempt_at = now
+                    running += 1
+                    self.executor.submit(self._handle, state)
+
+                # Sleep till the next retry is due, or till something changes (new node, attempt finished)
+                waiting = [state.next_attempt_at for state in self.states.values() if not state.running]
+                timeout = None
+                if waiting and running < self.config.dead_node_handling_max_concurrency:
+                    timeout = max(0.05, min(waiting) - now)
+                self.condition.wait(timeout=timeout)
+
+    def _handle(self, state:DeadNodeHandlingState):
+        success = False
+        error = ""
+        try:
+            success = handle_dead_node(state.node_id)
+            if not success:
+                error = "node could not be marked as dead, will be retried"
+        except Exception as e:
+            error = str(e)
+            print(f"[ERROR] {state.node_id}: {e}")
+            traceback.print_exc()
+
+        with self.condition:
+            state.running = False
+            if success or state.cancelled:
+                self.states.pop(state.node_id, None)
+            else:
+                state.last_error = error
+                state.next_attempt_at = time.time() + self.backoff_seconds(state.attempts)
+                print(f"Dead node handling of {state.node_id} failed (attempt {state.attempts}), retrying at {state.next_attempt_at:.2f}")
+            self.condition.notify()
@@ -1,10 +1,17 @@
-from client import Agent
+import time
+
 from generated.extras_pb2 import DBHealthStatus
-from generated.inter_agent_pb2 import CheckDatabaseReachabilityRequest, CheckDatabaseReachabilityResponse
-from agent.helpers import get_working_etcd_cred_of_cluster
+from agent.helpers import (
+    get_node_statuses_of_cluster,
+    get_working_etcd_cred_of_cluster,
+    invalidate_working_etcd_cred_of_cluster,
+)
 from agent.internal.bg_job.job import queue
-from agent.internal.config import ClusterConfig, ServerConfig
+from agent.internal.config import ClusterConfig, ClusterConfigCache, ServerConfig
 from agent.internal.etcd_client import Etcd3Client
+from agent.internal.etcd_pool import get_etcd_client, is_etcd_auth_error
+from agent.libs.gtid import GTIDSet
+from agent.monitor.quorum_probe import check_reachability_via_proxy, find_first_reachable_via_proxy
 
 
 class NodeElection:
@@ -20,36 +27,56 @@ class NodeElection:
     Rules -
     1. Check once more if the node is reachable by the proxy node -- sanity check
     2. Fetch the eligible nodes which can become master (Only replica nodes can become master)
-    3. Remove nodes which has outdated gtid than the current master node.
+    3. Remove nodes which has outdated gtid than the current master node or lagging more than `max_replication_lag_ms`.
     4. Sort the nodes by their weight (weight is set by controlplane in config, should be linked with some cpu/memory/disk resource quota)
+       and then by their gtid position and replication lag
     5. Chose the most appropriate node
-    6. Check with proxy node if future master node is reachable
+    6. Check with proxy node which of the eligible nodes are reachable (all at once), chose the first reachable one
     7. Switch the master node in cluster config
     8. Mark the old master node as replica in cluster config
 
+    If the state monitor has already ranked the successors, steps 2 to 5 are skipped
+    and only the top candidate is checked. Falls back to the full process if it's not reachable.
+
     During this process -
     Hold the election lock in etcd to avoid multiple nodes doing election at the same time.
     """
 
-    def elect_new_master_if_required(self, cluster_id:str, config:ClusterConfig):
+    def elect_new_master_if_required(self, cluster_id:str, config:ClusterConfig, ranked_node_ids:list[str]|None=None,
+                                     master_gtid:str|None=None):
+        """
+        `ranked_node_ids` - successors ranked by the state monitor, most eligible first (optional)
+        `master_gtid` - last gtid the master reported, as seen by the state monitor (optional).
+        Its status key is gone by the time of the election if it expired with the lease of the master.
+        """
         if len(config.online_master_node_ids)> 0:
             return
 
         queue().enqueue(
             self._elect_new_master,
             cluster_id,
+            ranked_node_ids,
+            master_gtid,
         )
 
-    def _elect_new_master(self, cluster_id:str):
+    def _elect_new_master(self, cluster_id:str, ranked_node_ids:list[str]|None=None, master_gtid:str|None=None):
         print("Electing new master for cluster:", cluster_id)
         username, password = get_working_etcd_cred_of_cluster(cluster_id)
+        try:
+            self.elect_new_master(get_etcd_client(username, password), cluster_id, ranked_node_ids, master_gtid)
+        except Exception as e:
+            if is_etcd_auth_error(e):
+                # Let the retry find a working one
+                invalidate_working_etcd_cred_of_cluster(cluster_id)
+            raise
+
+    def elect_new_master(self, etcd_client:Etcd3Client, cluster_id:str, ranked_node_ids:list[str]|None=None,
+                         master_gtid:str|None=None):
+        """
+        Runs the election with the given etcd client, `_elect_new_master` is the background job wrapper of it.
+        """
         server_config = ServerConfig()
-        etcd_client = Etcd3Client(
-            addresses=[f"{server_config.etcd_host}:{server_config.etcd_port}"],
-            user=username,
-            password=password,
-        )
-        cluster_config = ClusterConfig(etcd_client, cluster_id)
+        cluster_config = ClusterConfigCache().get(cluster_id, etcd_client)
         if len(cluster_config.online_master_node_ids) > 0:
             return
 
@@ -59,87 +86,44 @@ class NodeElection:
         offline_master_node_id = cluster_config.offline_master_node_ids[0]
 
         # 1:  Ask proxy to check the reachability of the current master node
-        proxy = cluster_config.proxy
-        proxy_agent =  Agent(
-            host=proxy.ip,
-            port=proxy.agent_port,
-            trusted_ca_path=ServerConfig().grpc_ca_path,
-            token=cluster_config.shared_token,
-            com_type="cluster",
-            cluster_id=cluster_id
-        )
-
+        timings: dict[str, float] = {}
+        phase_started_at = time.monotonic()
         print("Checking reachability of offline master node:", offline_master_node_id)
-        reachability_response_from_proxy:CheckDatabaseReachabilityResponse = proxy_agent.inter_agent_service.CheckDatabaseReachability(
-            CheckDatabaseReachabilityRequest(
-                cluster_id=cluster_id,
-                node_id=offline_master_node_id
-            )
-        )
-        if reachability_response_from_proxy.reachable:
+        if check_reachability_via_proxy(cluster_config, offline_master_node_id):
             # No need to do anything
             # The node will soon mark itself as online
             return
+        timings["master_check"] = time.monotonic() - phase_started_at
 
         lock = etcd_client.lock(server_config.kv_cluster_election_lock_key.format(cluster_id=cluster_id), ttl=1800)
 
         print("Acquiring election lock for cluster:", cluster_id)
+        phase_started_at = time.monotonic()
         if not lock.acquire(timeout=20):
             # If fail to acquire the lock, it means some other node is already doing the election
             # so, just put the job in queue and return
-            self.elect_new_master_if_required(cluster_id, cluster_config)
+            self.elect_new_master_if_required(cluster_id, cluster_config, master_gtid=master_gtid)
+            return
+        timings["lock_acquire"] = time.monotonic() - phase_started_at
 
         print("Election lock acquired for cluster:", cluster_id)
         try:
-            # 2: Fetch eligible nodes which can become master
-            eligible_nodes = cluster_config.online_replica_node_ids
-            if not eligible_nodes:
-                print(f"No eligible nodes to become master in cluster {cluster_id}.")
-                return
-
-            # 3. Fetch all nodes latest broadcasted status
-            node_status: dict[str, DBHealthStatus] = {}
-
-            for node_id in eligible_nodes + [offline_master_node_id]:
-                node_status_key = server_config.kv_cluster_node_status_key.format(
-                    cluster_id=cluster_id, node_id=node_id
-                )
-                status_data, _ = etcd_client.get(node_status_key)
-                if status_data:
-                    node_status[node_id] = DBHealthStatus.FromString(status_data)
-
-            if offline_master_node_id not in node_status:
-                """
-                If we don't have the status of the offline master node,
-                Then we can't take any action automatically
-                """
-                return
-
-            master_node_gtid = node_status[offline_master_node_id].global_transaction_id
-
-            # 4. Remove nodes which has outdated gtid than the current master node.
-            eligible_nodes = [
-                node_id
-                for node_id in eligible_nodes
-                if compare_gtid(node_status[node_id].global_transaction_id, master_node_gtid) >= 0
-            ]
-
-            # 5. Sort the nodes by their weight in descending order
-            eligible_nodes.sort(
-                key=lambda node_id: cluster_config.get_node(node_id).weight, reverse=True
-            )
-
-            # 6. Keep trying to check reachability of the most eligible nodes one by one
             elected_master_id = None
-            for node_id in eligible_nodes:
-                reachability_response_from_proxy: CheckDatabaseReachabilityResponse = (
-                    proxy_agent.inter_agent_service.CheckDatabaseReachability(
-                        CheckDatabaseReachabilityRequest(cluster_id=cluster_id, node_id=node_id)
-                    )
+            # The state monitor keeps the successors ranked from the status stream,
+            # if it sent the ranking, only the top candidate needs to be validated
+            if ranked_node_ids and ranked_node_ids[0] in cluster_config.online_replica_node_ids:
+                phase_started_at = time.monotonic()
+                try:
+                    if check_reachability_via_proxy(cluster_config, ranked_node_ids[0]):
+                        elected_master_id = ranked_node_ids[0]
+                except Exception as e:
+                    print(f"Reachability check of top candidate {ranked_node_ids[0]} failed: {e}")
+                timings["top_candidate_probe"] = time.monotonic() - phase_started_at
+
+            if not elected_master_id:
+                elected_master_id = self._find_new_master(
+                    etcd_client, cluster_config, offline_master_node_id, timings, master_gtid
                 )
-                if reachability_response_from_proxy.reachable:
-                    elected_master_id = node_id
-                    break
 
             if not elected_master_id:
                 # Found no eligible node which is reachable
@@ -147,7 +131,9 @@ class NodeElection:
                 return
 
             # 7. Use transaction to switch the master node in cluster config
-            cluster_config.reload()
+            phase_started_at = time.monotonic()
+            # Cached one can be stale by `cluster_config_cache_max_staleness_ms`, the switch needs the latest
+            cluster_config = ClusterConfigCache().get(cluster_id, etcd_client, max_staleness_ms=0)
             # Check once more if no master node is online
             if len(cluster_config.online_master_node_ids) > 0:
                 return
@@ -169,6 +155,7 @@ class NodeElection:
                 ],
                 failure=[],
             )
+            timings["txn"] = time.monotonic() - phase_started_at
             if txn_success:
                 print(f"New master node elected: {elected_master_id} in cluster {cluster_id}")
             else:
@@ -177,34 +164,113 @@ class NodeElection:
                 )
         finally:
             lock.release()
+            print(f"Election timings of cluster {cluster_id}: " + ", ".join(
+                f"{phase}={elapsed * 1000:.0f}ms" for phase, elapsed in timings.items()
+            ))
+
+    def _find_new_master(
+        self,
+        etcd_client:Etcd3Client,
+        cluster_config:ClusterConfig,
+        offline_master_node_id:str,
+        timings:dict[str, float],
+        master_gtid:str|None=None,
+    ) -> str|None:
+        """Steps 2 to 6, ranks the replicas from their latest status and returns the first reachable one"""
+        cluster_id = cluster_config.cluster_id
+        # 2: Fetch eligible nodes which can become master
+        eligible_nodes = cluster_config.online_replica_node_ids
+        if not eligible_nodes:
+            print(f"No eligible nodes to become master in cluster {cluster_id}.")
+            return None
+
+        # 3. Fetch all nodes latest broadcasted status, in a single read
+        phase_started_at = time.monotonic()
+        node_status, revision = get_node_statuses_of_cluster(etcd_client, cluster_id)
+        timings["status_fetch"] = time.monotonic() - phase_started_at
+        print(f"Fetched status of {len(node_status)} nodes at revision {revision}")
+
+        if offline_master_node_id not in node_status and master_gtid is None:
+            """
+            If we don't have the status of the offline master node (expired with its lease)
+            and the state monitor didn't keep its last gtid either,
+            Then we can't take any action automatically
+            """
+            return None
+
+        # Parse the gtid of every node once, nodes with invalid gtid can't be compared
+        node_gtid: dict[str, GTIDSet] = {}
+        for node_id, status in node_status.items():
+            try:
+                node_gtid[node_id] = GTIDSet.parse(status.global_transaction_id)
+            except ValueError:
+                print(f"Invalid gtid of node {node_id}: {status.global_transaction_id}")
+
+        if offline_master_node_id not in node_status:
+            # Its status expired with its lease, compare against the last gtid the state monitor has seen
+            try:
+                node_gtid[offline_master_node_id] = GTIDSet.parse(master_gtid)
+            except ValueError:
+                print(f"Invalid gtid of node {offline_master_node_id}: {master_gtid}")
+
+        if offline_master_node_id not in node_gtid:
+            return None
+        master_node_gtid = node_gtid[offline_master_node_id]
+
+        # 4. Remove nodes which has outdated gtid than the current master node.
+        eligible_nodes = [
+            node_id
+            for node_id in eligible_nodes
+            if node_id in node_gtid
+            and node_gtid[node_id].dominates(master_node_gtid)
+            and node_status[node_id].slave_sql_running
+            and not is_lagging(node_status[node_id], cluster_config.max_replication_lag_ms)
+        ]
+
+        # 5. Sort the nodes by their weight in descending order,
+        # then most advanced gtid and less lagging node first in case of same weight
+        eligible_nodes.sort(
+            key=lambda node_id: (
+                -cluster_config.get_node(node_id).weight,
+                -node_gtid[node_id].total,
+                replication_lag(node_status[node_id]),
+            )
+        )
+
+        # 6. Check reachability of all the eligible nodes at once, chose the most eligible reachable one
+        phase_started_at = time.monotonic()
+        elected_master_id = find_first_reachable_via_proxy(cluster_config, eligible_nodes)
+        timings["probe"] = time.monotonic() - phase_started_at
+
+        return elected_master_id
+
+def is_lagging(status:DBHealthStatus, max_replication_lag_ms:int) -> bool:
+    """
+    Whether the replica lags more than the allowed limit.
+    If limit is not configured or lag is not reported, the replica is not considered lagging.
+    (The IO thread of every replica stops when the master dies, they don't report the lag then)
+    """
+    if max_replication_lag_ms <= 0 or not status.HasField("seconds_behind_master"):
+        return False
+    return status.seconds_behind_master * 1000 > max_replication_lag_ms
+
+def replication_lag(status:DBHealthStatus) -> float:
+    """
+    Seconds behind master to rank the replicas by.
+    Lag is not reported while the replication threads are stopped / broken, such a replica ranks last.
+    """
+    return status.seconds_behind_master if status.HasField("seconds_behind_master") else float("inf")
 
 def compare_gtid(gtid_a: str, gtid_b: str) -> int:
         """
         Compare two GTIDs.
         Returns:
-            -1 if gtid1 < gtid2
+            -1 if gtid1 < gtid2 (or they have diverged / can't be parsed)
              0 if gtid1 == gtid2
              1 if gtid1 > gtid2
         """
-
-        gtid1_parts = gtid_a.split('-')
-        gtid2_parts = gtid_b.split('-')
-
-        if len(gtid1_parts) != 3 or len(gtid2_parts) != 3:
-            return -1
-
-        # If 2nd pos value is different, then return -1
-        if gtid1_parts[1] != gtid2_parts[1]:
-            return -1 if gtid1_parts[1] < gtid2_parts[1] else 1
-
-        # Compare the third part (sequence number)
         try:
-            gtid1_seq = int(gtid1_parts[2])
-            gtid2_seq = int(gtid2_parts[2])
-            if gtid1_seq < gtid2_seq:
-                return -1
-            if gtid1_seq > gtid2_seq:
-                return 1
-            return 0
+            result = GTIDSet.parse(gtid_a).compare(GTIDSet.parse(gtid_b))
         except ValueError:
-            return -1  # If conversion fails, treat as less than
+            return -1  # If parsing fails, treat as less than
+        return -1 if result is None else result
@@ -6,7 +6,11 @@ from concurrent.futures.thread import ThreadPoolExecutor
 from generated.extras_pb2 import ClusterNodeStatus, DBHealthStatus
 from agent import ServerConfig
 from agent.domain.mysql import MySQL
+from agent.internal.config import ClusterConfigCache
 from agent.internal.utils import get_redis_client
+from agent.monitor.health_cadence import HealthCheckCadence
+from agent.monitor.health_history import get_health_history, gtid_sequence, remove_health_history
+from agent.monitor.health_publisher import HealthStatusPublisher
 
 
 class MySQLHealthCheckMonitor:
@@ -14,39 +18,93 @@ class MySQLHealthCheckMonitor:
         self.config = ServerConfig()
         self.tasks: dict[str, asyncio.Task] = {}
         self.tasks_lock = asyncio.Lock()
-        self.executor = ThreadPoolExecutor(max_workers=50)
+        self.executor = ThreadPoolExecutor(max_workers=self.config.db_healthcheck_executor_max_workers)
         self.redis = get_redis_client(async_client=True)
         self.sync_db_ids_lock = asyncio.Lock()
         self.last_sync_in_cluster_config: dict[str, float] = {}
+        self.status_publisher = HealthStatusPublisher()
 
     async def monitor_db_health(self, db_id:str):
         loop = asyncio.get_running_loop()
         db_record = MySQL(db_id)
-        _ = db_record.get_db_conn() # Ensure the connection object is created
-        while True:
-            start = time.time()
-            try:
-                result: tuple[bool, DBHealthStatus] = await loop.run_in_executor(
-                    self.executor,
-                    db_record.get_health_info
-                )
-                success, health_info = result
-                if success:
-                    db_record.kv.put(db_record.kv_cluster_node_status_key, health_info.SerializeToString())
-                    if db_id not in self.last_sync_in_cluster_config or \
-                            time.time() - self.last_sync_in_cluster_config[db_id] > 600: # 10 minutes
-                        self.mark_db_as_online_in_config(db_record)
-                else:
-                    # Remove the db_id from last_sync_in_cluster_config
-                    # So that it can quickly marked as online again once we get a successful health check
-                    if db_id in self.last_sync_in_cluster_config:
-                        del self.last_sync_in_cluster_config[db_id]
-            finally:
-                end = time.time()
-                elapsed_ms = int((end - start)*1000)
-                wait_time = max(0, (self.config.db_healthcheck_interval_ms - elapsed_ms))
-                wait_time = max(wait_time, self.config.db_healthcheck_minimum_interval_ms)
-                await asyncio.sleep(wait_time/1000)  # Convert ms to seconds
+        if self.config.db_healthcheck_probe_engine != "asyncio":
+            # Ensure the connection object is created, blocking so not on the loop.
+            # The asyncio engine has its own connection (`get_health_info_async`)
+            await loop.run_in_executor(self.executor, db_record.get_db_conn)
+        history = get_health_history(db_id, create=True)
+        cadence = HealthCheckCadence(db_id)
+        cluster_config_read_at = 0
+        try:
+            while True:
+                if not self.refresh_cadence_from_cache(db_record, cadence) and \
+                        time.time() - cluster_config_read_at > self.config.db_healthcheck_cluster_config_refresh_seconds:
+                    cluster_config_read_at = time.time()
+                    await self.refresh_cadence(db_record, cadence)
+
+                start = time.time()
+                interval_ms = cadence.fast_interval_ms
+                try:
+                    result: tuple[bool, DBHealthStatus]
+                    if self.config.db_healthcheck_probe_engine == "asyncio":
+                        result = await db_record.get_health_info_async()
+                    else:
+                        result = await loop.run_in_executor(
+                            self.executor,
+                            db_record.get_health_info
+                        )
+                    success, health_info = result
+                    latency_ms = (time.time() - start) * 1000
+                    history.record(
+                        timestamp=start,
+                        latency_ms=latency_ms,
+                        success=success,
+                        gtid_sequence=gtid_sequence(health_info.global_transaction_id) if success else 0,
+                    )
+                    interval_ms = cadence.next_interval_ms(success, latency_ms, health_info)
+                    if success:
+                        health_info.report_interval_ms = interval_ms
+                        self.status_publisher.submit(db_record, health_info)
+                        if db_id not in self.last_sync_in_cluster_config or \
+                                time.time() - self.last_sync_in_cluster_config[db_id] > 600: # 10 minutes
+                            self.mark_db_as_online_in_config(db_record)
+                    else:
+                        # Remove the db_id from last_sync_in_cluster_config
+                        # So that it can quickly marked as online again once we get a successful health check
+                        if db_id in self.last_sync_in_cluster_config:
+                            del self.last_sync_in_cluster_config[db_id]
+                finally:
+                    end = time.time()
+                    elapsed_ms = int((end - start)*1000)
+                    wait_time = max(0, (interval_ms - elapsed_ms))
+                    wait_time = max(wait_time, self.config.db_healthcheck_minimum_interval_ms)
+                    await asyncio.sleep(wait_time/1000)  # Convert ms to seconds
+        finally:
+            await db_record.close_health_check_connection_async()
+
+    def refresh_cadence_from_cache(self, db_record: MySQL, cadence: HealthCheckCadence) -> bool:
+        """
+        Pick up the cadence overrides and the current master from the process wide cached cluster config,
+        done before every probe so the replicas move to the fast cadence the moment the master goes offline.
+        False if the cached config is stale (no watch feeding it), no etcd read here.
+        """
+        cluster_config = ClusterConfigCache().get_cached(db_record.model.cluster_id)
+        if cluster_config is None:
+            return False
+        db_record.cluster_config = cluster_config
+        cadence.apply_cluster_config(cluster_config)
+        return True
+
+    async def refresh_cadence(self, db_record: MySQL, cadence: HealthCheckCadence):
+        """
+        Reload the cluster config from etcd to pick up the cadence overrides and the current master.
+        On failure, the cadence falls back to the fast one.
+        """
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, db_record.reload_cluster_config)
+            cadence.apply_cluster_config(db_record.cluster_config)
+        except Exception as e:
+            print("Failed to reload cluster config for db:", db_record.model.id, e)
+            cadence.has_online_master = False
 
     def mark_db_as_online_in_config(self, db_record: MySQL):
         """
@@ -56,7 +114,7 @@ class MySQLHealthCheckMonitor:
         :return:
         """
         try:
-            db_record.cluster_config.reload()
+            db_record.reload_cluster_config(max_staleness_ms=0)
             if db_record.cluster_config.get_node(db_record.model.id).status != ClusterNodeStatus.OFFLINE:
                 # If node is already marked as online / in maintenance, do nothing
                 return
@@ -103,6 +161,7 @@ class MySQLHealthCheckMonitor:
             except asyncio.CancelledError:
                 pass
             del self.tasks[db_id]
+            remove_health_history(db_id)
 
     async def process_requested_changes_in_monitoring(self):
         while True:
@@ -163,5 +222,6 @@ class MySQLHealthCheckMonitor:
         await asyncio.gather(
             self.process_requested_changes_in_monitoring(),
             self.sync_monitored_db_ids_periodically(),
+            self.status_publisher.run(),
         )
 
@@ -0,0 +1,60 @@
+from generated.extras_pb2 import DBHealthStatus
+from agent import ServerConfig
+from agent.internal.config import ClusterConfig
+
+
+class HealthCheckCadence:
+    """
+    Decides the interval till the next health check of a database.
+
+    Masters are always probed on the fast cadence.
+    Replicas move to the stable cadence after `db_healthcheck_stable_after_probes` consecutive healthy probes,
+    and come back to the fast cadence the moment any probe fails, is slow,
+    the replica's IO thread stops or the cluster has no online master.
+
+    Both the intervals can be overridden per cluster in `ClusterConfig`.
+    """
+
+    def __init__(self, node_id:str):
+        self.config = ServerConfig()
+        self.node_id = node_id
+        self.stable_probes = 0
+        self.fast_interval_ms = self.config.db_healthcheck_interval_ms
+        self.stable_interval_ms = self.config.db_healthcheck_stable_interval_ms
+        self.is_master = False
+        self.has_online_master = True
+
+    @property
+    def is_stable(self) -> bool:
+        return self.stable_probes >= self.config.db_healthcheck_stable_after_probes
+
+    def apply_cluster_config(self, cluster_config:ClusterConfig):
+        self.fast_interval_ms = self.config.db_healthcheck_interval_ms
+        if cluster_config.HasField("healthcheck_interval_ms"):
+            self.fast_interval_ms = cluster_config.healthcheck_interval_ms
+        self.stable_interval_ms = self.config.db_healthcheck_stable_interval_ms
+        if cluster_config.HasField("healthcheck_stable_interval_ms"):
+            self.stable_interval_ms = cluster_config.healthcheck_stable_interval_ms
+        # Stable cadence can never be faster than the fast one
+        self.stable_interval_ms = max(self.stable_interval_ms, self.fast_interval_ms)
+
+        online_master_node_ids = cluster_config.online_master_node_ids
+        self.is_master = self.node_id in online_master_node_ids
+        self.has_online_master = len(online_master_node_ids) > 0
+        if not self.has_online_master:
+            self.stable_probes = 0
+
+    def next_interval_ms(self, success:bool, latency_ms:float, health_info:DBHealthStatus|None) -> int:
+        if (
+            not success
+            or latency_ms > self.config.db_healthcheck_slow_probe_threshold_ms
+            or self.is_master
+            or not self.has_online_master
+            or not health_info.is_replica
+            or not health_info.slave_io_running
+        ):
+            self.stable_probes = 0
+            return self.fast_interval_ms
+
+        self.stable_probes += 1
+        return self.stable_interval_ms if self.is_stable else self.fast_interval_ms
@@ -0,0 +1,156 @@
+import threading
+import time
+from array import array
+
+from agent import ServerConfig
+
+
+class HealthHistory:
+    """
+    Fixed size ring buffer of the health check results of a single database.
+
+    Every column is kept in a compact typed array, so memory stays bounded
+    (~21 bytes per sample, ~300KB for 1 hour of 250ms samples).
+
+    Writes happen from the health check loop, reads from the gRPC server thread.
+    Readers only copy the slice they need while holding the lock, the calculations happen outside it.
+    """
+
+    def __init__(self, capacity:int):
+        self.capacity = capacity
+        self.timestamps = array("d", [0.0]) * capacity # seconds since epoch
+        self.latencies = array("f", [0.0]) * capacity # probe latency in milliseconds
+        self.successes = array("b", [0]) * capacity
+        self.gtid_sequences = array("q", [0]) * capacity
+        self.next_index = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, timestamp:float, latency_ms:float, success:bool, gtid_sequence:int):
+        with self.lock:
+            i = self.next_index
+            self.timestamps[i] = timestamp
+            self.latencies[i] = latency_ms
+            self.successes[i] = 1 if success else 0
+            self.gtid_sequences[i] = gtid_sequence
+            self.next_index = (i + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def summary(self, window_seconds:int, now:float|None=None) -> dict[str, float]:
+        """
+        Returns latency percentiles, failure rate and gtid advance rate (transactions/second)
+        of the samples recorded in last `window_seconds`.
+        """
+        now = now or time.time()
+        timestamps, latencies, successes, gtid_sequences = self._window(now - window_seconds)
+        samples = len(timestamps)
+        summary = {
+            "samples": samples,
+            "p50_latency_ms": 0.0,
+            "p95_latency_ms": 0.0,
+            "p99_latency_ms": 0.0,
+            "failure_rate": 0.0,
+            "gtid_advance_rate": 0.0,
+        }
+        if not samples:
+            return summary
+
+        sorted_latencies = sorted(latencies)
+        summary["p50_latency_ms"] = _percentile(sorted_latencies, 50)
+        summary["p95_latency_ms"] = _percentile(sorted_latencies, 95)
+        summary["p99_latency_ms"] = _percentile(sorted_latencies, 99)
+        summary["failure_rate"] = 1 - sum(successes) / samples
+
+        # Gtid advance rate from the first and last successful probe of the window
+        first = _index_of(successes, 1)
+        last = _last_index_of(successes, 1)
+        if first != -1 and last > first and timestamps[last] > timestamps[first]:
+            summary["gtid_advance_rate"] = (gtid_sequences[last] - gtid_sequences[first]) / (timestamps[last] - timestamps[first])
+        return summary
+
+    def _window(self, since:float) -> tuple[array, array, array, array]:
+        """
+        Copy of the samples recorded after `since`, oldest first.
+        """
+        with self.lock:
+            if self.count < self.capacity:
+                order = [(0, self.count)]
+            else:
+                order = [(self.next_index, self.capacity), (0, self.next_index)]
+            timestamps = array("d")
+            latencies = array("f")
+            successes = array("b")
+            gtid_sequences = array("q")
+            for start, end in order:
+                timestamps.extend(self.timestamps[start:end])
+                latencies.extend(self.latencies[start:end])
+                successes.extend(self.successes[start:end])
+                gtid_sequences.extend(self.gtid_sequences[start:end])
+
+        # Timestamps are in ascending order, find the first sample of the window
+        lo, hi = 0, len(timestamps)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamps[mid] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return timestamps[lo:], latencies[lo:], successes[lo:], gtid_sequences[lo:]
+
+
+def _percentile(sorted_values:list[float], percentile:int) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(percentile / 100 * len(sorted_values)) - 1))
+    return float(sorted_values[index])
+
+
+def _index_of(values:array, value:int) -> int:
+    try:
+        return values.index(value)
+    except ValueError:
+        return -1
+
+
+def _last_index_of(values:array, value:int) -> int:
+    for i in range(len(values) - 1, -1, -1):
+        if values[i] == value:
+            return i
+    return -1
+
+
+def gtid_sequence(gtid:str) -> int:
+    """
+    Total of the sequence numbers across all the gtid domains / sources,
+    It only grows as transactions get applied, so it's good enough to measure the advance rate.
+
+    MariaDB - `0-1-100,1-2-50`
+    MySQL   - `3E11FA47-71CA-11E1-9E33-C80AA9429562:1-100:105`
+    """
+    total = 0
+    for part in gtid.replace("\n", "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if ":" in part:
+                total += int(part.rsplit(":", 1)[1].rsplit("-", 1)[-1])
+            else:
+                total += int(part.rsplit("-", 1)[1])
+        except (ValueError, IndexError):
+            continue
+    return total
+
+
+# db_id -> HealthHistory of the locally monitored databases
+_health_histories: dict[str, HealthHistory] = {}
+
+
+def get_health_history(db_id:str, create:bool=False) -> HealthHistory|None:
+    if create and db_id not in _health_histories:
+        config = ServerConfig()
+        capacity = config.db_health_history_seconds * 1000 // config.db_healthcheck_interval_ms
+        _health_histories[db_id] = HealthHistory(capacity=max(1, capacity))
+    return _health_histories.get(db_id)
+
+
+def remove_health_history(db_id:str):
+    _health_histories.pop(db_id, None)
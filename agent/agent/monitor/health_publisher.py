@@ -0,0 +1,155 @@
+import asyncio
+import time
+import traceback
+
+from generated.extras_pb2 import DBHealthStatus
+from agent import ServerConfig
+from agent.domain.mysql import MySQL
+from agent.internal.async_etcd_client import AsyncEtcd3Client
+
+
+class HealthStatusPublisher:
+    """
+    Aggregates the health status of all locally monitored databases and writes them to etcd in batches.
+
+    Health checks only submit their latest result here.
+    Once every flush window, the pending results are grouped by etcd credential
+    (all the databases of a cluster share the same set in most of the cases)
+    and written in a single transaction per group.
+
+    Only the latest status of a database is kept in between two flushes.
+    The writes are done right on the loop with `AsyncEtcd3Client`s, no thread is held while etcd responds.
+
+    If `db_health_publish_only_on_change` is enabled, the status key is attached to a per-database lease.
+    The key is only re-written when any health field (except the ones which change on every probe) changes,
+    otherwise only the lease is kept alive. If the database stops responding, the lease
+    is not refreshed anymore and etcd deletes the key, which is the death signal for the peers.
+    """
+
+    def __init__(self):
+        self.config = ServerConfig()
+        # (etcd_username, etcd_password) -> { status key -> serialized DBHealthStatus, None for lease refresh only }
+        self.pending: dict[tuple[str, str], dict[str, bytes | None]] = {}
+        self.clients: dict[tuple[str, str], AsyncEtcd3Client] = {}
+
+        # Only used in publish on change mode
+        self.leases: dict[str, int] = {} # status key -> lease id
+        self.last_published: dict[str, bytes] = {} # status key -> status without the fields changing on every probe
+        self.last_refreshed_at: dict[str, float] = {} # status key -> last time lease was kept alive
+
+    def submit(self, db_record:MySQL, health_info:DBHealthStatus):
+        cred = (db_record.model.etcd_username, db_record.model.etcd_password)
+        key = db_record.kv_cluster_node_status_key
+        if not self.config.db_health_publish_only_on_change:
+            self.pending.setdefault(cred, {})[key] = health_info.SerializeToString()
+            return
+
+        health_info.liveness_via_lease = True
+        fingerprint = self._fingerprint(health_info)
+        if self.last_published.get(key) != fingerprint:
+            self.last_published[key] = fingerprint
+            self.last_refreshed_at[key] = time.time()
+            self.pending.setdefault(cred, {})[key] = health_info.SerializeToString()
+            return
+
+        # Nothing changed, only keep the lease alive
+        if time.time() - self.last_refreshed_at.get(key, 0) >= self.config.db_health_status_lease_ttl_seconds / 3:
+            self.last_refreshed_at[key] = time.time()
+            self.pending.setdefault(cred, {}).setdefault(key, None)
+
+    async def flush(self):
+        if not self.pending:
+            return
+
+        pending, self.pending = self.pending, {}
+        results = await asyncio.gather(
+            *[self._write(cred, statuses) for cred, statuses in pending.items()],
+            return_exceptions=True,
+        )
+        for (cred, statuses), result in zip(pending.items(), results):
+            if isinstance(result, Exception):
+                print(f"Failed to publish health status with etcd user {cred[0]}: {result}")
+                # Force re-publish of these statuses on next health check
+                for key in statuses:
+                    self._forget(key)
+
+    async def _write(self, cred:tuple[str, str], statuses:dict[str, bytes | None]):
+        client = None
+        try:
+            client = await self._get_client(cred)
+            puts = []
+            for key, value in statuses.items():
+                if value is None:
+                    await self._refresh_lease(client, key)
+                    continue
+
+                lease = None
+                if self.config.db_health_publish_only_on_change:
+                    if key not in self.leases:
+                        self.leases[key] = (await client.lease(self.config.db_health_status_lease_ttl_seconds)).id
+                    lease = self.leases[key]
+                puts.append(client.transactions.put(key, value, lease=lease))
+
+            # etcd rejects transactions with more than `--max-txn-ops` operations
+            chunk_size = self.config.db_healthcheck_max_txn_ops
+            for i in range(0, len(puts), chunk_size):
+                await client.transaction(compare=[], success=puts[i:i + chunk_size], failure=[])
+        except Exception:
+            # Drop the client, credentials might have been rotated
+            if client and self.clients.get(cred) is client:
+                del self.clients[cred]
+                await client.close()
+            raise
+
+    async def _refresh_lease(self, client:AsyncEtcd3Client, key:str):
+        lease_id = self.leases.get(key)
+        if lease_id is None:
+            self._forget(key)
+            return
+
+        response = await client.refresh_lease(lease_id)
+        if response is None or response.TTL <= 0:
+            # Lease has already expired and the key is gone, re-publish it with a new lease
+            self._forget(key)
+
+    def _forget(self, key:str):
+        self.leases.pop(key, None)
+        self.last_published.pop(key, None)
+        self.last_refreshed_at.pop(key, None)
+
+    @staticmethod
+    def _fingerprint(health_info:DBHealthStatus) -> bytes:
+        status = DBHealthStatus()
+        status.CopyFrom(health_info)
+        # These change on every probe, don't publish only because of them
+        status.ClearField("reported_at")
+        status.ClearField("uptime_seconds")
+        status.ClearField("threads_running")
+        status.ClearField("report_interval_ms")
+        return status.SerializeToString(deterministic=True)
+
+    async def _get_client(self, cred:tuple[str, str]) -> AsyncEtcd3Client:
+        if cred not in self.clients:
+            username, password = cred
+            client = await AsyncEtcd3Client.connect(
+                addresses=self.config.etcd_addresses,
+                user=username or None,
+                password=password or None,
+                timeout=5,
+            )
+            # Flushes don't overlap, but be safe against a concurrent connect of the same credential
+            existing = self.clients.setdefault(cred, client)
+            if existing is not client:
+                await client.close()
+        return self.clients[cred]
+
+    async def run(self):
+        while True:
+            start = time.time()
+            try:
+                await self.flush()
+            except Exception as e:
+                print("Failed to flush health status:", e)
+                traceback.print_exc()
+            elapsed_ms = int((time.time() - start) * 1000)
+            await asyncio.sleep(max(0, self.config.db_healthcheck_flush_window_ms - elapsed_ms) / 1000)
@@ -0,0 +1,81 @@
+import math
+from collections import deque
+from statistics import NormalDist
+
+
+class PhiAccrualEstimator:
+    """
+    Phi accrual failure detection for a single node
+    Ref - Hayashibara et al., The φ Accrual Failure Detector (2004)
+
+    Keeps the last `window_size` inter-arrival intervals of the health status reports,
+    calculated from `reported_at` of the node, so delays in etcd / watch delivery don't add noise.
+
+    phi = -log10(P(next report arrives later than `elapsed`)), assuming intervals are normally distributed
+    around `mean + acceptable_pause_ms`.
+    A phi of 8 means the chance of the node being alive and still not reporting is 1 in 10^8.
+    """
+
+    def __init__(self, window_size:int=100, min_std_deviation_ms:float=50, acceptable_pause_ms:float=0, min_samples:int=5):
+        self.intervals: deque[float] = deque(maxlen=window_size)
+        self.min_std_deviation_ms = min_std_deviation_ms
+        # Rare pauses (GC, etcd leader change) don't show up in a normal distribution, so they are added on top of the mean
+        self.acceptable_pause_ms = acceptable_pause_ms
+        self.min_samples = min_samples
+        self.last_reported_at:int = 0
+        self._sum = 0.0
+        self._squared_sum = 0.0
+
+    def add(self, reported_at:int):
+        """
+        :param reported_at: report timestamp of the node in milliseconds
+        """
+        if reported_at <= self.last_reported_at:
+            # Duplicate or out of order report
+            return
+        if self.last_reported_at:
+            interval = reported_at - self.last_reported_at
+            if len(self.intervals) == self.intervals.maxlen:
+                oldest = self.intervals[0]
+                self._sum -= oldest
+                self._squared_sum -= oldest * oldest
+            self.intervals.append(interval)
+            self._sum += interval
+            self._squared_sum += interval * interval
+        self.last_reported_at = reported_at
+
+    @property
+    def has_enough_samples(self) -> bool:
+        return len(self.intervals) >= self.min_samples
+
+    @property
+    def mean_ms(self) -> float:
+        return self._sum / len(self.intervals)
+
+    @property
+    def std_deviation_ms(self) -> float:
+        mean = self.mean_ms
+        variance = max(0.0, self._squared_sum / len(self.intervals) - mean * mean)
+        return max(math.sqrt(variance), self.min_std_deviation_ms)
+
+    def phi(self, elapsed_ms:float) -> float:
+        if not self.has_enough_samples:
+            return 0.0
+        p_later = 1 - self._distribution().cdf(elapsed_ms)
+        if p_later <= 0:
+            return math.inf
+        return -math.log10(p_later)
+
+    def timeout_ms(self, threshold:float) -> float|None:
+        """
+        Time since the last report after which phi crosses the `threshold`.
+        Returns None till enough samples are collected.
+        """
+        if not self.has_enough_samples:
+            return None
+        # Beyond ~15, 1 - 10^-threshold isn't representable as float anymore
+        threshold = min(threshold, 15)
+        return self._distribution().inv_cdf(1 - 10 ** -threshold)
+
+    def _distribution(self) -> NormalDist:
+        return NormalDist(self.mean_ms + self.acceptable_pause_ms, self.std_deviation_ms)
@@ -0,0 +1,162 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import grpc
+
+from generated.inter_agent_pb2 import CheckDatabaseReachabilityRequest
+from agent import ServerConfig
+from agent.internal.agent_pool import get_cluster_agent
+from agent.internal.config import ClusterConfig
+
+_executor: ThreadPoolExecutor|None = None
+_executor_lock = threading.Lock()
+
+
+def get_probe_executor() -> ThreadPoolExecutor:
+    """
+    Shared by all the probes, calls are bounded by their deadline so a hung peer only holds a worker till then.
+    Created on first use, so `quorum_probe_max_workers` set after import is respected.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=ServerConfig().quorum_probe_max_workers, thread_name_prefix="quorum-probe"
+            )
+        return _executor
+
+
+class QuorumProbeResult:
+    def __init__(self, node_id:str, voters:int, required_votes:float):
+        self.node_id = node_id
+        self.voters = voters
+        self.required_votes = required_votes
+        self.reachable_votes = 0
+        self.unreachable_votes = 0
+        self.failed_votes = 0 # errors and timeouts, counted as unreachable
+        self.peer_elapsed_ms: dict[str, float] = {}
+        self.elapsed_ms = 0.0
+
+    @property
+    def pending_votes(self) -> int:
+        return self.voters - self.reachable_votes - self.unreachable_votes - self.failed_votes
+
+    @property
+    def decided(self) -> bool:
+        return self.reachable_votes >= self.required_votes or \
+            self.reachable_votes + self.pending_votes < self.required_votes
+
+    @property
+    def reachable(self) -> bool:
+        return self.reachable_votes >= self.required_votes
+
+    def __repr__(self):
+        return (
+            f"QuorumProbeResult(node={self.node_id}, reachable={self.reachable}, "
+            f"votes={self.reachable_votes}/{self.voters} (required {self.required_votes:g}), "
+            f"unreachable={self.unreachable_votes}, failed={self.failed_votes}, pending={self.pending_votes}, "
+            f"elapsed={self.elapsed_ms:.0f}ms)"
+        )
+
+
+def check_reachability_via_agent(
+    cluster_config:ClusterConfig, host:str, agent_port:int, node_id:str, timeout_ms:int|None=None
+) -> bool:
+    """
+    Asks the agent at `host`:`agent_port` whether it can reach the database of `node_id`.
+    Raises `grpc.RpcError` with `DEADLINE_EXCEEDED` if the agent doesn't answer within the timeout.
+    """
+    timeout_ms = timeout_ms or ServerConfig().reachability_check_timeout_ms
+    agent = get_cluster_agent(host, agent_port, cluster_config.shared_token, cluster_config.cluster_id)
+    response = agent.inter_agent_service.CheckDatabaseReachability(
+        CheckDatabaseReachabilityRequest(cluster_id=cluster_config.cluster_id, node_id=node_id),
+        timeout=timeout_ms / 1000,
+    )
+    return response.reachable
+
+
+def check_reachability_via_proxy(cluster_config:ClusterConfig, node_id:str, timeout_ms:int|None=None) -> bool:
+    proxy = cluster_config.proxy
+    return check_reachability_via_agent(cluster_config, proxy.ip, proxy.agent_port, node_id, timeout_ms)
+
+
+def probe_quorum(
+    cluster_config:ClusterConfig,
+    node_id:str,
+    peer_node_ids:list[str],
+    required_ratio:float=0.6,
+    timeout_ms:int|None=None,
+) -> QuorumProbeResult:
+    """
+    Asks all the peers concurrently whether they can reach `node_id`.
+
+    Returns as soon as the outcome is settled -
+    - enough peers reached the node, or
+    - even if all the pending peers reach it, it won't be enough
+
+    Every call has its own deadline, so the whole probe takes at most `timeout_ms`.
+    """
+    timeout_ms = timeout_ms or ServerConfig().reachability_check_timeout_ms
+    result = QuorumProbeResult(node_id, voters=len(peer_node_ids), required_votes=len(peer_node_ids) * required_ratio)
+    start = time.monotonic()
+
+    def check(peer_node_id:str) -> bool:
+        peer = cluster_config.get_node(peer_node_id)
+        try:
+            return check_reachability_via_agent(cluster_config, peer.ip, peer.agent_port, node_id, timeout_ms)
+        finally:
+            result.peer_elapsed_ms[peer_node_id] = (time.monotonic() - start) * 1000
+
+    executor = get_probe_executor()
+    futures: dict[Future, str] = {executor.submit(check, peer_node_id): peer_node_id for peer_node_id in peer_node_ids}
+    pending = set(futures)
+    # Small grace over the rpc deadline, for the time spent in queue of the executor
+    deadline = start + timeout_ms / 1000 + 0.5
+    while pending and not result.decided:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            try:
+                if future.result():
+                    result.reachable_votes += 1
+                else:
+                    result.unreachable_votes += 1
+            except grpc.RpcError as e:
+                result.failed_votes += 1
+                print(f"Reachability check of {node_id} via {futures[future]} failed: {e.code()}")
+            except Exception as e:
+                result.failed_votes += 1
+                print(f"Reachability check of {node_id} via {futures[future]} failed: {e}")
+
+    if not result.decided:
+        # Votes still pending past the deadline can't be counted on
+        result.failed_votes += result.pending_votes
+    result.elapsed_ms = (time.monotonic() - start) * 1000
+    return result
+
+
+def find_first_reachable_via_proxy(
+    cluster_config:ClusterConfig, node_ids:list[str], timeout_ms:int|None=None
+) -> str|None:
+    """
+    Asks the proxy about all the nodes concurrently and
+    returns the first node of `node_ids` (in the given order) which is reachable.
+
+    So picking the n-th node costs a single round trip, not n.
+    Failed and timed out checks are counted as unreachable.
+    """
+    timeout_ms = timeout_ms or ServerConfig().reachability_check_timeout_ms
+    deadline = time.monotonic() + timeout_ms / 1000 + 0.5
+    executor = get_probe_executor()
+    futures = [executor.submit(check_reachability_via_proxy, cluster_config, node_id, timeout_ms) for node_id in node_ids]
+    for node_id, future in zip(node_ids, futures):
+        try:
+            if future.result(timeout=max(0.0, deadline - time.monotonic())):
+                return node_id
+        except grpc.RpcError as e:
+            print(f"Reachability check of {node_id} via proxy failed: {e.code()}")
+        except Exception as e:
+            print(f"Reachability check of {node_id} via proxy failed: {e!r}")
+    return None
@@ -2,24 +2,21 @@ import asyncio
 import contextlib
 import datetime
 import random
-import threading
-import time
 import traceback
 
 from agent import ServerConfig
 from agent.domain.mysql import MySQL
 from agent.domain.proxy import Proxy
-from agent.helpers import (
-    KVEvent,
-    get_working_etcd_cred_of_cluster,
-    is_cluster_in_use,
-    parse_etcd_watch_event,
-)
-from agent.internal.etcd_client import Etcd3Client
+from agent.helpers import KVEvent, is_cluster_in_use
+from agent.internal.config import ClusterConfig, ClusterConfigCache
 from agent.internal.scheduler import RQScheduler
 from agent.internal.utils import get_redis_client
+from agent.monitor.config_reconciler import ConfigReconciler
 from agent.monitor.dead_node_detector import DeadNodeDetector
 from agent.monitor.election import NodeElection
+from agent.monitor.successor_ranking import SuccessorRanking
+from agent.monitor.watch_multiplexer import EtcdWatchMultiplexer
+from generated.extras_pb2 import DBHealthStatus
 
 
 class EtcdStateMonitor:
@@ -35,95 +32,85 @@ class EtcdStateMonitor:
         self.config = ServerConfig()
         self.redis = get_redis_client(async_client=True)
         self.sync_cluster_ids_lock = asyncio.Lock()
-        self.stop_events: dict[str, threading.Event] = {}
-        self.watch_threads: dict[str, threading.Thread] = {}
         self.dead_node_detector:DeadNodeDetector = DeadNodeDetector(timeout_seconds=3)
         self.node_election:NodeElection = NodeElection()
+        self.successor_ranking:SuccessorRanking = SuccessorRanking()
+        self.cluster_config_cache = ClusterConfigCache()
+        self.config_reconciler = ConfigReconciler(reconcile=self.reconcile_config)
+        self.watch_multiplexer = EtcdWatchMultiplexer(on_event=self.act_on_kv_event, on_status=self.act_on_status)
 
     def act_on_kv_event(self, cluster_id:str, event:KVEvent):
         try:
+            # Keep the process wide config cache fresh, every event proves the cached config is still the latest
+            if event.event_type == "config" and event.action == "update" and event.data:
+                self.cluster_config_cache.update(cluster_id, event.data)
+            elif event.event_type == "config" and event.action == "delete":
+                self.cluster_config_cache.invalidate(cluster_id)
+            else:
+                self.cluster_config_cache.confirm(cluster_id, event.revision)
+
             # 1: Auto sync backend servers for all proxies
             if event.action == "update" and event.event_type == "config" and event.data:
-                Proxy.sync_backend_servers_for_all_proxies(cluster_id=cluster_id, config=event.data)
-                MySQL.sync_replication_config_for_all_servers(cluster_id=cluster_id, config=event.data)
-                self.node_election.elect_new_master_if_required(cluster_id=cluster_id, config=event.data)
+                self.successor_ranking.update_config(cluster_id, event.data)
+                # Slow part, happens off the watch so status events don't wait for it
+                self.config_reconciler.submit(cluster_id, event.data, event.revision)
+                self.dead_node_detector.set_phi_threshold(
+                    cluster_id,
+                    event.data.dead_node_phi_threshold if event.data.HasField("dead_node_phi_threshold") else None
+                )
             # 2: Track health status of nodes
+            # Normally these come through `act_on_status` straight from the watch
             if event.action == "update" and event.event_type == "status" and event.data:
-                self.dead_node_detector.update(event.node_id, event.data)
+                self.act_on_status(cluster_id, event.node_id, event.data, event.revision)
+            if event.action == "delete" and event.event_type == "status":
+                self.act_on_status(cluster_id, event.node_id, None, event.revision)
         except:
             print(f"Error while acting on config change for cluster {cluster_id}: {event}")
             traceback.print_exc()
 
-    def monitor_cluster_state(self, cluster_id:str):
-
+    def act_on_status(self, cluster_id:str, node_id:str, status:DBHealthStatus|None, revision:int):
         """
-        Multiple service can be part of a single cluster
-        Rather than monitoring for each service, spawn a single listener for the cluster
-
-        Now, we can have multiple credentials due to multiple services in a cluster
-        All the credentials will be valid most of the time, but during removing db from current agent,
-        that credential will be deactivated.
-
-        In that case, we should fetch latest credentials and try them one by one.
+        Hot path, called for every status write of every node, right from the etcd watch callback on the loop.
+        Keep it cheap and non-blocking, anything slow here delays the status events of all the clusters.
+        `status` is None if the status key got deleted (lease expired).
         """
-        stop_event = self.stop_events[cluster_id]
-
-        username = None
-        password = None
-
-        while not stop_event.is_set():
-            try:
-                if not username or not password:
-                    username, password = get_working_etcd_cred_of_cluster(cluster_id)
-
-                with Etcd3Client(
-                    addresses=[f"{self.config.etcd_host}:{self.config.etcd_port}"],
-                    user=username,
-                    password=password,
-                    timeout=10,
-                ) as client:
-                    events_iterator, cancel = client.watch_prefix(
-                        self.config.kv_cluster_prefix.format(cluster_id=cluster_id)
-                    )
-                    for event in events_iterator:
-                        if stop_event.is_set():
-                            cancel()
-                            break
-
-                        parsed_event = parse_etcd_watch_event(event)
-                        if not parsed_event:
-                            continue
-                        # Blocking call
-                        self.act_on_kv_event(cluster_id, parsed_event)
-            except Exception as e:
-                print(f"[{cluster_id}] watch error: {e}")
-                username = None
-                password = None
-                time.sleep(5)
-
-
-    def add_cluster_to_monitoring(self, cluster_id:str):
-        if cluster_id in self.watch_threads:
+        # Config events are handled on the pool, a newer config than the cached one might be still on its way.
+        # Then the cached one isn't the latest as of this status
+        if self.watch_multiplexer.config_handled(cluster_id):
+            self.cluster_config_cache.confirm(cluster_id, revision)
+        if status is None:
+            self.dead_node_detector.mark_status_expired(node_id)
+            self.successor_ranking.remove_status(cluster_id, node_id)
             return
+        self.dead_node_detector.update(node_id, status, cluster_id=cluster_id)
+        self.successor_ranking.update_status(cluster_id, node_id, status)
+
+    def reconcile_config(self, cluster_id:str, config:ClusterConfig):
+        Proxy.sync_backend_servers_for_all_proxies(cluster_id=cluster_id, config=config)
+        MySQL.sync_replication_config_for_all_servers(cluster_id=cluster_id, config=config)
+        self.node_election.elect_new_master_if_required(
+            cluster_id=cluster_id,
+            config=config,
+            ranked_node_ids=self.successor_ranking.successors(cluster_id),
+            master_gtid=self.successor_ranking.master_gtid(cluster_id),
+        )
 
-        event = threading.Event()
-        self.stop_events[cluster_id] = event
-
-        thread = threading.Thread(target=self.monitor_cluster_state, args=(cluster_id,), daemon=True)
-        self.watch_threads[cluster_id] = thread
-        thread.start()
+    async def add_cluster_to_monitoring(self, cluster_id:str):
+        """
+        Multiple service can be part of a single cluster
+        Rather than monitoring for each service, a single watch is kept for the cluster
+        And the watches of all the clusters share a single stream per etcd credential set (see `EtcdWatchMultiplexer`)
+        """
+        await self.watch_multiplexer.add(cluster_id)
 
-    def remove_cluster_from_monitoring(self, cluster_id:str):
+    async def remove_cluster_from_monitoring(self, cluster_id:str):
         if is_cluster_in_use(cluster_id):
             return
 
-        event = self.stop_events.pop(cluster_id, None)
-        thread = self.watch_threads.pop(cluster_id, None)
-
-        if event:
-            event.set()
-        if thread:
-            thread.join(timeout=5)
+        await self.watch_multiplexer.remove(cluster_id)
+        self.config_reconciler.remove(cluster_id)
+        self.successor_ranking.remove_cluster(cluster_id)
+        self.cluster_config_cache.invalidate(cluster_id)
 
     async def process_requested_changes_in_monitoring(self):
         while True:
@@ -144,10 +131,10 @@ class EtcdStateMonitor:
                             cluster_id = cmd_parts[1]
 
                             if cmd == "remove":
-                                self.remove_cluster_from_monitoring(cluster_id)
+                                await self.remove_cluster_from_monitoring(cluster_id)
 
                             elif cmd == "add":
-                                self.add_cluster_to_monitoring(cluster_id)
+                                await self.add_cluster_to_monitoring(cluster_id)
                     except Exception as e:
                         print("Command handling error:", e)
                         traceback.print_exc()
@@ -161,7 +148,7 @@ class EtcdStateMonitor:
             try:
                 async with self.sync_cluster_ids_lock:
                     cluster_ids = set(MySQL.get_all_cluster_ids())
-                    current_monitoring = set(self.watch_threads.keys())
+                    current_monitoring = self.watch_multiplexer.cluster_ids
 
                     to_add = cluster_ids - current_monitoring
                     to_remove = current_monitoring - cluster_ids
@@ -0,0 +1,166 @@
+import bisect
+import threading
+
+from generated.extras_pb2 import DBHealthStatus
+from agent.internal.config import ClusterConfig
+from agent.libs.gtid import GTIDSet
+from agent.monitor.election import is_lagging, replication_lag
+
+
+class ClusterSuccessors:
+    """
+    Replicas of a single cluster, kept sorted by how eligible they are to become the next master.
+
+    Same order as the election uses -
+    higher weight first, then most advanced gtid, then less lagging (unknown lag last).
+    Replicas with the SQL thread stopped aren't ranked at all.
+
+    The status of the master is on its lease, so etcd deletes it once the master dies.
+    Its last gtid is kept then, the election needs it to tell which replicas have caught up.
+    """
+
+    def __init__(self, cluster_id:str):
+        self.cluster_id = cluster_id
+        self.config: ClusterConfig|None = None
+        self.statuses: dict[str, DBHealthStatus] = {}
+        self.gtids: dict[str, GTIDSet] = {}
+        self.ranked: list[tuple] = [] # sorted (-weight, -gtid total, replication lag, node_id)
+        self.rank_keys: dict[str, tuple] = {} # node_id -> its entry in `ranked`
+        self.replica_weights: dict[str, int] = {} # online replicas of the config, looked up on every status
+        # Last gtid reported by the master before its status expired (node_id, gtid), its lease dies with it
+        self.expired_master_gtid: tuple[str, str]|None = None
+
+    @property
+    def master_node_id(self) -> str|None:
+        if not self.config:
+            return None
+        master_node_ids = self.config.online_master_node_ids or self.config.offline_master_node_ids
+        return master_node_ids[0] if master_node_ids else None
+
+    def set_config(self, config:ClusterConfig):
+        # Roles, weights and lag limit can change, config updates are rare so just rebuild
+        self.config = config
+        self.replica_weights = {node_id: config.get_node(node_id).weight for node_id in config.online_replica_node_ids}
+        self.ranked = []
+        self.rank_keys = {}
+        for node_id in self.statuses:
+            self._rank(node_id)
+
+    def set_status(self, node_id:str, status:DBHealthStatus):
+        if self.expired_master_gtid and self.expired_master_gtid[0] == node_id:
+            self.expired_master_gtid = None
+        previous = self.statuses.get(node_id)
+        self.statuses[node_id] = status
+        # Idle clusters report the same gtid over and over, no need to parse it again
+        if previous is None or previous.global_transaction_id != status.global_transaction_id:
+            try:
+                self.gtids[node_id] = GTIDSet.parse(status.global_transaction_id)
+            except ValueError:
+                self.gtids.pop(node_id, None)
+        self._rank(node_id)
+
+    def remove_status(self, node_id:str):
+        if node_id == self.master_node_id and node_id in self.statuses:
+            # The replicas are compared against it at failover, which is exactly when it's gone
+            self.expired_master_gtid = (node_id, self.statuses[node_id].global_transaction_id)
+        self.statuses.pop(node_id, None)
+        self.gtids.pop(node_id, None)
+        self._unrank(node_id)
+
+    def _rank(self, node_id:str):
+        self._unrank(node_id)
+        if not self.config or node_id not in self.gtids:
+            return
+        if node_id not in self.replica_weights:
+            return
+        status = self.statuses[node_id]
+        if not status.slave_sql_running or is_lagging(status, self.config.max_replication_lag_ms):
+            return
+        key = (
+            -self.replica_weights[node_id],
+            -self.gtids[node_id].total,
+            replication_lag(status),
+            node_id,
+        )
+        bisect.insort(self.ranked, key)
+        self.rank_keys[node_id] = key
+
+    def _unrank(self, node_id:str):
+        key = self.rank_keys.pop(node_id, None)
+        if key is None:
+            return
+        index = bisect.bisect_left(self.ranked, key)
+        if index < len(self.ranked) and self.ranked[index] == key:
+            del self.ranked[index]
+
+    def master_gtid(self) -> str|None:
+        """Last gtid reported by the master, kept after its status expired"""
+        master_node_id = self.master_node_id
+        if master_node_id in self.statuses:
+            return self.statuses[master_node_id].global_transaction_id
+        if self.expired_master_gtid and self.expired_master_gtid[0] == master_node_id:
+            return self.expired_master_gtid[1]
+        return None
+
+    def successors(self) -> list[str]:
+        """
+        Ranked replicas which have applied everything the master has reported so far.
+        Empty if the last position of the master is not known, as then no replica can be trusted.
+        """
+        master_gtid = self.master_gtid()
+        try:
+            master_gtid = GTIDSet.parse(master_gtid) if master_gtid is not None else None
+        except ValueError:
+            master_gtid = None
+        if master_gtid is None:
+            return []
+        return [key[-1] for key in self.ranked if self.gtids[key[-1]].dominates(master_gtid)]
+
+
+class SuccessorRanking:
+    """
+    Keeps the ranking of the next master of every monitored cluster up to date,
+    fed by the config and status events of the etcd watch.
+
+    Every status update moves only that node in the ranking,
+    so at failover time the election can start from the top candidate straight away,
+    instead of reading and sorting the statuses of the whole cluster.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clusters: dict[str, ClusterSuccessors] = {}
+
+    def _cluster(self, cluster_id:str) -> ClusterSuccessors:
+        if cluster_id not in self.clusters:
+            self.clusters[cluster_id] = ClusterSuccessors(cluster_id)
+        return self.clusters[cluster_id]
+
+    def update_config(self, cluster_id:str, config:ClusterConfig):
+        with self.lock:
+            self._cluster(cluster_id).set_config(config)
+
+    def update_status(self, cluster_id:str, node_id:str, status:DBHealthStatus):
+        with self.lock:
+            self._cluster(cluster_id).set_status(node_id, status)
+
+    def remove_status(self, cluster_id:str, node_id:str):
+        with self.lock:
+            if cluster_id in self.clusters:
+                self.clusters[cluster_id].remove_status(node_id)
+
+    def remove_cluster(self, cluster_id:str):
+        with self.lock:
+            self.clusters.pop(cluster_id, None)
+
+    def successors(self, cluster_id:str) -> list[str]:
+        with self.lock:
+            if cluster_id not in self.clusters:
+                return []
+            return self.clusters[cluster_id].successors()
+
+    def master_gtid(self, cluster_id:str) -> str|None:
+        with self.lock:
+            if cluster_id not in self.clusters:
+                return None
+            return self.clusters[cluster_id].master_gtid()
@@ -0,0 +1,351 @@
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Literal
+
+from etcd3.exceptions import RevisionCompactedError
+
+from agent import ServerConfig
+from agent.helpers import (
+    KVEvent,
+    get_working_etcd_cred_of_cluster,
+    invalidate_working_etcd_cred_of_cluster,
+    parse_etcd_kv,
+    parse_etcd_watch_event,
+)
+from agent.internal.async_etcd_client import AsyncEtcd3Client, WatchCanceledError
+from agent.internal.etcd_pool import is_etcd_auth_error
+from generated.extras_pb2 import DBHealthStatus
+
+WatchKind = Literal["config", "nodes"]
+
+
+def is_watch_auth_error(e:Exception) -> bool:
+    """The credential is rejected, by the calls or by etcd refusing a watch of it"""
+    return is_etcd_auth_error(e) or (isinstance(e, WatchCanceledError) and e.auth_rejected)
+
+
+class ClusterWatch:
+    def __init__(self, cluster_id:str, credential:tuple[str, str]):
+        self.cluster_id = cluster_id
+        self.credential = credential
+        self.client: AsyncEtcd3Client|None = None # the watches are on
+        self.watch_ids: list[int] = []
+        self.queue: asyncio.Queue = asyncio.Queue() # (watch kind, job), a job returns the revision it handled
+        self.read_revision: int|None = None # of the range read it started with, if it did
+        self.unhandled_config_events = 0 # queued or being handled, only touched on the loop
+        self.consumer: asyncio.Task|None = None
+
+
+class EtcdWatchMultiplexer:
+    """
+    Watches the keys of many clusters over a single etcd client (so a single watch stream) per credential set.
+
+    The clients are `AsyncEtcd3Client`s, the streams are read and the watch callbacks run right on the asyncio loop.
+
+    Every cluster has two watches on the stream, one for its config key and one for its nodes prefix.
+    - Config events (rare, slow to act on) are queued, and a per-cluster task runs `on_event` on a fixed size
+      thread pool, one event at a time, so the events of a cluster are handled in order.
+    - Node status events (every node, every health check) take the fast path if `on_status` is given -
+      `on_status(cluster_id, node_id, status, revision)` is called right in the watch callback,
+      no `KVEvent`, no hop to the pool. `status` is None if the key got deleted.
+      So `on_status` must be cheap and must not block the loop, and thread safe as the pool shares the state.
+      Without it, they're handled like config events.
+    No matter how many clusters are watched, the thread count stays the same - `etcd_watch_dispatch_workers`.
+
+    The revision of the last handled event of every watch is remembered.
+    - A new watch starts with a range read of the cluster prefix, its keys are handled as update events,
+      then the watches continue right after the revision of the read.
+    - If a watch stream breaks, the clusters on it are re-watched from their next revision, so nothing is missed.
+      If etcd has already compacted that revision, it starts afresh with a range read.
+      If etcd cancels a single watch, only that cluster is re-watched, the rest stay on the stream.
+    """
+
+    def __init__(
+        self,
+        on_event:Callable[[str, KVEvent], None],
+        on_status:Callable[[str, str, DBHealthStatus|None, int], None]|None=None,
+    ):
+        self.config = ServerConfig()
+        self.on_event = on_event
+        self.on_status = on_status
+        self.clients: dict[tuple[str, str], AsyncEtcd3Client] = {}
+        self.watches: dict[str, ClusterWatch] = {}
+        # (cluster_id, watch kind) -> revision of the last handled event
+        self.revisions: dict[tuple[str, WatchKind], int] = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.etcd_watch_dispatch_workers,
+            thread_name_prefix="etcd-watch-dispatch",
+        )
+        self.loop: asyncio.AbstractEventLoop|None = None
+        self.rewatching: dict[str, ClusterWatch] = {} # cluster_id -> the broken watch being replaced
+        # Adding / removing the watch of a cluster awaits in between, one at a time per cluster
+        self.cluster_locks: dict[str, asyncio.Lock] = {}
+        self.background_tasks: set[asyncio.Task] = set() # the loop only keeps weak references to the tasks
+
+    @property
+    def cluster_ids(self) -> set[str]:
+        return set(self.watches.keys()) | set(self.rewatching.keys())
+
+    def _cluster_lock(self, cluster_id:str) -> asyncio.Lock:
+        return self.cluster_locks.setdefault(cluster_id, asyncio.Lock())
+
+    async def add(self, cluster_id:str, credential:tuple[str, str]|None=None):
+        async with self._cluster_lock(cluster_id):
+            await self._add(cluster_id, credential)
+
+    async def _add(self, cluster_id:str, credential:tuple[str, str]|None):
+        if cluster_id in self.watches:
+            return
+        self.loop = asyncio.get_running_loop()
+
+        if credential is None:
+            credential = await self.loop.run_in_executor(self.executor, get_working_etcd_cred_of_cluster, cluster_id)
+        client = await self._get_client(credential)
+
+        watch = ClusterWatch(cluster_id, credential)
+        watch.client = client
+        self.watches[cluster_id] = watch
+        watch.consumer = asyncio.create_task(self._consume(watch), name=f"etcd-watch-{cluster_id}")
+        config_key = self.config.kv_cluster_config_key.format(cluster_id=cluster_id)
+        nodes_prefix = self.config.kv_cluster_nodes_prefix.format(cluster_id=cluster_id)
+
+        try:
+            config_revision = self.revisions.get((cluster_id, "config"))
+            nodes_revision = self.revisions.get((cluster_id, "nodes"))
+            if config_revision is None or nodes_revision is None:
+                config_revision = nodes_revision = await self._start_from_read(watch, client)
+
+            watch.watch_ids.append(await client.add_watch_callback(
+                config_key,
+                lambda response: self._dispatch(watch, "config", response),
+                start_revision=config_revision + 1,
+            ))
+            watch.watch_ids.append(await client.add_watch_prefix_callback(
+                nodes_prefix,
+                lambda response: self._on_nodes_response(watch, len(nodes_prefix), response),
+                start_revision=nodes_revision + 1,
+            ))
+        except Exception as e:
+            self.watches.pop(cluster_id, None)
+            watch.consumer.cancel()
+            # The created watch is of no use without the other one
+            for watch_id in watch.watch_ids:
+                await client.cancel_watch(watch_id)
+            if is_watch_auth_error(e) and self.clients.get(credential) is client:
+                # The next add gets a new client (and token), the clusters still on this one keep it
+                del self.clients[credential]
+                if not any(w.client is client for w in self.watches.values()):
+                    await client.close()
+            raise
+
+    async def remove(self, cluster_id:str):
+        self.rewatching.pop(cluster_id, None)
+        await self._unwatch(cluster_id)
+        self.revisions.pop((cluster_id, "config"), None)
+        self.revisions.pop((cluster_id, "nodes"), None)
+
+    async def _unwatch(self, cluster_id:str):
+        async with self._cluster_lock(cluster_id):
+            await self._unwatch_locked(cluster_id)
+
+    async def _unwatch_locked(self, cluster_id:str):
+        watch = self.watches.pop(cluster_id, None)
+        if not watch:
+            return
+        if watch.consumer:
+            watch.consumer.cancel()
+
+        client = watch.client
+        if not client:
+            return
+        for watch_id in watch.watch_ids:
+            await client.cancel_watch(watch_id)
+        if not any(w.client is client for w in self.watches.values()):
+            # Last cluster using this client
+            if self.clients.get(watch.credential) is client:
+                del self.clients[watch.credential]
+            await client.close()
+
+    async def _get_client(self, credential:tuple[str, str]) -> AsyncEtcd3Client:
+        client = self.clients.get(credential)
+        if client:
+            return client
+        new_client = await self._create_client(credential)
+        # Some other cluster might have created it in the meantime
+        client = self.clients.setdefault(credential, new_client)
+        if client is not new_client:
+            await new_client.close()
+        return client
+
+    async def _create_client(self, credential:tuple[str, str]) -> AsyncEtcd3Client:
+        username, password = credential
+        return await AsyncEtcd3Client.connect(
+            addresses=self.config.etcd_addresses,
+            user=username or None,
+            password=password or None,
+            timeout=10,
+        )
+
+    async def _start_from_read(self, watch:ClusterWatch, client:AsyncEtcd3Client) -> int:
+        """Queues the keys of a range read of the cluster as update events, returns the revision of the read"""
+        cluster_id = watch.cluster_id
+        revision, kvs = await self._read_cluster(client, cluster_id)
+        for kv in kvs:
+            self._queue(watch, "config", lambda kv=kv: self._handle(
+                cluster_id, parse_etcd_kv(kv.key, kv.value, "update", kv.mod_revision, kv.version)
+            ))
+        # Only once all the keys are handled, if the watch breaks before that, it has to be read again
+        # (status keys are already handled if they took the fast path)
+        watch.read_revision = revision
+        self._queue(watch, None, None)
+        return revision
+
+    async def _read_cluster(self, client:AsyncEtcd3Client, cluster_id:str) -> tuple[int, list]:
+        """
+        Range read of the cluster prefix. The status keys go through the fast path right here,
+        returns the revision of the read and the rest of the keys.
+        """
+        # Trailing slash, else the read of cluster `c1` gets the keys of `c10` as well
+        response = await client.get_prefix_response(self.config.kv_cluster_prefix.format(cluster_id=cluster_id) + "/")
+        if not self.on_status:
+            return response.header.revision, response.kvs
+
+        nodes_prefix = self.config.kv_cluster_nodes_prefix.format(cluster_id=cluster_id).encode()
+        kvs = []
+        for kv in response.kvs:
+            if kv.key.startswith(nodes_prefix):
+                self._handle_status(cluster_id, len(nodes_prefix), kv.key, kv.value, kv.mod_revision)
+            else:
+                kvs.append(kv)
+        self.revisions.setdefault((cluster_id, "nodes"), response.header.revision)
+        return response.header.revision, kvs
+
+    def _on_nodes_response(self, watch:ClusterWatch, prefix_length:int, response):
+        if self.on_status is None or isinstance(response, Exception):
+            self._dispatch(watch, "nodes", response)
+            return
+        if self.watches.get(watch.cluster_id) is not watch:
+            return
+        for event in response.events:
+            self._handle_status(
+                watch.cluster_id,
+                prefix_length,
+                event.key,
+                event.value if event.__class__.__name__ == "PutEvent" else None,
+                event.mod_revision,
+            )
+
+    def _handle_status(self, cluster_id:str, prefix_length:int, key:bytes, value:bytes|None, revision:int):
+        # /clusters/{cluster_id}/nodes/{node_id}/status, the other keys of the nodes aren't acted upon
+        if key.endswith(b"/status"):
+            try:
+                status = DBHealthStatus.FromString(value) if value is not None else None
+                self.on_status(cluster_id, key[prefix_length:-7].decode(), status, revision)
+            except Exception:
+                print(f"[{cluster_id}] failed to handle status event of {key}")
+                traceback.print_exc()
+        if (cluster_id, "nodes") in self.revisions:
+            self.revisions[(cluster_id, "nodes")] = max(self.revisions[(cluster_id, "nodes")], revision)
+
+    def _dispatch(self, watch:ClusterWatch, kind:WatchKind, response):
+        if self.watches.get(watch.cluster_id) is not watch:
+            # Removed or re-watched in the meantime
+            return
+        if isinstance(response, Exception) and self.rewatching.get(watch.cluster_id) is watch:
+            # Both the watches of the cluster report the error, the first one re-watches
+            return
+        if isinstance(response, Exception):
+            # Removing the cluster from monitoring in the meantime stops the retries
+            self.rewatching[watch.cluster_id] = watch
+        if isinstance(response, RevisionCompactedError):
+            print(f"[{watch.cluster_id}] revision compacted till {response.compacted_revision}, reading afresh")
+            self.revisions.pop((watch.cluster_id, "config"), None)
+            self.revisions.pop((watch.cluster_id, "nodes"), None)
+            self._rewatch_in_background(watch, stream_broken=False)
+            return
+        if isinstance(response, WatchCanceledError):
+            # Only this watch is gone, the stream and the other clusters on it are fine
+            print(f"[{watch.cluster_id}] watch canceled by etcd: {response}")
+            self._rewatch_in_background(watch, stream_broken=False)
+            return
+        if isinstance(response, Exception):
+            print(f"[{watch.cluster_id}] watch error: {response}")
+            self._rewatch_in_background(watch, stream_broken=True)
+            return
+        for event in response.events:
+            self._queue(watch, kind, lambda event=event: self._handle(watch.cluster_id, parse_etcd_watch_event(event)))
+
+    def config_handled(self, cluster_id:str) -> bool:
+        """
+        Whether every config event the watch of the cluster has delivered is handled by `on_event`.
+        Not while it's being re-watched, events might be missing then.
+        """
+        watch = self.watches.get(cluster_id)
+        return watch is not None and watch.unhandled_config_events == 0
+
+    def _queue(self, watch:ClusterWatch, kind:WatchKind|None, job:Callable[[], int|None]|None):
+        if kind == "config":
+            watch.unhandled_config_events += 1
+        watch.queue.put_nowait((kind, job))
+
+    def _handle(self, cluster_id:str, event:KVEvent|None) -> int|None:
+        """On the pool, returns the revision of the handled event"""
+        if not event:
+            return None
+        self.on_event(cluster_id, event)
+        return event.revision
+
+    async def _consume(self, watch:ClusterWatch):
+        """
+        Runs the jobs of the cluster on the pool one by one.
+        The revisions are kept track of here on the loop, `remove` / `_dispatch` drop them on the loop as well.
+        """
+        cluster_id = watch.cluster_id
+        while True:
+            kind, job = await watch.queue.get()
+            if job is None:
+                # All the keys of the range read are handled, the watches continue from its revision
+                self.revisions.setdefault((cluster_id, "config"), watch.read_revision)
+                self.revisions.setdefault((cluster_id, "nodes"), watch.read_revision)
+                continue
+            revision = None
+            try:
+                revision = await self.loop.run_in_executor(self.executor, job)
+            except Exception:
+                print(f"[{cluster_id}] failed to handle watch event")
+                traceback.print_exc()
+            finally:
+                if kind == "config":
+                    watch.unhandled_config_events -= 1
+            if revision and (cluster_id, kind) in self.revisions:
+                self.revisions[(cluster_id, kind)] = max(self.revisions[(cluster_id, kind)], revision)
+
+    def _rewatch_in_background(self, watch:ClusterWatch, stream_broken:bool):
+        task = asyncio.create_task(self._rewatch(watch, stream_broken), name=f"etcd-rewatch-{watch.cluster_id}")
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def _rewatch(self, watch:ClusterWatch, stream_broken:bool):
+        if stream_broken and watch.client and self.clients.get(watch.credential) is watch.client:
+            # The stream is shared, so the client is of no use for the other clusters on it either.
+            # Closing it tells them too, so they re-watch on their own (the first one to get here closes it)
+            del self.clients[watch.credential]
+            await watch.client.close()
+
+        # Events queued but not handled yet are dropped here, the new watch delivers them again
+        await self._unwatch(watch.cluster_id)
+        # First try right away with the same credential, it's most likely a blip of the connection
+        credential = watch.credential
+        # The new watch can break too before this is done, then its own re-watch takes over
+        while self.rewatching.get(watch.cluster_id) is watch:
+            try:
+                await self.add(watch.cluster_id, credential)
+                if self.rewatching.get(watch.cluster_id) is watch:
+                    del self.rewatching[watch.cluster_id]
+            except Exception as e:
+                print(f"[{watch.cluster_id}] failed to re-watch: {e}")
+                if is_watch_auth_error(e):
+                    invalidate_working_etcd_cred_of_cluster(watch.cluster_id)
+                credential = None
+                await asyncio.sleep(5)
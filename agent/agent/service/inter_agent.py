@@ -19,6 +19,7 @@ from agent.helpers import (
     generate_random_string,
     get_db_client_from_cluster_config,
     get_working_etcd_cred_of_cluster,
+    invalidate_working_etcd_cred_of_cluster,
 )
 from agent.internal.config import ClusterConfig
 
@@ -113,17 +114,11 @@ class InterAgentService(InterAgentServiceServicer):
         return Empty()
 
     def CheckDatabaseReachability(self, request:CheckDatabaseReachabilityRequest, context) -> CheckDatabaseReachabilityResponse:
-        from agent.internal.etcd_client import Etcd3Client
+        from agent.internal.etcd_pool import get_etcd_client, is_etcd_auth_error
 
-        server_config = ServerConfig()
         try:
             username, password = get_working_etcd_cred_of_cluster(request.cluster_id)
-            config = ClusterConfig(etcd_client=Etcd3Client(
-                addresses=[f"{server_config.etcd_host}:{server_config.etcd_port}"],
-                user=username,
-                password=password,
-                timeout=2
-            ), cluster_id=request.cluster_id)
+            config = ClusterConfig(etcd_client=get_etcd_client(username, password), cluster_id=request.cluster_id)
 
             # Check if node_id exists in the cluster
             if request.node_id not in config.node_ids:
@@ -135,6 +130,8 @@ class InterAgentService(InterAgentServiceServicer):
             db_client = get_db_client_from_cluster_config(config, request.node_id, timeout=5)
             return CheckDatabaseReachabilityResponse(reachable=db_client.is_reachable())
         except Exception as e:
+            if is_etcd_auth_error(e):
+                invalidate_working_etcd_cred_of_cluster(request.cluster_id)
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Failed to check database reachability: {e!s}")
             return CheckDatabaseReachabilityResponse(reachable=False)
@@ -1,5 +1,7 @@
+import asyncio
 import contextlib
 import time
+from concurrent.futures import Executor
 
 import grpc
 from google.protobuf.empty_pb2 import Empty
@@ -73,3 +75,39 @@ class JobService(JobServiceServicer):
     def Acknowledge(self, request:JobIdRequest, context) -> Empty:
         acknowledge_job(request.id)
         return Empty()
+
+
+class AsyncJobService(JobService):
+    """
+    `JobService` of the asyncio server (`grpc_server_mode` "asyncio"), picked up in place of `JobService` there.
+    The job stream is served on the event loop, so the listeners don't hold on to the worker threads.
+    The rest of the methods are blocking and run on the workers.
+    """
+    def __init__(self, executor:Executor):
+        super().__init__()
+        self.executor = executor # worker pool of the server, for the blocking bits of `Listen`
+
+    async def Listen(self, request, context):
+        config = ServerConfig()
+        redis = get_redis_client(async_client=True)
+
+        # Fetch and yield all non-acknowledged jobs initially
+        loop = asyncio.get_running_loop()
+        for message in await loop.run_in_executor(self.executor, lambda: list(get_non_acknowledged_jobs())):
+            yield message
+
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(config.job_update_stream_redis_channel)
+
+        try:
+            while not context.done():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "message":
+                    with contextlib.suppress(DecodeError):
+                        response = JobResponse()
+                        response.ParseFromString(message["data"])
+                        yield response
+        finally:
+            await pubsub.unsubscribe(config.job_update_stream_redis_channel)
+            await pubsub.aclose()
+            await redis.aclose()
@@ -0,0 +1,29 @@
+from google.protobuf.empty_pb2 import Empty
+
+from generated.monitor_pb2 import DeadNodeHandlingEntry, DeadNodeHandlingStateResponse
+from generated.monitor_pb2_grpc import MonitorServiceServicer
+from agent import ServerConfig
+from agent.monitor.dead_node_scheduler import DeadNodeHandlingScheduler
+
+
+class MonitorService(MonitorServiceServicer):
+    def GetDeadNodeHandlingState(self, request:Empty, context) -> DeadNodeHandlingStateResponse:
+        entries = []
+        # Scheduler is only alive in the process running the monitors, don't start a new one here
+        scheduler = DeadNodeHandlingScheduler._instance
+        for state in scheduler.snapshot() if scheduler else []:
+            entry = DeadNodeHandlingEntry(
+                node_id=state.node_id,
+                attempts=state.attempts,
+                running=state.running,
+                next_attempt_at=int(state.next_attempt_at * 1000),
+                last_error=state.last_error,
+            )
+            if state.last_attempt_at:
+                entry.last_attempt_at = int(state.last_attempt_at * 1000)
+            entries.append(entry)
+
+        return DeadNodeHandlingStateResponse(
+            max_concurrency=ServerConfig().dead_node_handling_max_concurrency,
+            entries=entries,
+        )
@@ -3,6 +3,9 @@ from generated.common_pb2 import EmptyResponseWithMeta
 from generated.mysql_pb2 import (
     MySQLCreateRequest,
     MySQLDeleteResponse,
+    MySQLHealthMetricsRequest,
+    MySQLHealthMetricsResponse,
+    MySQLHealthMetricsWindow,
     MySQLIdRequest,
     MySQLInfoResponse,
     MySQLStatusResponse,
@@ -10,6 +13,7 @@ from generated.mysql_pb2 import (
 )
 from generated.mysql_pb2_grpc import MySQLServiceServicer
 from agent.domain.mysql import MySQL
+from agent.monitor.health_history import get_health_history
 
 
 def to_grpc_mysql_info(mysql: MySQL) -> MySQLInfoResponse:
@@ -97,3 +101,14 @@ class MySQLService(MySQLServiceServicer):
         mysql = MySQL(request.id)
         mysql.sync_replica_user()
         return EmptyResponseWithMeta()
+
+    def GetHealthMetrics(self, request:MySQLHealthMetricsRequest, context) -> MySQLHealthMetricsResponse:
+        history = get_health_history(request.id)
+        if not history:
+            raise ValueError(f"MySQL with id {request.id} is not being monitored")
+
+        window_seconds = list(request.window_seconds) or [60, 300, 3600]
+        return MySQLHealthMetricsResponse(windows=[
+            MySQLHealthMetricsWindow(window_seconds=window, **history.summary(window))
+            for window in window_seconds
+        ])
@@ -0,0 +1,148 @@
+"""
+Microbenchmark of `DeadNodeDetector` against the previous heap based implementation.
+
+Simulates `--nodes` nodes reporting their status at `--rate` Hz on a virtual clock.
+Later in the run, `--failed` nodes stop reporting and both detectors are polled at their own granularity.
+
+Reports
+- update throughput
+- max entries held by the detector and peak memory of the run (tracemalloc)
+- detection delay after the timeout, i.e. how late the death got noticed
+
+Usage (from the agent directory) -
+    python -m benchmarks.dead_node_detector --nodes 10000 --rate 4 --seconds 10
+"""
+import argparse
+import heapq
+import random
+import threading
+import time
+import tracemalloc
+
+from generated.extras_pb2 import DBHealthStatus
+from agent.monitor.dead_node_detector import DeadNodeDetector
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class HeapDetector:
+    """Previous implementation, one heap entry per status event and checked once a second."""
+
+    poll_seconds = 1
+
+    def __init__(self, timeout_seconds, clock):
+        self.timeout_seconds = timeout_seconds
+        self.clock = clock
+        self.last_seen = {}
+        self.heap = []
+        self.dead = set()
+        self.lock = threading.Lock()
+
+    def update(self, node_id:str, health_status:DBHealthStatus):
+        with self.lock:
+            now = self.clock()
+            self.last_seen[node_id] = now
+            heapq.heappush(self.heap, (now + self.timeout_seconds, node_id))
+            if node_id in self.dead:
+                self.dead.remove(node_id)
+
+    def expire(self) -> list[str]:
+        now = self.clock()
+        newly_dead = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                _, node_id = heapq.heappop(self.heap)
+                if self.last_seen.get(node_id, 0) <= now - self.timeout_seconds and node_id not in self.dead:
+                    self.dead.add(node_id)
+                    newly_dead.append(node_id)
+        return newly_dead
+
+
+def detector_entries(detector) -> int:
+    return len(detector.heap) if isinstance(detector, HeapDetector) else len(detector.wheel)
+
+
+def run(name:str, detector, clock:VirtualClock, poll_seconds:float, args):
+    status = DBHealthStatus()
+    node_ids = [f"node-{i}" for i in range(args.nodes)]
+    failed = set(random.sample(node_ids, args.failed))
+    report_interval = 1 / args.rate
+    # Spread the reports of the nodes evenly across the interval
+    offsets = [random.random() * report_interval for _ in node_ids]
+
+    tracemalloc.start()
+    updates = 0
+    update_seconds = 0.0
+    last_report = {}
+    last_reported_at = {}
+    max_entries = 0
+    detected_at = {}
+    next_poll = clock.now + poll_seconds
+    end = clock.now + args.seconds
+    # Failed nodes stop reporting at random points, early enough to be detected before the run ends
+    failure_at = {node_id: clock.now + max(1, args.seconds - args.timeout - 2) + random.random() for node_id in failed}
+    step = 0.01
+
+    while clock.now < end:
+        due = []
+        for node_id, offset in zip(node_ids, offsets):
+            if node_id in failure_at and clock.now >= failure_at[node_id]:
+                continue
+            slot = int((clock.now - offset) / report_interval)
+            if last_report.get(node_id) != slot:
+                last_report[node_id] = slot
+                last_reported_at[node_id] = clock.now
+                due.append(node_id)
+
+        start = time.perf_counter()
+        for node_id in due:
+            detector.update(node_id, status)
+        update_seconds += time.perf_counter() - start
+        updates += len(due)
+        max_entries = max(max_entries, detector_entries(detector))
+
+        while next_poll <= clock.now:
+            for node_id in detector.expire():
+                detected_at[node_id] = clock.now
+            next_poll += poll_seconds
+        clock.now += step
+
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    delays = sorted(
+        (detected_at[node_id] - (last_reported_at[node_id] + args.timeout)) * 1000
+        for node_id in failed if node_id in detected_at
+    )
+    print(f"{name:>6} | {updates / update_seconds:>10,.0f} updates/s"
+          f" | max {max_entries:>7,} entries | peak {peak_bytes / 1024 / 1024:>6.2f} MiB"
+          f" | detected {len(delays)}/{len(failed)}"
+          f" | delay p50 {delays[len(delays) // 2] if delays else 0:>6.0f} ms, max {delays[-1] if delays else 0:>6.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dead node detection")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=4, help="status reports per second per node")
+    parser.add_argument("--seconds", type=float, default=10, help="simulated duration")
+    parser.add_argument("--timeout", type=float, default=3)
+    parser.add_argument("--failed", type=int, default=100)
+    args = parser.parse_args()
+    random.seed(42)
+
+    clock = VirtualClock()
+    run("heap", HeapDetector(args.timeout, clock), clock, HeapDetector.poll_seconds, args)
+
+    clock = VirtualClock()
+    detector = DeadNodeDetector(timeout_seconds=args.timeout, clock=clock, start_threads=False)
+    run("wheel", detector, clock, detector.tick_seconds, args)
+
+
+if __name__ == "__main__":
+    main()
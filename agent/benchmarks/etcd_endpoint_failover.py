@@ -0,0 +1,150 @@
+"""
+Latency of the etcd calls of an agent while an etcd member goes through maintenance,
+with the endpoint routing of `CustomMultiEndpointEtcd3Client` against a client pinned to a single member
+(what the agents did before, every agent picked a random member once and stuck to it).
+
+Three members `m0`, `m1`, `m2` with different latencies, `m2` is the leader. The run goes through phases -
+- steady      : all the members are fine
+- maintenance : `m0` hangs (calls to it run into the deadline), think of a member being drained and replaced
+- new leader  : `m0` is back, leadership moves to `m1`, the next write to `m2` fails with "leader changed"
+
+The workload is serializable reads and transactions (`--writes` of the calls) from a single thread.
+The members are in-process stubs which sleep for their latency, no etcd is needed.
+
+Usage (from the agent directory) -
+    python -m benchmarks.etcd_endpoint_failover --calls 300 --writes 0.2
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+import grpc
+
+from agent.internal.etcd_client import CustomMultiEndpointEtcd3Client
+from agent.internal.etcd_endpoints import EtcdEndpointTracker
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code:grpc.StatusCode, details:str):
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+
+class Member:
+    def __init__(self, address:str, member_id:int, latency_ms:float, cluster:"Cluster"):
+        self.address = address
+        self.member_id = member_id
+        self.latency_ms = latency_ms
+        self.cluster = cluster
+        self.hanging = False
+
+    def _serve(self, timeout:float|None):
+        if self.hanging:
+            time.sleep(timeout or 1)
+            raise FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline Exceeded")
+        time.sleep(self.latency_ms / 1000)
+
+    def Range(self, request, timeout=None, **kwargs):
+        self._serve(timeout)
+        return SimpleNamespace(kvs=[], count=0)
+
+    def Txn(self, request, timeout=None, **kwargs):
+        if self.cluster.fail_next_write_on == self.address:
+            self.cluster.fail_next_write_on = None
+            raise FakeRpcError(grpc.StatusCode.UNAVAILABLE, "etcdserver: leader changed")
+        self._serve(timeout)
+        if self.member_id != self.cluster.leader_id:
+            # Forwarded to the leader
+            time.sleep(self.cluster.members[self.cluster.leader_id].latency_ms / 1000)
+        return SimpleNamespace(succeeded=True, responses=[])
+
+    def Status(self, request, timeout=None, **kwargs):
+        self._serve(timeout)
+        return SimpleNamespace(leader=self.cluster.leader_id, header=SimpleNamespace(member_id=self.member_id))
+
+
+class Cluster:
+    def __init__(self):
+        self.leader_id = 3
+        self.fail_next_write_on: str|None = None
+        self.members = {
+            member_id: Member(f"m{member_id - 1}:2379", member_id, latency_ms, self)
+            for member_id, latency_ms in [(1, 1.0), (2, 2.0), (3, 3.0)]
+        }
+
+    @property
+    def addresses(self) -> list[str]:
+        return [member.address for member in self.members.values()]
+
+    def member(self, address:str) -> Member:
+        return next(member for member in self.members.values() if member.address == address)
+
+
+def build_client(cluster:Cluster, addresses:list[str], timeout:float) -> CustomMultiEndpointEtcd3Client:
+    client = CustomMultiEndpointEtcd3Client(
+        endpoints=[SimpleNamespace(netloc=address) for address in addresses], timeout=timeout,
+    )
+    # The members serve the calls in place of the grpc stubs of the endpoints
+    for address in addresses:
+        for name in ("kvstub", "maintenancestub"):
+            client._stubs[(address, name)] = cluster.member(address)
+    return client
+
+
+def run(name:str, cluster:Cluster, client:CustomMultiEndpointEtcd3Client, args) -> None:
+    phases = [
+        ("steady", lambda: None),
+        ("maintenance", lambda: setattr(cluster.members[1], "hanging", True)),
+        ("new leader", lambda: (
+            setattr(cluster.members[1], "hanging", False),
+            setattr(cluster, "leader_id", 2),
+            setattr(cluster, "fail_next_write_on", cluster.members[3].address),
+        )),
+    ]
+    rng = random.Random(42)
+    print(name)
+    for phase, apply in phases:
+        apply()
+        latencies, errors = [], 0
+        for _ in range(args.calls):
+            write = rng.random() < args.writes
+            start = time.perf_counter()
+            try:
+                if write:
+                    client.kvstub.Txn(SimpleNamespace(), args.timeout)
+                else:
+                    client.kvstub.Range(SimpleNamespace(serializable=True), args.timeout)
+            except grpc.RpcError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        print(f"  {phase:<12} p50 {latencies[len(latencies) // 2]:>6.1f} ms"
+              f" | p99 {latencies[int(len(latencies) * 0.99)]:>6.1f} ms | errors {errors:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark etcd endpoint routing during member maintenance")
+    parser.add_argument("--calls", type=int, default=300, help="calls per phase")
+    parser.add_argument("--writes", type=float, default=0.2, help="share of the calls which are transactions")
+    parser.add_argument("--timeout", type=float, default=0.05, help="deadline of a call, seconds")
+    args = parser.parse_args()
+
+    cluster = Cluster()
+    run("pinned to m0 (one agent in three before)", cluster,
+        build_client(cluster, [cluster.members[1].address], args.timeout), args)
+
+    # The tracker is process wide, start afresh
+    EtcdEndpointTracker._instance = None
+    cluster = Cluster()
+    run("routed", cluster, build_client(cluster, cluster.addresses, args.timeout), args)
+
+
+if __name__ == "__main__":
+    main()
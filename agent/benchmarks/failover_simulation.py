@@ -0,0 +1,431 @@
+"""
+Failover simulation of a single cluster, covering the whole chain from a master going silent to the
+proxy routing writes to the new master -
+
+    DeadNodeDetector -> mark_node_as_dead_if_unreachable -> NodeElection -> Proxy.sync_servers
+                                                                          -> MySQL.sync_replication_config
+
+Runs the agent code unchanged against
+- an in-memory etcd (benchmarks/fake_etcd.py), config / status changes flow through its watch
+- fake agents answering `CheckDatabaseReachability`, placed in the shared agent pool
+- fake MySQL servers and a fake ProxySQL admin interface
+
+Detection runs on a virtual clock, so it's deterministic for a seed.
+Rest of the chain does real rpc / txn work with simulated network latencies, so it's timed on the wall clock.
+
+Scenarios -
+    master_death     master and its agent are gone
+    partition        master is cut off from etcd, proxy and all but one replica
+    slow_peers       master is gone and half of the replicas answer slowly (some past the deadline)
+    false_suspicion  master stops reporting but the proxy can still reach its database, no failover expected
+
+Usage (from the agent directory) -
+    python -m benchmarks.failover_simulation --runs 50
+    python -m benchmarks.failover_simulation --scenario slow_peers --nodes 7 --probe-timeout-ms 200
+"""
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+from types import SimpleNamespace
+
+import grpc
+
+from benchmarks.dead_node_detector import VirtualClock
+from benchmarks.fake_etcd import InMemoryEtcd
+from generated.extras_pb2 import ClusterConfig as ClusterConfigProtobufMessage
+from generated.extras_pb2 import ClusterNodeStatus, ClusterNodeType, DBHealthStatus
+from agent import ServerConfig
+from agent.domain.mysql import MySQL
+from agent.domain.proxy import Proxy
+from agent.helpers import parse_etcd_watch_event
+from agent.internal import agent_pool
+from agent.internal.config import ClusterConfig, ClusterConfigCache
+from agent.monitor.dead_node_detector import DeadNodeDetector
+from agent.monitor.dead_node_handler import mark_node_as_dead_if_unreachable
+from agent.monitor.election import NodeElection
+from agent.monitor.successor_ranking import SuccessorRanking
+
+SCENARIOS = ["master_death", "partition", "slow_peers", "false_suspicion"]
+CLUSTER_ID = "sim"
+TOKEN = "sim-token"
+PROXY_HOST = "proxy"
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code:grpc.StatusCode):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+class Network:
+    """
+    Who can reach whom, and how long an agent takes to answer.
+    Hosts are node ids, plus `PROXY_HOST`.
+    """
+
+    def __init__(self, rng:random.Random):
+        self.rng = rng
+        self.down: set[str] = set() # host is gone, agent and database
+        self.cut: set[frozenset] = set() # pairs of hosts which can't talk to each other
+        self.slow: dict[str, tuple[float, float]] = {} # host -> answer latency range in ms
+        self.default_latency_ms = (1, 3)
+
+    def can_reach(self, source:str, target:str) -> bool:
+        return target not in self.down and frozenset((source, target)) not in self.cut
+
+    def latency_ms(self, host:str) -> float:
+        return self.rng.uniform(*self.slow.get(host, self.default_latency_ms))
+
+
+class FakeInterAgentService:
+    def __init__(self, network:Network, host:str):
+        self.network = network
+        self.host = host
+
+    def CheckDatabaseReachability(self, request, timeout:float|None=None):
+        if self.host in self.network.down:
+            time.sleep(0.001)
+            raise FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+        latency = self.network.latency_ms(self.host) / 1000
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED)
+        time.sleep(latency)
+        return SimpleNamespace(reachable=self.network.can_reach(self.host, request.node_id))
+
+
+class FakeAgent:
+    def __init__(self, network:Network, host:str):
+        self.inter_agent_service = FakeInterAgentService(network, host)
+
+
+class FakeMySQLServer:
+    def __init__(self, node_id:str):
+        self.node_id = node_id
+        self.sequence = 0
+        self.master: tuple[str, int]|None = None # (host, port) it replicates from, None if it's a master
+
+
+class FakeMySQLConnection:
+    def __init__(self, server:FakeMySQLServer):
+        self.server = server
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def query(self, query:str, params:tuple=(), as_dict:bool=True):
+        if query == "SHOW SLAVE STATUS" and self.server.master:
+            host, port = self.server.master
+            return [{"Master_Host": host, "Master_Port": str(port)}]
+        return []
+
+
+class SimulatedMySQL(MySQL):
+    """Real replication sync decisions, role switches take `configure_latency_ms` instead of talking to a server"""
+
+    configure_latency_ms = 20
+
+    def __init__(self, node_id:str, server:FakeMySQLServer):
+        self.model = SimpleNamespace(id=node_id, cluster_id=CLUSTER_ID)
+        self.server = server
+
+    @property
+    def db_conn(self):
+        return FakeMySQLConnection(self.server)
+
+    def sync_replication_config(self, cluster_config:ClusterConfig=None):
+        self.cluster_config = cluster_config
+        return super().sync_replication_config(cluster_config)
+
+    def configure_as_master(self, *args, **kwargs):
+        time.sleep(self.configure_latency_ms / 1000)
+        self.server.master = None
+
+    def configure_as_replica(self, *args, **kwargs):
+        if not self.cluster_config.online_master_node_ids:
+            raise Exception("No online master node found in the cluster configuration for replication.")
+        time.sleep(self.configure_latency_ms / 1000)
+        master = self.cluster_config.get_node(self.cluster_config.online_master_node_ids[0])
+        self.server.master = (master.ip, master.db_port)
+
+
+class FakeProxySQLAdmin:
+    query_latency_ms = 1
+
+    def __init__(self):
+        self.servers: list[tuple[str, str, str, str]] = []
+        self.runtime_servers: list[tuple[str, str, str, str]] = []
+
+    def is_reachable(self) -> bool:
+        return True
+
+    def query(self, query:str, params:tuple=(), as_dict:bool=True):
+        time.sleep(self.query_latency_ms / 1000)
+        if query.startswith("SELECT hostgroup_id"):
+            return [("hostgroup_id", "hostname", "port", "weight")] + list(self.servers)
+        if query.startswith("DELETE FROM mysql_servers"):
+            self.servers = []
+        elif query.startswith("INSERT INTO mysql_servers"):
+            hostgroup_id, hostname, port, _, weight = re.search(r"VALUES \((.*)\)", query).group(1).split(", ")
+            self.servers.append((hostgroup_id, hostname.strip("'"), port, weight))
+        elif query == "LOAD MYSQL SERVERS TO RUNTIME":
+            self.runtime_servers = list(self.servers)
+        return []
+
+    @property
+    def writer_hosts(self) -> set[str]:
+        return {hostname for hostgroup_id, hostname, _, _ in self.runtime_servers if hostgroup_id == "1"}
+
+
+class SimulatedProxy(Proxy):
+    def __init__(self, admin:FakeProxySQLAdmin):
+        self.admin = admin
+
+    @property
+    def db_conn(self):
+        return self.admin
+
+
+class FailoverRun:
+    """A single cluster going through a single fault"""
+
+    report_interval_ms = 1000
+    warmup_seconds = 30
+    max_detection_seconds = 20
+
+    def __init__(self, scenario:str, nodes:int, rng:random.Random):
+        self.scenario = scenario
+        self.rng = rng
+        self.clock = VirtualClock()
+        self.kv = InMemoryEtcd(clock=self.clock)
+        self.network = Network(rng)
+        self.config = ServerConfig()
+        self.node_ids = [f"node-{i}" for i in range(nodes)]
+        self.master_node_id = self.node_ids[0]
+        self.servers = {node_id: FakeMySQLServer(node_id) for node_id in self.node_ids}
+        self.proxy_admin = FakeProxySQLAdmin()
+        self.proxy = SimulatedProxy(self.proxy_admin)
+        self.detector = DeadNodeDetector(timeout_seconds=3, clock=self.clock, start_threads=False)
+        self.successor_ranking = SuccessorRanking()
+        self.node_election = NodeElection()
+        # Shared by all the runs of the process, the revisions of a new etcd start from 0 again
+        self.cluster_config_cache = ClusterConfigCache()
+        self.cluster_config_cache.invalidate(CLUSTER_ID)
+        self.silent: set[str] = set() # nodes which stopped reporting their status
+        self.events = self.kv.subscribe(self.config.kv_cluster_prefix.format(cluster_id=CLUSTER_ID))
+        self.timings: dict[str, float] = {"election": 0.0, "sync": 0.0}
+        self.next_report_at = self.clock.now
+
+        config = ClusterConfigProtobufMessage(shared_token=TOKEN, max_replication_lag_ms=0)
+        config.proxy.ip = PROXY_HOST
+        config.proxy.agent_port = 7000
+        for node_id in self.node_ids:
+            node = config.nodes[node_id]
+            node.type = ClusterNodeType.MASTER if node_id == self.master_node_id else ClusterNodeType.REPLICA
+            node.status = ClusterNodeStatus.ONLINE
+            node.ip = node_id
+            node.agent_port = 7000
+            node.db_port = 3306
+            node.weight = rng.randint(1, 3)
+        self.kv.put(self.config.kv_cluster_config_key.format(cluster_id=CLUSTER_ID), config.SerializeToString())
+
+        # Agents of the cluster are looked up in the shared pool, so the fakes answer instead of grpc channels
+        for host in self.node_ids + [PROXY_HOST]:
+            agent_pool._agents[(host, 7000, TOKEN, CLUSTER_ID)] = FakeAgent(self.network, host)
+
+    def report_statuses(self):
+        now_ms = int(self.clock() * 1000)
+        master_writes = self.master_node_id not in self.silent
+        if master_writes:
+            self.servers[self.master_node_id].sequence += self.rng.randint(1, 50)
+        master_sequence = self.servers[self.master_node_id].sequence
+        for node_id, server in self.servers.items():
+            if node_id != self.master_node_id:
+                # Replicas trail the master a little, once it stops writing they apply the rest of their relay log
+                lag = self.rng.randint(0, 5) if master_writes else 0
+                server.sequence = max(server.sequence, master_sequence - lag)
+            if node_id in self.silent:
+                continue
+            status = DBHealthStatus(
+                reported_at=now_ms + self.rng.randint(0, 20),
+                global_transaction_id=f"0-1-{server.sequence}",
+                is_replica=node_id != self.master_node_id,
+                slave_io_running=node_id != self.master_node_id,
+                slave_sql_running=node_id != self.master_node_id,
+                report_interval_ms=self.report_interval_ms,
+            )
+            status.seconds_behind_master = 0
+            self.kv.put(
+                self.config.kv_cluster_node_status_key.format(cluster_id=CLUSTER_ID, node_id=node_id),
+                status.SerializeToString(),
+            )
+
+    def act_on_events(self):
+        """Same reactions as `EtcdStateMonitor.act_on_kv_event`, run inline instead of in a watch thread"""
+        while not self.events.empty():
+            event = parse_etcd_watch_event(self.events.get_nowait())
+            if event and event.event_type == "status" and event.action == "delete":
+                self.detector.mark_status_expired(event.node_id)
+                self.successor_ranking.remove_status(CLUSTER_ID, event.node_id)
+                continue
+            if not event or not event.data or event.action != "update":
+                continue
+            if event.event_type == "status":
+                self.cluster_config_cache.confirm(CLUSTER_ID, event.revision)
+                self.detector.update(event.node_id, event.data, cluster_id=CLUSTER_ID)
+                self.successor_ranking.update_status(CLUSTER_ID, event.node_id, event.data)
+            elif event.event_type == "config":
+                self.cluster_config_cache.update(CLUSTER_ID, event.data)
+                self.successor_ranking.update_config(CLUSTER_ID, event.data)
+                start = time.perf_counter()
+                self.proxy.sync_servers(cluster_config=event.data)
+                offline_node_ids = event.data.offline_master_node_ids + event.data.offline_replica_node_ids
+                for node_id in self.node_ids:
+                    if node_id in offline_node_ids or node_id in self.network.down:
+                        continue
+                    try:
+                        SimulatedMySQL(node_id, self.servers[node_id]).sync_replication_config(event.data)
+                    except Exception as e:
+                        print(f"Failed to sync replication config for server {node_id}: {e}")
+                self.timings["sync"] += time.perf_counter() - start
+                if not event.data.online_master_node_ids:
+                    start = time.perf_counter()
+                    self.node_election.elect_new_master(
+                        self.kv, CLUSTER_ID, self.successor_ranking.successors(CLUSTER_ID),
+                        self.successor_ranking.master_gtid(CLUSTER_ID),
+                    )
+                    self.timings["election"] += time.perf_counter() - start
+
+    def advance(self, seconds:float):
+        end = self.clock.now + seconds
+        while self.clock.now < end:
+            if self.clock.now >= self.next_report_at:
+                self.report_statuses()
+                self.next_report_at += self.report_interval_ms / 1000
+            self.act_on_events()
+            dead = self.detector.expire(self.clock.now)
+            if dead:
+                return dead
+            self.clock.now += self.detector.tick_seconds
+        return []
+
+    def inject_fault(self):
+        master = self.master_node_id
+        replicas = self.node_ids[1:]
+        self.silent.add(master)
+        if self.scenario != "false_suspicion":
+            # Its status is on the lease of its agent, which isn't kept alive anymore
+            self.kv.delete(self.config.kv_cluster_node_status_key.format(cluster_id=CLUSTER_ID, node_id=master))
+        if self.scenario in ("master_death", "slow_peers"):
+            self.network.down.add(master)
+        if self.scenario == "partition":
+            survivor = self.rng.choice(replicas)
+            for host in [PROXY_HOST] + replicas:
+                if host != survivor:
+                    self.network.cut.add(frozenset((host, master)))
+        if self.scenario == "slow_peers":
+            timeout_ms = self.config.reachability_check_timeout_ms
+            for node_id in self.rng.sample(replicas, len(replicas) // 2):
+                self.network.slow[node_id] = (timeout_ms * 0.5, timeout_ms * 1.5)
+
+    def run(self) -> dict:
+        result = {"scenario": self.scenario, "failover": False, "wrong": False}
+        self.advance(self.warmup_seconds + self.rng.random())
+
+        master_last_sequence = self.servers[self.master_node_id].sequence
+        self.timings = {"election": 0.0, "sync": 0.0}
+        failed_at = self.clock.now
+        self.inject_fault()
+        dead = []
+        while not dead and self.clock.now - failed_at < self.max_detection_seconds:
+            dead = self.advance(self.detector.tick_seconds)
+        if self.master_node_id not in dead:
+            result["wrong"] = self.scenario != "false_suspicion"
+            return result
+        result["detection_ms"] = (self.clock.now - failed_at) * 1000
+
+        wall_start = time.perf_counter()
+        cluster_config = self.cluster_config_cache.get(CLUSTER_ID, self.kv)
+        marked = mark_node_as_dead_if_unreachable(self.kv, cluster_config, self.master_node_id)
+        result["handling_ms"] = (time.perf_counter() - wall_start) * 1000
+        if not marked:
+            result["wrong"] = True
+            return result
+        self.act_on_events()
+        result["election_ms"] = self.timings["election"] * 1000
+        result["sync_ms"] = self.timings["sync"] * 1000
+        result["total_ms"] = result["detection_ms"] + (time.perf_counter() - wall_start) * 1000
+
+        writers = self.proxy_admin.writer_hosts
+        promoted = [node_id for node_id in writers if node_id != self.master_node_id]
+        result["failover"] = bool(promoted)
+        if self.scenario == "false_suspicion":
+            result["wrong"] = result["failover"]
+        elif len(promoted) != 1 or self.servers[promoted[0]].master is not None:
+            result["wrong"] = True
+        elif self.servers[promoted[0]].sequence < master_last_sequence:
+            # Promoted a replica which missed transactions of the old master
+            result["wrong"] = True
+        return result
+
+
+def percentile(values:list[float], p:float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def report(scenario:str, results:list[dict]):
+    def column(name:str) -> str:
+        values = [r[name] for r in results if name in r]
+        return f"{percentile(values, 0.5):>7.0f} {percentile(values, 0.99):>7.0f}"
+
+    failovers = sum(r["failover"] for r in results)
+    wrong = sum(r["wrong"] for r in results)
+    totals = [r["total_ms"] for r in results if r["failover"]]
+    print(
+        f"{scenario:<16} {len(results):>4} {failovers:>9} {wrong:>5} | {column('detection_ms')} | {column('handling_ms')}"
+        f" | {column('election_ms')} | {column('sync_ms')}"
+        f" | {percentile(totals, 0.5):>7.0f} {percentile(totals, 0.95):>7.0f} {percentile(totals, 0.99):>7.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate failovers and report their latency")
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--runs", type=int, default=20, help="runs per scenario")
+    parser.add_argument("--nodes", type=int, default=5)
+    parser.add_argument("--probe-timeout-ms", type=int, default=250, help="deadline of a single reachability check")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="show the logs of the agent code")
+    args = parser.parse_args()
+
+    # Only for this process, not persisted in the config file
+    ServerConfig().__setattr__("reachability_check_timeout_ms", args.probe_timeout_ms, store_in_file=False)
+
+    print(f"{'':<16} {'':>4} {'':>9} {'':>5} | {'detect ms':^15} | {'handle ms':^15} | {'elect ms':^15} | {'sync ms':^15} | {'total ms':^23}")
+    print(
+        f"{'scenario':<16} {'runs':>4} {'failovers':>9} {'wrong':>5} | {'p50':>7} {'p99':>7} | {'p50':>7} {'p99':>7}"
+        f" | {'p50':>7} {'p99':>7} | {'p50':>7} {'p99':>7} | {'p50':>7} {'p95':>7} {'p99':>7}"
+    )
+    for scenario in SCENARIOS if args.scenario == "all" else [args.scenario]:
+        results = []
+        for i in range(args.runs):
+            rng = random.Random(f"{args.seed}-{scenario}-{i}")
+            logs = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with logs:
+                results.append(FailoverRun(scenario, args.nodes, rng).run())
+        report(scenario, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+In-process stand-in for the parts of python-etcd3's client used by the agent -
+get / put / delete, prefix reads, transactions with version compares, leases, locks and prefix watches.
+
+Keys and values behave like etcd's (revision, mod revision and version per key),
+so the agent code can be driven against it unchanged in simulations.
+"""
+import asyncio
+import queue
+import threading
+from types import SimpleNamespace
+
+from etcd3.exceptions import RevisionCompactedError
+
+
+class KVMetadata:
+    def __init__(self, key:bytes, create_revision:int, mod_revision:int, version:int, lease_id:int|None):
+        self.key = key
+        self.create_revision = create_revision
+        self.mod_revision = mod_revision
+        self.version = version
+        self.lease_id = lease_id
+
+
+# Class names matter, `parse_etcd_watch_event` tells the events apart by them
+class PutEvent:
+    def __init__(self, key:bytes, value:bytes, mod_revision:int, version:int):
+        self.key = key
+        self.value = value
+        self.mod_revision = mod_revision
+        self.version = version
+
+
+class DeleteEvent:
+    def __init__(self, key:bytes, mod_revision:int):
+        self.key = key
+        self.value = b""
+        self.mod_revision = mod_revision
+
+
+class Compare:
+    def __init__(self, target:str, key:str):
+        self.target = target
+        self.key = key
+        self.op = None
+        self.value = None
+
+    def _set(self, op:str, value):
+        self.op = op
+        self.value = value
+        return self
+
+    def __eq__(self, value):
+        return self._set("==", value)
+
+    def __ne__(self, value):
+        return self._set("!=", value)
+
+    def __lt__(self, value):
+        return self._set("<", value)
+
+    def __gt__(self, value):
+        return self._set(">", value)
+
+    def evaluate(self, kv:"InMemoryEtcd") -> bool:
+        entry = kv.store.get(self.key)
+        if self.target == "value":
+            actual = entry[0] if entry else b""
+        elif entry:
+            actual = getattr(entry[1], self.target)
+        else:
+            actual = 0
+        return {
+            "==": actual == self.value,
+            "!=": actual != self.value,
+            "<": actual < self.value,
+            ">": actual > self.value,
+        }[self.op]
+
+
+class Transactions:
+    def version(self, key) -> Compare:
+        return Compare("version", _key(key))
+
+    def mod_revision(self, key) -> Compare:
+        return Compare("mod_revision", _key(key))
+
+    def create_revision(self, key) -> Compare:
+        return Compare("create_revision", _key(key))
+
+    def value(self, key) -> Compare:
+        return Compare("value", _key(key))
+
+    def put(self, key, value, lease=None):
+        return ("put", _key(key), value, lease)
+
+    def delete(self, key):
+        return ("delete", _key(key), None, None)
+
+
+class Lease:
+    def __init__(self, kv:"InMemoryEtcd", lease_id:int, ttl:float):
+        self.kv = kv
+        self.id = lease_id
+        self.ttl = ttl
+        self.expires_at = kv.clock() + ttl
+
+    def refresh(self):
+        self.expires_at = self.kv.clock() + self.ttl
+
+    def revoke(self):
+        self.kv.revoke_lease(self.id)
+
+
+class Lock:
+    def __init__(self, kv:"InMemoryEtcd", name:str):
+        self.kv = kv
+        self.name = name
+        self.acquired = False
+
+    def acquire(self, timeout:float|None=None) -> bool:
+        lock = self.kv.locks.setdefault(self.name, threading.Lock())
+        self.acquired = lock.acquire(timeout=-1 if timeout is None else timeout)
+        return self.acquired
+
+    def release(self):
+        if self.acquired:
+            self.kv.locks[self.name].release()
+            self.acquired = False
+
+
+class InMemoryEtcd:
+    """
+    Thread safe, a single instance can be shared by all the simulated nodes like a real etcd cluster.
+    Leases expire only when `expire_leases` is called, so the simulation decides what time it is.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or (lambda: 0.0)
+        self._mutex = threading.RLock()
+        self.revision = 0
+        self.store: dict[str, tuple[bytes, KVMetadata]] = {}
+        self.leases: dict[int, Lease] = {}
+        self.locks: dict[str, threading.Lock] = {}
+        self.watchers: list[tuple[str, queue.Queue, bool]] = [] # (key, events, is prefix)
+        self.callback_watches: dict[int, queue.Queue] = {}
+        self.history: list[tuple[int, str, object]] = [] # (revision, key, event), for watches from a past revision
+        self.compacted_revision = 0
+        self.next_id = 0 # watch and lease ids
+        self.transactions = Transactions()
+
+    def get(self, key) -> tuple[bytes|None, KVMetadata|None]:
+        with self._mutex:
+            entry = self.store.get(_key(key))
+            return entry if entry else (None, None)
+
+    def get_prefix_response(self, prefix):
+        prefix = _key(prefix)
+        with self._mutex:
+            kvs = [
+                SimpleNamespace(key=meta.key, value=value, mod_revision=meta.mod_revision, version=meta.version)
+                for key, (value, meta) in sorted(self.store.items()) if key.startswith(prefix)
+            ]
+            return SimpleNamespace(kvs=kvs, header=SimpleNamespace(revision=self.revision))
+
+    def put(self, key, value, lease=None):
+        with self._mutex:
+            self._put(_key(key), value, lease)
+
+    def delete(self, key) -> bool:
+        with self._mutex:
+            return self._delete(_key(key))
+
+    def transaction(self, compare:list[Compare], success:list, failure:list) -> tuple[bool, list]:
+        with self._mutex:
+            succeeded = all(c.evaluate(self) for c in compare)
+            for op, key, value, lease in success if succeeded else failure:
+                if op == "put":
+                    self._put(key, value, lease)
+                else:
+                    self._delete(key)
+            return succeeded, []
+
+    def lease(self, ttl:float) -> Lease:
+        with self._mutex:
+            self.next_id += 1
+            lease = self.leases[self.next_id] = Lease(self, self.next_id, ttl)
+            return lease
+
+    def revoke_lease(self, lease_id:int):
+        with self._mutex:
+            self.leases.pop(lease_id, None)
+            for key in [key for key, (_, meta) in self.store.items() if meta.lease_id == lease_id]:
+                self._delete(key)
+
+    def expire_leases(self):
+        with self._mutex:
+            now = self.clock()
+            for lease in [lease for lease in self.leases.values() if lease.expires_at <= now]:
+                self.revoke_lease(lease.id)
+
+    def lock(self, name:str, ttl:int=60) -> Lock:
+        return Lock(self, name)
+
+    def subscribe(self, prefix) -> queue.Queue:
+        """Events under `prefix` get queued in the returned queue, lets a simulation drain them without a thread"""
+        events = queue.Queue()
+        with self._mutex:
+            self.watchers.append((_key(prefix), events, True))
+        return events
+
+    def watch_prefix(self, prefix):
+        events = self.subscribe(prefix)
+        watcher = (_key(prefix), events, True)
+
+        def iterator():
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                yield event
+
+        def cancel():
+            with self._mutex:
+                if watcher in self.watchers:
+                    self.watchers.remove(watcher)
+            events.put(None)
+
+        return iterator(), cancel
+
+    def add_watch_prefix_callback(self, prefix, callback, start_revision:int|None=None, **kwargs) -> int:
+        """
+        Like python-etcd3, the callback runs in a watch thread and gets a response carrying the events,
+        or the error which ended the watch.
+        """
+        return self._add_callback_watch(_key(prefix), True, callback, start_revision)
+
+    def add_watch_callback(self, key, callback, start_revision:int|None=None, **kwargs) -> int:
+        return self._add_callback_watch(_key(key), False, callback, start_revision)
+
+    def _add_callback_watch(self, prefix:str, is_prefix:bool, callback, start_revision:int|None) -> int:
+        events = queue.Queue()
+        with self._mutex:
+            self.next_id += 1
+            watch_id = self.next_id
+            if start_revision and start_revision <= self.compacted_revision:
+                events.put(RevisionCompactedError(self.compacted_revision))
+            else:
+                for revision, key, event in self.history:
+                    if start_revision and revision >= start_revision and _matches(key, prefix, is_prefix):
+                        events.put(event)
+                self.watchers.append((prefix, events, is_prefix))
+                self.callback_watches[watch_id] = events
+
+        def run():
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                if isinstance(event, Exception):
+                    callback(event)
+                    return
+                callback(SimpleNamespace(events=[event], header=SimpleNamespace(revision=event.mod_revision)))
+
+        threading.Thread(target=run, daemon=True).start()
+        return watch_id
+
+    def cancel_watch(self, watch_id:int):
+        with self._mutex:
+            events = self.callback_watches.pop(watch_id, None)
+            self.watchers = [watcher for watcher in self.watchers if watcher[1] is not events]
+        if events:
+            events.put(None)
+
+    def fail_watches(self, error:Exception):
+        """Breaks the watch stream, all the callback watches get `error` and end"""
+        with self._mutex:
+            watches = list(self.callback_watches.values())
+            self.callback_watches = {}
+            self.watchers = [watcher for watcher in self.watchers if watcher[1] not in watches]
+        for events in watches:
+            events.put(error)
+
+    def compact(self, revision:int):
+        with self._mutex:
+            self.compacted_revision = max(self.compacted_revision, revision)
+            self.history = [entry for entry in self.history if entry[0] > self.compacted_revision]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def _put(self, key:str, value:bytes, lease):
+        self.revision += 1
+        existing = self.store.get(key)
+        lease_id = lease.id if isinstance(lease, Lease) else lease
+        self.store[key] = (value, KVMetadata(
+            key=key.encode(),
+            create_revision=existing[1].create_revision if existing else self.revision,
+            mod_revision=self.revision,
+            version=existing[1].version + 1 if existing else 1,
+            lease_id=lease_id,
+        ))
+        self._notify(key, PutEvent(key.encode(), value, self.revision, self.store[key][1].version))
+
+    def _delete(self, key:str) -> bool:
+        if key not in self.store:
+            return False
+        self.revision += 1
+        del self.store[key]
+        self._notify(key, DeleteEvent(key.encode(), self.revision))
+        return True
+
+    def _notify(self, key:str, event):
+        self.history.append((event.mod_revision, key, event))
+        for prefix, events, is_prefix in self.watchers:
+            if _matches(key, prefix, is_prefix):
+                events.put(event)
+
+
+class AsyncInMemoryEtcd:
+    """
+    `AsyncEtcd3Client` surface over an `InMemoryEtcd`.
+    Like the real one, the watch callbacks are called on the loop.
+    """
+
+    def __init__(self, kv:InMemoryEtcd):
+        self.kv = kv
+        self.transactions = kv.transactions
+
+    async def get(self, key) -> tuple[bytes|None, KVMetadata|None]:
+        return self.kv.get(key)
+
+    async def get_prefix_response(self, prefix):
+        return self.kv.get_prefix_response(prefix)
+
+    async def put(self, key, value, lease=None):
+        self.kv.put(key, value, lease=lease)
+
+    async def delete(self, key) -> bool:
+        return self.kv.delete(key)
+
+    async def transaction(self, compare:list[Compare], success:list, failure:list) -> tuple[bool, list]:
+        return self.kv.transaction(compare, success, failure)
+
+    async def lease(self, ttl:float) -> Lease:
+        return self.kv.lease(ttl)
+
+    async def revoke_lease(self, lease_id:int):
+        self.kv.revoke_lease(lease_id)
+
+    async def add_watch_prefix_callback(self, prefix, callback, **kwargs) -> int:
+        loop = asyncio.get_running_loop()
+        return self.kv.add_watch_prefix_callback(
+            prefix, lambda response: loop.call_soon_threadsafe(callback, response), **kwargs
+        )
+
+    async def add_watch_callback(self, key, callback, **kwargs) -> int:
+        loop = asyncio.get_running_loop()
+        return self.kv.add_watch_callback(key, lambda response: loop.call_soon_threadsafe(callback, response), **kwargs)
+
+    async def cancel_watch(self, watch_id:int):
+        self.kv.cancel_watch(watch_id)
+
+    async def close(self):
+        pass
+
+
+def _key(key) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
+
+def _matches(key:str, watched:str, is_prefix:bool) -> bool:
+    return key.startswith(watched) if is_prefix else key == watched
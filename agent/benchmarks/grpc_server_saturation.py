@@ -0,0 +1,149 @@
+"""
+Latency of inter-agent calls while the agent's grpc server is busy with control plane calls,
+the thread server (`grpc_server_mode` "thread", the old fixed pool of 5 workers) against the asyncio one
+(`grpc_server_mode` "asyncio", `WorkerPoolInterceptor` with a reserved pool for rds.InterAgentService).
+
+The load is `--listeners` open job streams (`JobService.Listen`) and `--slow` management calls
+in flight all the time (each taking `--slow-ms`), while inter-agent calls (5 ms each) are made one after another.
+On the thread server a job stream holds a worker as long as it's open, on the asyncio one it's served on the loop.
+The handlers only sleep, no db / redis / etcd is needed.
+
+Usage (from the agent directory) -
+    python -m benchmarks.grpc_server_saturation --listeners 2 --slow 8 --calls 100
+"""
+import argparse
+import asyncio
+import time
+from concurrent import futures
+
+import grpc
+
+from agent.internal.interceptors import WorkerPoolInterceptor
+
+
+def identity(message:bytes) -> bytes:
+    return message
+
+
+def listen(request, context):
+    # Like `JobService.Listen`, polls for job updates as long as the client is there
+    while context.is_active():
+        time.sleep(0.1)
+    yield b""
+
+
+async def async_listen(request, context):
+    # Like `AsyncJobService.Listen`
+    while not context.done():
+        await asyncio.sleep(0.1)
+    yield b""
+
+
+def build_handlers(slow_ms:float, async_listen_handler:bool) -> list[grpc.GenericRpcHandler]:
+    def management_call(request, context):
+        time.sleep(slow_ms / 1000)
+        return b""
+
+    def inter_agent_call(request, context):
+        time.sleep(0.005)
+        return b""
+
+    return [
+        grpc.method_handlers_generic_handler("rds.JobService", {
+            "Listen": grpc.unary_stream_rpc_method_handler(
+                async_listen if async_listen_handler else listen, identity, identity
+            ),
+        }),
+        grpc.method_handlers_generic_handler("rds.MySQLService", {
+            "Slow": grpc.unary_unary_rpc_method_handler(management_call, identity, identity),
+        }),
+        grpc.method_handlers_generic_handler("rds.InterAgentService", {
+            "CheckDatabaseReachability": grpc.unary_unary_rpc_method_handler(inter_agent_call, identity, identity),
+        }),
+    ]
+
+
+async def run_load(port:int, args) -> list[float]:
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        listen_call = channel.unary_stream("/rds.JobService/Listen", identity, identity)
+        slow_call = channel.unary_unary("/rds.MySQLService/Slow", identity, identity)
+        inter_agent_call = channel.unary_unary("/rds.InterAgentService/CheckDatabaseReachability", identity, identity)
+
+        listeners = [listen_call(b"") for _ in range(args.listeners)]
+        stop = asyncio.Event()
+
+        async def keep_busy():
+            while not stop.is_set():
+                await slow_call(b"")
+
+        busy = [asyncio.create_task(keep_busy()) for _ in range(args.slow)]
+        await asyncio.sleep(0.5) # Let the listeners and the slow calls take the workers
+
+        latencies = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            await inter_agent_call(b"")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        stop.set()
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*busy)
+    return latencies
+
+
+def report(name:str, latencies:list[float]):
+    latencies.sort()
+    print(f"{name:<40} p50 {latencies[len(latencies) // 2]:>7.1f} ms"
+          f" | p99 {latencies[int(len(latencies) * 0.99)]:>7.1f} ms | max {latencies[-1]:>7.1f} ms")
+
+
+def run_thread_server(args):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=5))
+    server.add_generic_rpc_handlers(build_handlers(args.slow_ms, async_listen_handler=False))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        report("thread, 5 workers", asyncio.run(run_load(port, args)))
+    finally:
+        server.stop(grace=0)
+
+
+def run_asyncio_server(args):
+    async def serve_and_load():
+        executor = futures.ThreadPoolExecutor(max_workers=args.workers)
+        server = grpc.aio.server(
+            migration_thread_pool=executor,
+            handlers=build_handlers(args.slow_ms, async_listen_handler=True),
+            interceptors=[WorkerPoolInterceptor(
+                executor=executor,
+                reserved={"rds.InterAgentService": futures.ThreadPoolExecutor(max_workers=args.inter_agent_workers)},
+            )],
+        )
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            return await run_load(port, args)
+        finally:
+            await server.stop(grace=0)
+
+    report(f"asyncio, {args.workers} + {args.inter_agent_workers} reserved workers", asyncio.run(serve_and_load()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inter-agent call latency of a busy agent grpc server")
+    parser.add_argument("--listeners", type=int, default=2, help="open job streams")
+    parser.add_argument("--slow", type=int, default=8, help="management calls in flight")
+    parser.add_argument("--slow-ms", type=float, default=200, help="duration of a management call")
+    parser.add_argument("--calls", type=int, default=100, help="inter-agent calls to measure")
+    parser.add_argument("--workers", type=int, default=16, help="`grpc_max_workers` of the asyncio server")
+    parser.add_argument("--inter-agent-workers", type=int, default=4, help="`grpc_inter_agent_workers`")
+    args = parser.parse_args()
+
+    print(f"{args.listeners} job streams, {args.slow} management calls of {args.slow_ms:.0f} ms in flight")
+    run_thread_server(args)
+    run_asyncio_server(args)
+
+
+if __name__ == "__main__":
+    main()
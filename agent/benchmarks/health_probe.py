@@ -0,0 +1,108 @@
+"""
+Compares the throughput and CPU cost of the two health probe engines of `MySQLHealthCheckMonitor`.
+
+- executor : blocking mysqlclient query, dispatched to a ThreadPoolExecutor
+- asyncio  : non-blocking query on the event loop with `AsyncDatabaseClient`
+
+Each simulated monitored database holds its own persistent connection, same as the health monitor.
+
+Usage (from the agent directory) -
+    python -m benchmarks.health_probe --host 127.0.0.1 --port 3306 --user root --password <password> --dbs 200
+"""
+import argparse
+import asyncio
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.internal.async_db_client import AsyncDatabaseClient
+from agent.internal.db_client import DatabaseClient
+
+PROBE_QUERY = "SELECT @@gtid_current_pos"
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def run_probes(probe, dbs:int, duration:float) -> tuple[int, int]:
+    """Keep every simulated db busy with back-to-back probes until duration elapses."""
+    deadline = time.monotonic() + duration
+    counts = {"success": 0, "failure": 0}
+
+    async def worker(index:int):
+        while time.monotonic() < deadline:
+            try:
+                await probe(index)
+                counts["success"] += 1
+            except Exception:
+                counts["failure"] += 1
+
+    await asyncio.gather(*[worker(i) for i in range(dbs)])
+    return counts["success"], counts["failure"]
+
+
+async def bench_executor(args) -> tuple[int, int]:
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=args.max_workers)
+    clients = [
+        DatabaseClient(db_type="mariadb", host=args.host, port=args.port, user=args.user, password=args.password, autocommit=True)
+        for _ in range(args.dbs)
+    ]
+
+    async def probe(index:int):
+        await loop.run_in_executor(executor, clients[index].query, PROBE_QUERY)
+
+    try:
+        return await run_probes(probe, args.dbs, args.duration)
+    finally:
+        for client in clients:
+            client.close()
+        executor.shutdown()
+
+
+async def bench_asyncio(args) -> tuple[int, int]:
+    clients = [
+        AsyncDatabaseClient(host=args.host, port=args.port, user=args.user, password=args.password)
+        for _ in range(args.dbs)
+    ]
+
+    async def probe(index:int):
+        await clients[index].query(PROBE_QUERY)
+
+    try:
+        return await run_probes(probe, args.dbs, args.duration)
+    finally:
+        await asyncio.gather(*[client.close() for client in clients])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--dbs", type=int, default=100, help="Number of simulated monitored databases")
+    parser.add_argument("--duration", type=float, default=10, help="Duration of each run in seconds")
+    parser.add_argument("--max-workers", type=int, default=50, help="Thread pool size of executor engine")
+    parser.add_argument("--engine", choices=["executor", "asyncio", "both"], default="both")
+    args = parser.parse_args()
+
+    engines = ["executor", "asyncio"] if args.engine == "both" else [args.engine]
+    print(f"{'engine':<10} {'probes/s':>10} {'failures':>9} {'cpu %':>7} {'cpu us/probe':>13}")
+    for engine in engines:
+        runner = bench_executor if engine == "executor" else bench_asyncio
+        cpu_start = cpu_seconds()
+        wall_start = time.monotonic()
+        success, failure = asyncio.run(runner(args))
+        wall = time.monotonic() - wall_start
+        cpu = cpu_seconds() - cpu_start
+        print(
+            f"{engine:<10} {success / wall:>10.0f} {failure:>9} {cpu / wall * 100:>7.1f} "
+            f"{(cpu / success * 1_000_000) if success else 0:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
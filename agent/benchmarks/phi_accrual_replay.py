@@ -0,0 +1,216 @@
+"""
+Replays health status streams through `DeadNodeDetector` and reports
+detection latency against false positives, for the fixed timeout and a range of phi thresholds.
+
+A stream is a JSON lines file, one health status report per line -
+    {"node_id": "...", "reported_at": <ms, from DBHealthStatus>, "received_at": <seconds, local clock>}
+
+Any silence of a node longer than `--outage-seconds` is considered a real failure,
+a death detected during a shorter silence is a false positive.
+
+Record a stream from etcd (from the agent directory) -
+    python -m benchmarks.phi_accrual_replay record --cluster-id <id> --user <etcd user> --password <etcd password> --output stream.jsonl
+
+Replay a recorded stream -
+    python -m benchmarks.phi_accrual_replay replay --input stream.jsonl
+
+Replay synthetic steady and jittery streams -
+    python -m benchmarks.phi_accrual_replay replay
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+
+from generated.extras_pb2 import DBHealthStatus
+from agent import ServerConfig
+from agent.helpers import parse_etcd_watch_event
+from agent.internal.etcd_client import Etcd3Client
+from agent.monitor.dead_node_detector import DeadNodeDetector
+
+CLUSTER_ID = "replay"
+
+
+class VirtualClock:
+    def __init__(self, now:float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FixedTimeoutDetector(DeadNodeDetector):
+    """Behaviour before phi accrual, always waits `timeout_seconds` after the last report."""
+
+    def _timeout_seconds(self, node_id:str, health_status:DBHealthStatus) -> float:
+        return self.timeout_seconds
+
+
+def record(args):
+    config = ServerConfig()
+    deadline = time.time() + args.duration
+    count = 0
+    with open(args.output, "w") as f, Etcd3Client(
+        addresses=config.etcd_addresses,
+        user=args.user,
+        password=args.password,
+        timeout=10,
+    ) as client:
+        events_iterator, cancel = client.watch_prefix(config.kv_cluster_prefix.format(cluster_id=args.cluster_id))
+        for event in events_iterator:
+            if time.time() > deadline:
+                cancel()
+                break
+            parsed_event = parse_etcd_watch_event(event)
+            if not parsed_event or parsed_event.action != "update" or parsed_event.event_type != "status":
+                continue
+            f.write(json.dumps({
+                "node_id": parsed_event.node_id,
+                "reported_at": parsed_event.data.reported_at,
+                "received_at": time.time(),
+            }) + "\n")
+            count += 1
+    print(f"Recorded {count} status reports to {args.output}")
+
+
+def synthesize(nodes:int, seconds:float, interval_ms:float, jitter_ms:float, pause_probability:float) -> list[dict]:
+    """
+    Steady reports with gaussian jitter, occasional short pauses (GC, network blips)
+    and one real outage of 15 seconds for every 4th node.
+    """
+    stream = []
+    start = 1_000_000.0
+    for i in range(nodes):
+        node_id = f"node-{i}"
+        outage_at = start + random.uniform(seconds * 0.3, seconds * 0.6) if i % 4 == 0 else None
+        t = start + random.random() * interval_ms / 1000
+        while t < start + seconds:
+            if outage_at and outage_at <= t < outage_at + 15:
+                t = outage_at + 15
+                continue
+            delivery_delay = random.expovariate(1 / 0.01) # etcd + watch delivery
+            stream.append({"node_id": node_id, "reported_at": int(t * 1000), "received_at": t + delivery_delay})
+            t += max(0.0, random.gauss(interval_ms, jitter_ms)) / 1000
+            if random.random() < pause_probability:
+                t += random.uniform(0.5, 1.5)
+    stream.sort(key=lambda e: e["received_at"])
+    return stream
+
+
+def evaluate(stream:list[dict], detector:DeadNodeDetector, clock:VirtualClock, outage_seconds:float) -> dict:
+    status = DBHealthStatus(report_interval_ms=0)
+    last_received: dict[str, float] = {}
+    detections: list[tuple[str, float, float]] = [] # node_id, last report received at, detected at
+
+    next_tick = clock.now + detector.tick_seconds
+
+    def advance_till(t:float):
+        nonlocal next_tick
+        while next_tick <= t:
+            clock.now = next_tick
+            for node_id in detector.expire(clock.now):
+                detections.append((node_id, last_received[node_id], clock.now))
+            next_tick += detector.tick_seconds
+        clock.now = max(clock.now, t)
+
+    # Detector logs every recovery, keep the output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for event in stream:
+            advance_till(event["received_at"])
+            status.reported_at = event["reported_at"]
+            detector.update(event["node_id"], status, cluster_id=CLUSTER_ID)
+            last_received[event["node_id"]] = event["received_at"]
+        end_of_stream = clock.now
+        advance_till(end_of_stream + detector.config.dead_node_max_timeout_ms / 1000 + 1)
+
+    # Next report of each node after a given time, to know whether the node was really down
+    reports: dict[str, list[float]] = {}
+    for event in stream:
+        reports.setdefault(event["node_id"], []).append(event["received_at"])
+
+    outages = 0
+    for received in reports.values():
+        outages += sum(1 for a, b in zip(received, received[1:]) if b - a > outage_seconds)
+        if end_of_stream - received[-1] > outage_seconds:
+            outages += 1
+
+    latencies = []
+    false_positives = 0
+    for node_id, last_report, detected_at in detections:
+        next_report = next((r for r in reports[node_id] if r > last_report), None)
+        if next_report is None and end_of_stream - last_report <= outage_seconds:
+            # Detected only because the stream ended
+            continue
+        if next_report is None or next_report - last_report > outage_seconds:
+            latencies.append((detected_at - last_report) * 1000)
+        else:
+            false_positives += 1
+    latencies.sort()
+    return {
+        "outages": outages,
+        "detected": len(latencies),
+        "false_positives": false_positives,
+        "p50": latencies[len(latencies) // 2] if latencies else 0,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0,
+    }
+
+
+def replay(args):
+    if args.input:
+        with open(args.input) as f:
+            streams = {args.input: [json.loads(line) for line in f if line.strip()]}
+        for stream in streams.values():
+            stream.sort(key=lambda e: e["received_at"])
+    else:
+        random.seed(args.seed)
+        streams = {
+            "steady": synthesize(args.nodes, args.seconds, interval_ms=250, jitter_ms=5, pause_probability=0),
+            "jittery": synthesize(args.nodes, args.seconds, interval_ms=250, jitter_ms=80, pause_probability=0.005),
+        }
+
+    for name, stream in streams.items():
+        print(f"\n{name} - {len(stream)} reports")
+        print(f"{'detector':>14} | {'detected':>12} | {'false positives':>15} | {'latency p50':>11} | {'latency p99':>11}")
+        candidates = [("fixed 3s", None)] + [(f"phi {threshold:g}", threshold) for threshold in args.thresholds]
+        for label, threshold in candidates:
+            clock = VirtualClock(stream[0]["received_at"])
+            if threshold is None:
+                detector = FixedTimeoutDetector(timeout_seconds=3, clock=clock, start_threads=False)
+            else:
+                detector = DeadNodeDetector(timeout_seconds=3, clock=clock, start_threads=False)
+                detector.set_phi_threshold(CLUSTER_ID, threshold)
+            result = evaluate(stream, detector, clock, args.outage_seconds)
+            print(f"{label:>14} | {result['detected']:>5} / {result['outages']:<4} | {result['false_positives']:>15}"
+                  f" | {result['p50']:>8.0f} ms | {result['p99']:>8.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay health status streams through the dead node detector")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record health status reports of a cluster from etcd")
+    record_parser.add_argument("--cluster-id", required=True)
+    record_parser.add_argument("--user", required=True)
+    record_parser.add_argument("--password", required=True)
+    record_parser.add_argument("--duration", type=float, default=600, help="seconds")
+    record_parser.add_argument("--output", required=True)
+
+    replay_parser = subparsers.add_parser("replay", help="replay a recorded or synthetic stream")
+    replay_parser.add_argument("--input", help="recorded stream, synthetic streams are used if not provided")
+    replay_parser.add_argument("--thresholds", type=float, nargs="+", default=[1, 3, 5, 8, 12])
+    replay_parser.add_argument("--outage-seconds", type=float, default=5)
+    replay_parser.add_argument("--nodes", type=int, default=200)
+    replay_parser.add_argument("--seconds", type=float, default=120)
+    replay_parser.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Throughput and CPU cost of the node status events in `EtcdStateMonitor`, with and without the status fast path
+of `EtcdWatchMultiplexer`.
+
+- generic : every event is parsed into a `KVEvent`, handed over to the asyncio loop and handled on the
+            dispatch pool by `act_on_kv_event` (how all the events were handled before the split)
+- fast    : status events are decoded and handled by `act_on_status` right in the watch callback
+
+Both run the real handlers (dead node detector, successor ranking, config cache) against an in-memory etcd.
+Watch responses are fed straight into the watch callbacks on the loop, like the watch stream reader of
+`AsyncEtcd3Client` does, so only the agent side cost is measured.
+
+Usage (from the agent directory) -
+    python -m benchmarks.watch_status_events --clusters 200 --nodes 3 --events 200000
+"""
+import argparse
+import asyncio
+import resource
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_etcd import AsyncInMemoryEtcd, InMemoryEtcd, PutEvent
+from generated.extras_pb2 import ClusterConfig as ClusterConfigProtobufMessage
+from generated.extras_pb2 import ClusterNodeStatus, ClusterNodeType, DBHealthStatus
+from agent import ServerConfig
+from agent.internal.config import ClusterConfig, ClusterConfigCache
+from agent.monitor import watch_multiplexer
+from agent.monitor.dead_node_detector import DeadNodeDetector
+from agent.monitor.state import EtcdStateMonitor
+from agent.monitor.successor_ranking import SuccessorRanking
+from agent.monitor.watch_multiplexer import EtcdWatchMultiplexer
+
+
+class CapturingEtcd(AsyncInMemoryEtcd):
+    """Keeps the watch callbacks, so the benchmark can deliver the responses itself"""
+
+    def __init__(self):
+        super().__init__(InMemoryEtcd())
+        self.callbacks = {}
+
+    async def add_watch_prefix_callback(self, prefix, callback, **kwargs) -> int:
+        self.callbacks[prefix] = callback
+        return await super().add_watch_prefix_callback(prefix, callback, **kwargs)
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def build_monitor(handled:list) -> EtcdStateMonitor:
+    # Only the parts the status handling touches, no redis / reconciler / background threads
+    monitor = EtcdStateMonitor.__new__(EtcdStateMonitor)
+    monitor.config = ServerConfig()
+    monitor.cluster_config_cache = ClusterConfigCache()
+    monitor.dead_node_detector = DeadNodeDetector(timeout_seconds=3, start_threads=False)
+    monitor.successor_ranking = SuccessorRanking()
+
+    act_on_status = monitor.act_on_status
+
+    def counting_act_on_status(*args):
+        act_on_status(*args)
+        handled.append(None)
+
+    monitor.act_on_status = counting_act_on_status
+    return monitor
+
+
+def cluster_config(cluster_id:str, nodes:int) -> ClusterConfig:
+    config = ClusterConfigProtobufMessage(max_replication_lag_ms=1000)
+    for i in range(nodes):
+        node = config.nodes[f"{cluster_id}-node-{i}"]
+        node.type = ClusterNodeType.MASTER if i == 0 else ClusterNodeType.REPLICA
+        node.status = ClusterNodeStatus.ONLINE
+        node.weight = 1
+    return ClusterConfig.from_base(config, cluster_id)
+
+
+def build_responses(clusters:int, nodes:int, events:int) -> list[tuple[str, SimpleNamespace]]:
+    """Round robin over all the nodes, the gtid moves on with every report like on a busy cluster"""
+    config = ServerConfig()
+    responses = []
+    for i in range(events):
+        cluster_id = f"c{i % clusters}"
+        node_id = f"{cluster_id}-node-{(i // clusters) % nodes}"
+        status = DBHealthStatus(
+            reported_at=1_700_000_000_000 + i,
+            global_transaction_id=f"0-1-{1000 + i}",
+            is_replica=not node_id.endswith("-0"),
+            seconds_behind_master=0,
+            slave_io_running=True,
+            slave_sql_running=True,
+            threads_running=4,
+            uptime_seconds=86400,
+            report_interval_ms=250,
+        )
+        key = config.kv_cluster_node_status_key.format(cluster_id=cluster_id, node_id=node_id).encode()
+        event = PutEvent(key, status.SerializeToString(), i + 1, 1)
+        responses.append((
+            config.kv_cluster_nodes_prefix.format(cluster_id=cluster_id),
+            SimpleNamespace(events=[event], header=SimpleNamespace(revision=i + 1)),
+        ))
+    return responses
+
+
+async def run(mode:str, clusters:int, nodes:int, responses:list) -> tuple[float, float]:
+    kv = CapturingEtcd()
+    watch_multiplexer.get_working_etcd_cred_of_cluster = lambda cluster_id: ("bench", "bench")
+
+    async def create_client(self, credential):
+        return kv
+
+    EtcdWatchMultiplexer._create_client = create_client
+
+    handled = []
+    monitor = build_monitor(handled)
+    multiplexer = EtcdWatchMultiplexer(
+        on_event=monitor.act_on_kv_event,
+        on_status=monitor.act_on_status if mode == "fast" else None,
+    )
+    for i in range(clusters):
+        cluster_id = f"c{i}"
+        monitor.successor_ranking.update_config(cluster_id, cluster_config(cluster_id, nodes))
+        await multiplexer.add(cluster_id)
+
+    wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+    for i, (prefix, response) in enumerate(responses):
+        kv.callbacks[prefix](response)
+        if i % 1000 == 0:
+            # A stream reader yields to the loop in between the responses, let the queued events get handled
+            await asyncio.sleep(0)
+    while len(handled) < len(responses):
+        await asyncio.sleep(0.005)
+    wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+
+    for i in range(clusters):
+        await multiplexer.remove(f"c{i}")
+    multiplexer.executor.shutdown()
+    return wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the handling of node status watch events")
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--nodes", type=int, default=3, help="nodes per cluster")
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    responses = build_responses(args.clusters, args.nodes, args.events)
+    print(f"{args.events} status events over {args.clusters} clusters x {args.nodes} nodes")
+    print(f"{'mode':<8} {'events/s':>10} {'cpu us/event':>13}")
+    results = {}
+    for mode in ["generic", "fast"]:
+        wall, cpu = asyncio.run(run(mode, args.clusters, args.nodes, responses))
+        results[mode] = cpu
+        print(f"{mode:<8} {args.events / wall:>10.0f} {cpu / args.events * 1e6:>13.1f}")
+    print(f"cpu per event, generic / fast: {results['generic'] / results['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ from generated.inter_agent_pb2 import *
 from generated.inter_agent_pb2_grpc import InterAgentServiceStub
 from generated.job_pb2 import *
 from generated.job_pb2_grpc import JobServiceStub
+from generated.monitor_pb2 import *
+from generated.monitor_pb2_grpc import MonitorServiceStub
 from generated.mysql_pb2 import *
 from generated.mysql_pb2_grpc import MySQLServiceStub
 from generated.proxy_pb2 import *
@@ -48,6 +50,10 @@ class Agent:
     def job_service(self) -> JobServiceStub:
         return JobServiceStub(self.channel)
 
+    @property
+    def monitor_service(self) -> MonitorServiceStub:
+        return MonitorServiceStub(self.channel)
+
     @property
     def mysql_service(self) -> MySQLServiceStub:
         return MySQLServiceStub(self.channel)
@@ -41,14 +41,36 @@ OFFLINE: ClusterNodeStatus
 MAINTENANCE: ClusterNodeStatus
 
 class DBHealthStatus(_message.Message):
-    __slots__ = ("db_type", "reported_at", "global_transaction_id")
+    __slots__ = ("db_type", "reported_at", "global_transaction_id", "liveness_via_lease", "is_replica", "seconds_behind_master", "slave_io_running", "slave_sql_running", "rpl_semi_sync_master_status", "rpl_semi_sync_slave_status", "rpl_semi_sync_master_clients", "threads_running", "uptime_seconds", "report_interval_ms")
     DB_TYPE_FIELD_NUMBER: _ClassVar[int]
     REPORTED_AT_FIELD_NUMBER: _ClassVar[int]
     GLOBAL_TRANSACTION_ID_FIELD_NUMBER: _ClassVar[int]
+    LIVENESS_VIA_LEASE_FIELD_NUMBER: _ClassVar[int]
+    IS_REPLICA_FIELD_NUMBER: _ClassVar[int]
+    SECONDS_BEHIND_MASTER_FIELD_NUMBER: _ClassVar[int]
+    SLAVE_IO_RUNNING_FIELD_NUMBER: _ClassVar[int]
+    SLAVE_SQL_RUNNING_FIELD_NUMBER: _ClassVar[int]
+    RPL_SEMI_SYNC_MASTER_STATUS_FIELD_NUMBER: _ClassVar[int]
+    RPL_SEMI_SYNC_SLAVE_STATUS_FIELD_NUMBER: _ClassVar[int]
+    RPL_SEMI_SYNC_MASTER_CLIENTS_FIELD_NUMBER: _ClassVar[int]
+    THREADS_RUNNING_FIELD_NUMBER: _ClassVar[int]
+    UPTIME_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    REPORT_INTERVAL_MS_FIELD_NUMBER: _ClassVar[int]
     db_type: DBType
     reported_at: int
     global_transaction_id: str
-    def __init__(self, db_type: _Optional[_Union[DBType, str]] = ..., reported_at: _Optional[int] = ..., global_transaction_id: _Optional[str] = ...) -> None: ...
+    liveness_via_lease: bool
+    is_replica: bool
+    seconds_behind_master: int
+    slave_io_running: bool
+    slave_sql_running: bool
+    rpl_semi_sync_master_status: bool
+    rpl_semi_sync_slave_status: bool
+    rpl_semi_sync_master_clients: int
+    threads_running: int
+    uptime_seconds: int
+    report_interval_ms: int
+    def __init__(self, db_type: _Optional[_Union[DBType, str]] = ..., reported_at: _Optional[int] = ..., global_transaction_id: _Optional[str] = ..., liveness_via_lease: bool = ..., is_replica: bool = ..., seconds_behind_master: _Optional[int] = ..., slave_io_running: bool = ..., slave_sql_running: bool = ..., rpl_semi_sync_master_status: bool = ..., rpl_semi_sync_slave_status: bool = ..., rpl_semi_sync_master_clients: _Optional[int] = ..., threads_running: _Optional[int] = ..., uptime_seconds: _Optional[int] = ..., report_interval_ms: _Optional[int] = ...) -> None: ...
 
 class ClusterNodeConfig(_message.Message):
     __slots__ = ("type", "status", "ip", "agent_port", "db_port", "weight")
@@ -75,7 +97,7 @@ class ClusterProxyConfig(_message.Message):
     def __init__(self, ip: _Optional[str] = ..., agent_port: _Optional[int] = ...) -> None: ...
 
 class ClusterConfig(_message.Message):
-    __slots__ = ("max_replication_lag_ms", "failover_cooldown_ms", "last_failover_timestamp", "nodes", "proxy", "replication_user", "replication_password", "shared_token")
+    __slots__ = ("max_replication_lag_ms", "failover_cooldown_ms", "last_failover_timestamp", "nodes", "proxy", "replication_user", "replication_password", "shared_token", "healthcheck_interval_ms", "healthcheck_stable_interval_ms", "dead_node_phi_threshold")
     class NodesEntry(_message.Message):
         __slots__ = ("key", "value")
         KEY_FIELD_NUMBER: _ClassVar[int]
@@ -91,6 +113,9 @@ class ClusterConfig(_message.Message):
     REPLICATION_USER_FIELD_NUMBER: _ClassVar[int]
     REPLICATION_PASSWORD_FIELD_NUMBER: _ClassVar[int]
     SHARED_TOKEN_FIELD_NUMBER: _ClassVar[int]
+    HEALTHCHECK_INTERVAL_MS_FIELD_NUMBER: _ClassVar[int]
+    HEALTHCHECK_STABLE_INTERVAL_MS_FIELD_NUMBER: _ClassVar[int]
+    DEAD_NODE_PHI_THRESHOLD_FIELD_NUMBER: _ClassVar[int]
     max_replication_lag_ms: int
     failover_cooldown_ms: int
     last_failover_timestamp: int
@@ -99,4 +124,7 @@ class ClusterConfig(_message.Message):
     replication_user: str
     replication_password: str
     shared_token: str
-    def __init__(self, max_replication_lag_ms: _Optional[int] = ..., failover_cooldown_ms: _Optional[int] = ..., last_failover_timestamp: _Optional[int] = ..., nodes: _Optional[_Mapping[str, ClusterNodeConfig]] = ..., proxy: _Optional[_Union[ClusterProxyConfig, _Mapping]] = ..., replication_user: _Optional[str] = ..., replication_password: _Optional[str] = ..., shared_token: _Optional[str] = ...) -> None: ...
+    healthcheck_interval_ms: int
+    healthcheck_stable_interval_ms: int
+    dead_node_phi_threshold: float
+    def __init__(self, max_replication_lag_ms: _Optional[int] = ..., failover_cooldown_ms: _Optional[int] = ..., last_failover_timestamp: _Optional[int] = ..., nodes: _Optional[_Mapping[str, ClusterNodeConfig]] = ..., proxy: _Optional[_Union[ClusterProxyConfig, _Mapping]] = ..., replication_user: _Optional[str] = ..., replication_password: _Optional[str] = ..., shared_token: _Optional[str] = ..., healthcheck_interval_ms: _Optional[int] = ..., healthcheck_stable_interval_ms: _Optional[int] = ..., dead_node_phi_threshold: _Optional[float] = ...) -> None: ...
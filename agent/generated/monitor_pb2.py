@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: monitor.proto
+# Protobuf Python Version: 6.31.0
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    0,
+    '',
+    'monitor.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rmonitor.proto\x12\x03rds\x1a\x1bgoogle/protobuf/empty.proto\"\xaa\x01\n\x15\x44\x65\x61\x64NodeHandlingEntry\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x10\n\x08\x61ttempts\x18\x02 \x01(\r\x12\x0f\n\x07running\x18\x03 \x01(\x08\x12\x17\n\x0fnext_attempt_at\x18\x04 \x01(\x03\x12\x1c\n\x0flast_attempt_at\x18\x05 \x01(\x03H\x00\x88\x01\x01\x12\x12\n\nlast_error\x18\x06 \x01(\tB\x12\n\x10_last_attempt_at\"e\n\x1d\x44\x65\x61\x64NodeHandlingStateResponse\x12\x17\n\x0fmax_concurrency\x18\x01 \x01(\r\x12+\n\x07\x65ntries\x18\x02 \x03(\x0b\x32\x1a.rds.DeadNodeHandlingEntry2h\n\x0eMonitorService\x12V\n\x18GetDeadNodeHandlingState\x12\x16.google.protobuf.Empty\x1a\".rds.DeadNodeHandlingStateResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'monitor_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_DEADNODEHANDLINGENTRY']._serialized_start=52
+  _globals['_DEADNODEHANDLINGENTRY']._serialized_end=222
+  _globals['_DEADNODEHANDLINGSTATERESPONSE']._serialized_start=224
+  _globals['_DEADNODEHANDLINGSTATERESPONSE']._serialized_end=325
+  _globals['_MONITORSERVICE']._serialized_start=327
+  _globals['_MONITORSERVICE']._serialized_end=431
+# @@protoc_insertion_point(module_scope)
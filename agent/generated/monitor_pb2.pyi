@@ -0,0 +1,32 @@
+from google.protobuf import empty_pb2 as _empty_pb2
+from google.protobuf.internal import containers as _containers
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class DeadNodeHandlingEntry(_message.Message):
+    __slots__ = ("node_id", "attempts", "running", "next_attempt_at", "last_attempt_at", "last_error")
+    NODE_ID_FIELD_NUMBER: _ClassVar[int]
+    ATTEMPTS_FIELD_NUMBER: _ClassVar[int]
+    RUNNING_FIELD_NUMBER: _ClassVar[int]
+    NEXT_ATTEMPT_AT_FIELD_NUMBER: _ClassVar[int]
+    LAST_ATTEMPT_AT_FIELD_NUMBER: _ClassVar[int]
+    LAST_ERROR_FIELD_NUMBER: _ClassVar[int]
+    node_id: str
+    attempts: int
+    running: bool
+    next_attempt_at: int
+    last_attempt_at: int
+    last_error: str
+    def __init__(self, node_id: _Optional[str] = ..., attempts: _Optional[int] = ..., running: bool = ..., next_attempt_at: _Optional[int] = ..., last_attempt_at: _Optional[int] = ..., last_error: _Optional[str] = ...) -> None: ...
+
+class DeadNodeHandlingStateResponse(_message.Message):
+    __slots__ = ("max_concurrency", "entries")
+    MAX_CONCURRENCY_FIELD_NUMBER: _ClassVar[int]
+    ENTRIES_FIELD_NUMBER: _ClassVar[int]
+    max_concurrency: int
+    entries: _containers.RepeatedCompositeFieldContainer[DeadNodeHandlingEntry]
+    def __init__(self, max_concurrency: _Optional[int] = ..., entries: _Optional[_Iterable[_Union[DeadNodeHandlingEntry, _Mapping]]] = ...) -> None: ...
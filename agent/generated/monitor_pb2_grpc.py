@@ -0,0 +1,98 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and agent classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+from . import monitor_pb2 as monitor__pb2
+
+GRPC_GENERATED_VERSION = '1.73.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in monitor_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class MonitorServiceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetDeadNodeHandlingState = channel.unary_unary(
+                '/rds.MonitorService/GetDeadNodeHandlingState',
+                request_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+                response_deserializer=monitor__pb2.DeadNodeHandlingStateResponse.FromString,
+                _registered_method=True)
+
+
+class MonitorServiceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def GetDeadNodeHandlingState(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_MonitorServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetDeadNodeHandlingState': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetDeadNodeHandlingState,
+                    request_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+                    response_serializer=monitor__pb2.DeadNodeHandlingStateResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'rds.MonitorService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('rds.MonitorService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class MonitorService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def GetDeadNodeHandlingState(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rds.MonitorService/GetDeadNodeHandlingState',
+            google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+            monitor__pb2.DeadNodeHandlingStateResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,7 +1,8 @@
 import common_pb2 as _common_pb2
+from google.protobuf.internal import containers as _containers
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
-from collections.abc import Mapping as _Mapping
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
 from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
@@ -93,3 +94,39 @@ class MySQLDeleteResponse(_message.Message):
     meta: _common_pb2.ResponseMetadata
     deleted: bool
     def __init__(self, meta: _Optional[_Union[_common_pb2.ResponseMetadata, _Mapping]] = ..., deleted: bool = ...) -> None: ...
+
+class MySQLHealthMetricsRequest(_message.Message):
+    __slots__ = ("meta", "id", "window_seconds")
+    META_FIELD_NUMBER: _ClassVar[int]
+    ID_FIELD_NUMBER: _ClassVar[int]
+    WINDOW_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    meta: _common_pb2.RequestMetadata
+    id: str
+    window_seconds: _containers.RepeatedScalarFieldContainer[int]
+    def __init__(self, meta: _Optional[_Union[_common_pb2.RequestMetadata, _Mapping]] = ..., id: _Optional[str] = ..., window_seconds: _Optional[_Iterable[int]] = ...) -> None: ...
+
+class MySQLHealthMetricsWindow(_message.Message):
+    __slots__ = ("window_seconds", "samples", "p50_latency_ms", "p95_latency_ms", "p99_latency_ms", "failure_rate", "gtid_advance_rate")
+    WINDOW_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    SAMPLES_FIELD_NUMBER: _ClassVar[int]
+    P50_LATENCY_MS_FIELD_NUMBER: _ClassVar[int]
+    P95_LATENCY_MS_FIELD_NUMBER: _ClassVar[int]
+    P99_LATENCY_MS_FIELD_NUMBER: _ClassVar[int]
+    FAILURE_RATE_FIELD_NUMBER: _ClassVar[int]
+    GTID_ADVANCE_RATE_FIELD_NUMBER: _ClassVar[int]
+    window_seconds: int
+    samples: int
+    p50_latency_ms: float
+    p95_latency_ms: float
+    p99_latency_ms: float
+    failure_rate: float
+    gtid_advance_rate: float
+    def __init__(self, window_seconds: _Optional[int] = ..., samples: _Optional[int] = ..., p50_latency_ms: _Optional[float] = ..., p95_latency_ms: _Optional[float] = ..., p99_latency_ms: _Optional[float] = ..., failure_rate: _Optional[float] = ..., gtid_advance_rate: _Optional[float] = ...) -> None: ...
+
+class MySQLHealthMetricsResponse(_message.Message):
+    __slots__ = ("meta", "windows")
+    META_FIELD_NUMBER: _ClassVar[int]
+    WINDOWS_FIELD_NUMBER: _ClassVar[int]
+    meta: _common_pb2.ResponseMetadata
+    windows: _containers.RepeatedCompositeFieldContainer[MySQLHealthMetricsWindow]
+    def __init__(self, meta: _Optional[_Union[_common_pb2.ResponseMetadata, _Mapping]] = ..., windows: _Optional[_Iterable[_Union[MySQLHealthMetricsWindow, _Mapping]]] = ...) -> None: ...
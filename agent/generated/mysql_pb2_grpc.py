@@ -85,6 +85,11 @@ class MySQLServiceStub(object):
                 request_serializer=mysql__pb2.MySQLIdRequest.SerializeToString,
                 response_deserializer=common__pb2.EmptyResponseWithMeta.FromString,
                 _registered_method=True)
+        self.GetHealthMetrics = channel.unary_unary(
+                '/rds.MySQLService/GetHealthMetrics',
+                request_serializer=mysql__pb2.MySQLHealthMetricsRequest.SerializeToString,
+                response_deserializer=mysql__pb2.MySQLHealthMetricsResponse.FromString,
+                _registered_method=True)
 
 
 class MySQLServiceServicer(object):
@@ -150,6 +155,12 @@ class MySQLServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetHealthMetrics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MySQLServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -203,6 +214,11 @@ def add_MySQLServiceServicer_to_server(servicer, server):
                     request_deserializer=mysql__pb2.MySQLIdRequest.FromString,
                     response_serializer=common__pb2.EmptyResponseWithMeta.SerializeToString,
             ),
+            'GetHealthMetrics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetHealthMetrics,
+                    request_deserializer=mysql__pb2.MySQLHealthMetricsRequest.FromString,
+                    response_serializer=mysql__pb2.MySQLHealthMetricsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'rds.MySQLService', rpc_method_handlers)
@@ -483,3 +499,30 @@ class MySQLService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetHealthMetrics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/rds.MySQLService/GetHealthMetrics',
+            mysql__pb2.MySQLHealthMetricsRequest.SerializeToString,
+            mysql__pb2.MySQLHealthMetricsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)